@@ -0,0 +1,109 @@
+"""Table-editor representation of the alert input forms.
+
+Each alert is one row of a DataFrame with one column per form field, so all
+alerts can be edited in a single st.data_editor instead of ~25 widgets per
+alert. Structured fields (PreviousAlerts, Counterparties, BranchQueries) are
+held as compact JSON text in the table and parsed only when the alerts are
+sent.
+"""
+import json
+import math
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+RISK_LEVELS = ["Low", "Medium", "High"]
+
+# (field, label, kind, default); kinds: int, float, text, choice, json
+PREDICTION_FIELDS: List[Tuple[str, str, str, Any]] = [
+    ("AlertID", "Alert ID", "int", 1001),
+    ("FocusColumnValue", "Focus Column Value", "text", "PK-42101-1234567-1"),
+    ("AlertScore", "Alert Score", "float", 85.5),
+    ("CreateDate", "Create Date (ISO format)", "text", "2025-06-15T10:30:00"),
+    ("riskLevel", "Risk Level", "choice", "Low"),
+    ("ScenarioName", "Scenario Name", "text", "Unusually large installment"),
+    ("workflow", "Workflow", "text", "Unassigned"),
+    ("MatchDetails", "Match Details (JSON string)", "text", ""),
+    ("MatchInfoJson", "Match Info JSON (JSON array string)", "text", ""),
+]
+
+ANALYSIS_FIELDS: List[Tuple[str, str, str, Any]] = [
+    ("AlertID", "Alert ID", "int", 1),
+    ("FocusColumnValue", "Focus Column Value", "text", "100001"),
+    ("ScenarioName", "Scenario Name", "text", "Unusually large installment"),
+    ("CustomerName", "Customer Name", "text", ""),
+    ("CUSTOMERID", "Customer ID", "text", ""),
+    ("BranchID", "Branch ID", "text", ""),
+    ("Country", "Country", "text", "Pakistan"),
+    ("CustomerType", "Customer Type", "text", "Retail"),
+    ("RiskScore", "Risk Score", "text", "4.2"),
+    ("KYCMonthlyIncome", "KYC Monthly Income", "text", "85,000 PKR"),
+    ("KYCNoOfCredits", "KYC No. of Credits", "text", "3-5"),
+    ("KYCNoOfDebits", "KYC No. of Debits", "text", "8-12"),
+    ("KYCRiskCategoryValue", "KYC Risk Category", "choice", "Low"),
+    ("KYCValueOfCredits", "KYC Value of Credits", "text", "150,000 - 200,000 PKR"),
+    ("KYCValueOfDebits", "KYC Value of Debits", "text", "80,000 - 120,000 PKR"),
+    ("OccupationValue", "Occupation", "text", "Private Employee"),
+    ("STRCount", "STR Count", "int", 0),
+    ("FilteredTransactions", "Filtered Transactions (JSON array string)", "text", "[]"),
+    ("STRScenarioHistory", "STR Scenario History", "text", ""),
+    ("CreatedDate", "Created Date", "text", "2020-01-15"),
+    ("RelationshipStartDate", "Relationship Start Date", "text", "2020-01-15"),
+    ("CustomerStatus", "Customer Status", "text", "Retail Customer"),
+    ("PreviousAlerts", "Previous Alerts (JSON array)", "json", []),
+    ("Counterparties", "Counterparties (JSON array)", "json", []),
+    ("BranchQueries", "Branch Queries (JSON object)", "json", {}),
+]
+
+EDITOR_FIELDS = {"prediction": PREDICTION_FIELDS, "analysis": ANALYSIS_FIELDS}
+
+
+def _missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def alerts_to_frame(alerts: List[Dict[str, Any]], fields: List[Tuple[str, str, str, Any]]) -> pd.DataFrame:
+    """One row per alert; absent fields take the form defaults"""
+    rows = []
+    for alert in alerts:
+        row = {}
+        for name, _, kind, default in fields:
+            value = alert.get(name, default)
+            if kind == "json":
+                value = value if isinstance(value, str) else json.dumps(value or default, ensure_ascii=False)
+            elif kind == "choice" and value not in RISK_LEVELS:
+                value = default
+            row[name] = value
+        rows.append(row)
+    return pd.DataFrame(rows, columns=[name for name, _, _, _ in fields])
+
+
+def _cell(value: Any, kind: str, default: Any) -> Any:
+    if kind == "json":
+        # Same fallback as the form editors: unparsable JSON sends the empty default
+        try:
+            return json.loads(value) if isinstance(value, str) and value.strip() else default.copy()
+        except ValueError:
+            return default.copy()
+    if _missing(value):
+        return default
+    if kind == "int":
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+    if kind == "float":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+    return value if kind == "choice" else str(value)
+
+
+def frame_to_alerts(frame: pd.DataFrame, fields: List[Tuple[str, str, str, Any]]) -> List[Dict[str, Any]]:
+    """Alert payloads from the edited table, in row order"""
+    columns = [(name, kind, default) for name, _, kind, default in fields if name in frame.columns]
+    return [
+        {name: _cell(value, kind, default) for (name, kind, default), value in zip(columns, row)}
+        for row in frame[[name for name, _, _ in columns]].itertuples(index=False, name=None)
+    ]
@@ -0,0 +1,680 @@
+"""Client functions for the AML AI service endpoints.
+
+Kept outside the Streamlit script so they can be reused without a running app
+and so module-level state (the HTTP pool) survives Streamlit reruns.
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+
+import httpx
+
+from http_pool import PooledClient, get_http_client
+from call_history import record_call
+from request_timing import record_span
+from response_cache import ResponseCache, payload_key
+from result_store import ResultStore
+from single_flight import coalesce
+
+# Default API Base URL
+DEFAULT_API_BASE_URL = "https://syedkhizarrayaz-bm-ai-analysis-and-alert-priorit-2625d69.hf.space"
+
+# Maximum number of prediction requests in flight at once (1 = sequential)
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Read timeouts (seconds); connect timeout is configured on the pooled client
+PREDICTION_READ_TIMEOUT = 120
+ANALYSIS_READ_TIMEOUT = 300
+
+# Media type of a streamed analysis response (Server-Sent Events)
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def _analysis_url(api_base_url: str) -> str:
+    return f"{api_base_url}/api/ai-service/generateamlanalysis"
+
+
+def _describe_http_error(e: httpx.HTTPError) -> str:
+    """Error text for a failed request, including the server's error body if any"""
+    error_msg = str(e)
+    if isinstance(e, httpx.HTTPStatusError):
+        try:
+            error_detail = e.response.json()
+            error_msg = f"{error_msg}\nDetails: {json.dumps(error_detail, indent=2)}"
+        except ValueError:
+            error_msg = f"{error_msg}\nResponse: {e.response.text[:500]}"
+    return error_msg
+
+
+def _timing(response: Optional[httpx.Response], started: float,
+            decode_started: Optional[float] = None) -> Dict[str, Any]:
+    """Client timing of one call: the pooled client's request phases plus JSON decode and total (ms)"""
+    timing = dict(response.extensions.get("timing", {})) if response is not None else {}
+    now = time.perf_counter()
+    if decode_started is not None:
+        timing["decode_ms"] = round(1000 * (now - decode_started), 2)
+    timing["total_ms"] = round(1000 * (now - started), 2)
+    return timing
+
+
+def _record_failure(endpoint: str, e: httpx.HTTPError, started: float, alert_ids: List[Any], error: str,
+                    llm: Optional[str] = None) -> None:
+    response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+    status = response.status_code if response is not None else type(e).__name__
+    timing = _timing(response, started)
+    record_span(endpoint, timing, alert_ids=alert_ids, status=status)
+    for alert_id in alert_ids:
+        record_call(endpoint, alert_id, "error", latency_ms=timing["total_ms"], alerts_in_request=len(alert_ids),
+                    llm=llm, error=error)
+
+
+def _with_client_timing(result: Any, timing: Dict[str, Any]) -> Any:
+    """Copy of a response body with client_timing added to each item it contains"""
+    if not isinstance(result, dict):
+        return result
+    items = result.get("data")
+    if isinstance(items, list):
+        return dict(result, data=[dict(item, client_timing=timing) if isinstance(item, dict) else item
+                                  for item in items])
+    if isinstance(items, dict):
+        return dict(result, data=dict(items, client_timing=timing))
+    return dict(result, client_timing=timing)
+
+
+def _lookup(cache: Optional[ResponseCache], store: Optional[ResultStore], key: str) -> Optional[Any]:
+    """Cached or stored result for key; a store hit is copied into the cache, aged from when it was stored"""
+    value = cache.get(key) if cache is not None else None
+    if value is None and store is not None:
+        entry = store.get_entry(key)
+        if entry is not None:
+            stored_at, value = entry
+            if cache is not None:
+                cache.put(key, value, stored_at)
+    return value
+
+
+def _remember(cache: Optional[ResponseCache], store: Optional[ResultStore], key: str, endpoint: str,
+              alert: Dict[str, Any], value: Any, llm: Optional[str] = None) -> None:
+    if cache is not None:
+        cache.put(key, value)
+    if store is not None:
+        store.put(key, endpoint, alert, value, llm)
+
+
+def _send_prediction(client: PooledClient, url: str,
+                     alert_data: Dict[str, Any]) -> Tuple[Optional[Any], Optional[Dict[str, Any]], Optional[str]]:
+    """POST one alert: (response body, client timing, None) or (None, None, error).
+
+    A body that is not JSON comes back as {'raw_response': text} without timing.
+    """
+    alert_ids = [alert_data.get('AlertID')]
+    started = time.perf_counter()
+    try:
+        response = client.post(url, PREDICTION_READ_TIMEOUT, json=alert_data)
+        response.raise_for_status()
+        decode_started = time.perf_counter()
+        try:
+            result = response.json()
+        except json.JSONDecodeError:
+            result = None
+        timing = _timing(response, started, decode_started)
+        record_span("predict", timing, alert_ids=alert_ids, status=response.status_code)
+        record_call("predict", alert_data.get('AlertID'), "ok", latency_ms=timing["total_ms"])
+        if result is None:
+            return {"raw_response": response.text}, None, None
+        return result, timing, None
+    except httpx.TimeoutException as e:
+        _record_failure("predict", e, started, alert_ids, "Request timed out.")
+        return None, None, "Request timed out."
+    except httpx.HTTPError as e:
+        _record_failure("predict", e, started, alert_ids, _describe_http_error(e))
+        return None, None, _describe_http_error(e)
+
+
+def _predict_single_alert(client: PooledClient, url: str, index: int, alert_data: Dict[str, Any],
+                          cache: Optional[ResponseCache] = None,
+                          store: Optional[ResultStore] = None) -> Tuple[Optional[Any], Optional[str]]:
+    """Send one alert to the prediction API and return (result, error).
+
+    If the same alert is already being sent (by another session, say), this waits for that call instead.
+    """
+    key = payload_key(url, alert_data)
+    if cache is not None or store is not None:
+        cached = _lookup(cache, store, key)
+        if cached is not None:
+            record_call("predict", alert_data.get('AlertID'), "ok", cached=True)
+            return cached, None
+    started = time.perf_counter()
+    (result, timing, error), shared = coalesce(key, lambda: _send_prediction(client, url, alert_data), "predict")
+    if shared:
+        record_call("predict", alert_data.get('AlertID'), "error" if error else "ok",
+                    latency_ms=round(1000 * (time.perf_counter() - started), 2), error=error)
+    if error is not None:
+        return None, f"Alert {index+1} (ID: {alert_data.get('AlertID', 'N/A')}): {error}"
+    if timing is None:
+        return dict(result, alert_index=index), None
+    if shared:
+        timing = dict(timing, shared=True)
+    elif cache is not None or store is not None:
+        _remember(cache, store, key, "predict", alert_data, result)
+    return _with_client_timing(result, timing), None
+
+
+def call_prediction_api(data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL,
+                        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                        client: Optional[PooledClient] = None,
+                        cache: Optional[ResponseCache] = None,
+                        store: Optional[ResultStore] = None) -> Dict[str, Any]:
+    """Call the prediction API - handles single alert per request, up to max_concurrency in flight.
+
+    Alerts found in cache or store (if given) are answered without a request.
+    """
+    url = f"{api_base_url}/api/ai-service/predictalertpriority"
+    client = client or get_http_client(api_base_url)
+
+    # Process each alert individually since API expects a single object.
+    # executor.map yields in submission order, so results keep the input order.
+    if max_concurrency <= 1 or len(data) <= 1:
+        outcomes = [_predict_single_alert(client, url, i, alert_data, cache, store)
+                    for i, alert_data in enumerate(data)]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(data))) as executor:
+            outcomes = list(executor.map(lambda item: _predict_single_alert(client, url, *item, cache, store),
+                                         enumerate(data)))
+
+    results = [result for result, error in outcomes if error is None]
+    errors = [error for _, error in outcomes if error is not None]
+
+    if errors and not results:
+        return {"success": False, "error": "\n".join(errors)}
+    elif errors:
+        return {"success": True, "data": results, "errors": errors, "partial": True}
+    else:
+        # Combine all results into a single response format
+        combined_data = []
+        for result in results:
+            if isinstance(result, dict) and "data" in result:
+                combined_data.extend(result["data"] if isinstance(result["data"], list) else [result["data"]])
+            else:
+                combined_data.append(result)
+
+        return {"success": True, "data": {"status": 200, "message": "Success", "data": combined_data}}
+
+
+def extract_predictions(data: Any) -> List[Any]:
+    """Normalise the prediction response formats (combined or partial) to a list of predictions"""
+    if isinstance(data, dict) and "data" in data:
+        return data["data"] if isinstance(data["data"], list) else [data["data"]]
+    elif isinstance(data, list):
+        # Handle list of response objects
+        all_predictions = []
+        for item in data:
+            if isinstance(item, dict) and "data" in item:
+                preds = item["data"] if isinstance(item["data"], list) else [item["data"]]
+                all_predictions.extend(preds)
+            else:
+                all_predictions.append(item)
+        return all_predictions
+    else:
+        return [data]
+
+
+def combine_prediction_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine several call_prediction_api results (e.g. one per chunk) into one, keeping their order"""
+    predictions = []
+    errors = []
+    for result in results:
+        if result.get("success"):
+            predictions.extend(extract_predictions(result.get("data", {})))
+            errors.extend(result.get("errors", []))
+        else:
+            errors.append(result.get("error", "Unknown error"))
+
+    if errors and not predictions:
+        return {"success": False, "error": "\n".join(errors)}
+    merged = {"success": True, "data": {"status": 200, "message": "Success", "data": predictions}}
+    if errors:
+        merged.update(errors=errors, partial=True)
+    return merged
+
+
+def config_key(cloud: bool, llm_on_server: bool, audit: bool, evaluation: bool) -> str:
+    """Name of an LLM configuration, e.g. 'cloud+audit'"""
+    # Same priority the service applies: Cloud wins over a remote server
+    parts = ["cloud" if cloud or not llm_on_server else "remote"]
+    if audit:
+        parts.append("audit")
+    if evaluation:
+        parts.append("evaluation")
+    return "+".join(parts)
+
+
+def _alert_config(alert_with_flags: Dict[str, Any]) -> str:
+    return config_key(alert_with_flags.get('Cloud', False), alert_with_flags.get('llm_on_server', False),
+                      alert_with_flags.get('audit', False), alert_with_flags.get('evaluation', False))
+
+
+def with_analysis_flags(data: List[Dict[str, Any]], cloud: bool, llm_on_server: bool, url: str,
+                         anonymous: bool, audit: bool, evaluation: bool) -> List[Dict[str, Any]]:
+    """Copy each alert data object with the LLM flags added"""
+    data_with_flags = []
+    for alert in data:
+        alert_copy = alert.copy()
+        alert_copy['Cloud'] = cloud
+        alert_copy['llm_on_server'] = llm_on_server
+        alert_copy['url'] = url
+        alert_copy['anonymous'] = anonymous
+        alert_copy['audit'] = audit
+        alert_copy['evaluation'] = evaluation
+        data_with_flags.append(alert_copy)
+    return data_with_flags
+
+
+def _record_analyses(data_with_flags: List[Dict[str, Any]], result_data: Any, latency_ms: float) -> None:
+    """One call history row per alert answered by a successful analysis request"""
+    analyses = extract_analyses(result_data)
+    if len(analyses) != len(data_with_flags):
+        analyses = [{}] * len(data_with_flags)  # cannot tell which analysis is whose
+    for alert, analysis in zip(data_with_flags, analyses):
+        analysis = analysis if isinstance(analysis, dict) else {}
+        record_call("analysis", alert.get('AlertID'), "ok", latency_ms=latency_ms,
+                    server_ms=analysis.get('response_time_ms'), alerts_in_request=len(data_with_flags),
+                    model=analysis.get('model'), method=analysis.get('method'), llm=_alert_config(alert))
+
+
+def _post_analysis(client: PooledClient, api_base_url: str, data_with_flags: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """POST a list of flagged alerts to the analysis API"""
+    alert_ids = [alert.get('AlertID') for alert in data_with_flags]
+    started = time.perf_counter()
+    try:
+        api_url = _analysis_url(api_base_url)
+        response = client.post(api_url, ANALYSIS_READ_TIMEOUT, json=data_with_flags)
+        response.raise_for_status()
+        decode_started = time.perf_counter()
+        try:
+            result_data = response.json()
+        except json.JSONDecodeError:
+            result_data = {"raw_response": response.text}
+        # One request answers every alert in it, so they share its timing
+        timing = dict(_timing(response, started, decode_started), alerts=len(data_with_flags))
+        record_span("analysis", timing, alert_ids=alert_ids, status=response.status_code)
+        _record_analyses(data_with_flags, result_data, timing["total_ms"])
+        return {"success": True, "data": _with_client_timing(result_data, timing)}
+    except httpx.TimeoutException as e:
+        error = "Request timed out. The analysis may take longer. Please try again."
+        _record_failure("analysis", e, started, alert_ids, error, _alert_config(data_with_flags[0]))
+        return {"success": False, "error": error}
+    except httpx.HTTPError as e:
+        _record_failure("analysis", e, started, alert_ids, _describe_http_error(e), _alert_config(data_with_flags[0]))
+        return {"success": False, "error": _describe_http_error(e)}
+
+
+def _mark_shared(body: Any) -> Any:
+    """Copy of a response body whose items' client_timing is flagged as another caller's request"""
+    if not isinstance(body, dict) or not isinstance(body.get("data"), list):
+        return body
+    return dict(body, data=[dict(item, client_timing=dict(item["client_timing"], shared=True))
+                            if isinstance(item, dict) and item.get("client_timing") else item
+                            for item in body["data"]])
+
+
+def _post_analysis_shared(client: PooledClient, api_base_url: str,
+                          data_with_flags: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], bool]:
+    """(_post_analysis result, shared); an identical request already in flight is joined rather than repeated"""
+    started = time.perf_counter()
+    key = payload_key(_analysis_url(api_base_url), data_with_flags)
+    result, shared = coalesce(key, lambda: _post_analysis(client, api_base_url, data_with_flags), "analysis",
+                              len(data_with_flags))
+    if not shared:
+        return result, False
+    latency_ms = round(1000 * (time.perf_counter() - started), 2)
+    if result.get("success"):
+        _record_analyses(data_with_flags, result.get("data", {}), latency_ms)
+        return dict(result, data=_mark_shared(result.get("data"))), True
+    for alert in data_with_flags:
+        record_call("analysis", alert.get('AlertID'), "error", latency_ms=latency_ms,
+                    alerts_in_request=len(data_with_flags), llm=_alert_config(alert), error=result.get("error"))
+    return result, True
+
+
+def _post_analysis_cached(client: PooledClient, api_base_url: str, data_with_flags: List[Dict[str, Any]],
+                          cache: Optional[ResponseCache], store: Optional[ResultStore] = None) -> Dict[str, Any]:
+    """_post_analysis with per-alert cache and store lookups; only alerts found in neither are sent"""
+    return _post_analysis_counted(client, api_base_url, data_with_flags, cache, store)[0]
+
+
+def _post_analysis_counted(client: PooledClient, api_base_url: str, data_with_flags: List[Dict[str, Any]],
+                           cache: Optional[ResponseCache],
+                           store: Optional[ResultStore] = None) -> Tuple[Dict[str, Any], int]:
+    """(_post_analysis_cached result, number of alerts actually sent by this call)"""
+    if cache is None and store is None:
+        result, shared = _post_analysis_shared(client, api_base_url, data_with_flags)
+        return result, 0 if shared else len(data_with_flags)
+
+    api_url = _analysis_url(api_base_url)
+    keys = [payload_key(api_url, alert) for alert in data_with_flags]
+    analyses = [_lookup(cache, store, key) for key in keys]
+    missing = [i for i, analysis in enumerate(analyses) if analysis is None]
+    for alert, analysis in zip(data_with_flags, analyses):
+        if isinstance(analysis, dict):
+            record_call("analysis", alert.get('AlertID'), "ok", cached=True, llm=_alert_config(alert),
+                        model=analysis.get('model'), method=analysis.get('method'))
+    if not missing:
+        return {"success": True, "data": {"data": analyses}}, 0
+
+    result, shared = _post_analysis_shared(client, api_base_url, [data_with_flags[i] for i in missing])
+    sent = 0 if shared else len(missing)
+    if not result.get("success"):
+        return result, sent
+    fresh = extract_analyses(result.get("data", {}))
+    mappable = len(fresh) == len(missing) and all(isinstance(a, dict) and "raw_response" not in a for a in fresh)
+    if mappable:
+        # The API answers in request order, one analysis per alert
+        for i, analysis in zip(missing, fresh):
+            # Timing belongs to this request, not to later cache hits; the caller that sent it saves it
+            if not shared:
+                _remember(cache, store, keys[i], "analysis", data_with_flags[i],
+                          {k: v for k, v in analysis.items() if k != "client_timing"},
+                          _alert_config(data_with_flags[i]))
+            analyses[i] = analysis
+    if len(missing) == len(keys):
+        return result, sent
+    if not mappable:
+        analyses = [analysis for analysis in analyses if analysis is not None] + fresh
+    return {"success": True, "data": {"data": analyses}}, sent
+
+
+def call_analysis_api(data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL,
+                      cloud: bool = False, llm_on_server: bool = False,
+                      url: str = "", anonymous: bool = False,
+                      audit: bool = False, evaluation: bool = False,
+                      client: Optional[PooledClient] = None,
+                      cache: Optional[ResponseCache] = None,
+                      store: Optional[ResultStore] = None) -> Dict[str, Any]:
+    """Call the analysis API with flags - all uncached alerts in a single request"""
+    client = client or get_http_client(api_base_url)
+    data_with_flags = with_analysis_flags(data, cloud, llm_on_server, url, anonymous, audit, evaluation)
+    return _post_analysis_cached(client, api_base_url, data_with_flags, cache, store)
+
+
+def _iter_sse(response: httpx.Response) -> Iterator[Tuple[str, Any]]:
+    """(event name, decoded JSON data) for each Server-Sent Event of a streamed response"""
+    event, data = "message", []
+    for line in response.iter_lines():
+        if line.startswith(":"):
+            continue  # comment, e.g. a keep-alive
+        if line:
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                event = value
+            elif field == "data":
+                data.append(value)
+            continue
+        if data:
+            yield event, json.loads("\n".join(data))
+        event, data = "message", []
+    if data:
+        yield event, json.loads("\n".join(data))
+
+
+class AnalysisStream:
+    """Analysis request answered as Server-Sent Events, so reports can be shown while they are generated.
+
+    Iterating yields (alert index, analysis so far) each time an alert's
+    report or thinking text grows, and once more when it is complete; an
+    analysis still being generated has 'streaming': True. Alerts found in the
+    cache or store come first, complete. When iteration ends, result has the
+    shape call_analysis_api returns and first_token_ms is the time from
+    sending the request to the first text received. A service that answers
+    with plain JSON instead of a stream yields each alert once, complete.
+
+    Streamed requests are not shared with identical requests in flight.
+    """
+
+    def __init__(self, data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL,
+                 cloud: bool = False, llm_on_server: bool = False,
+                 url: str = "", anonymous: bool = False,
+                 audit: bool = False, evaluation: bool = False,
+                 client: Optional[PooledClient] = None,
+                 cache: Optional[ResponseCache] = None,
+                 store: Optional[ResultStore] = None):
+        self.api_base_url = api_base_url
+        self.client = client or get_http_client(api_base_url)
+        self.data_with_flags = with_analysis_flags(data, cloud, llm_on_server, url, anonymous, audit, evaluation)
+        self.cache = cache
+        self.store = store
+        self.analyses: List[Optional[Dict[str, Any]]] = [None] * len(data)
+        # Analyses of a non-streamed response that cannot be matched to an alert
+        self.unmatched: List[Any] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.first_token_ms: Optional[float] = None
+
+    def __iter__(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        api_url = _analysis_url(self.api_base_url)
+        keys = [payload_key(api_url, alert) for alert in self.data_with_flags]
+        if self.cache is not None or self.store is not None:
+            for i, (alert, key) in enumerate(zip(self.data_with_flags, keys)):
+                analysis = _lookup(self.cache, self.store, key)
+                if isinstance(analysis, dict):
+                    record_call("analysis", alert.get('AlertID'), "ok", cached=True, llm=_alert_config(alert),
+                                model=analysis.get('model'), method=analysis.get('method'))
+                    self.analyses[i] = analysis
+                    yield i, analysis
+
+        missing = [i for i, analysis in enumerate(self.analyses) if analysis is None]
+        error = (yield from self._send(api_url, missing)) if missing else None
+        for i in missing:
+            analysis = self.analyses[i]
+            if analysis is not None and "raw_response" not in analysis:
+                _remember(self.cache, self.store, keys[i], "analysis", self.data_with_flags[i],
+                          {k: v for k, v in analysis.items() if k != "client_timing"},
+                          _alert_config(self.data_with_flags[i]))
+
+        complete = [analysis for analysis in self.analyses if analysis is not None] + self.unmatched
+        if error and not complete:
+            self.result = {"success": False, "error": error}
+        elif error:
+            self.result = {"success": True, "data": {"data": complete}, "errors": [error], "partial": True}
+        else:
+            self.result = {"success": True, "data": {"data": complete}}
+
+    def _send(self, api_url: str, missing: List[int]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Stream the missing alerts' analyses into self.analyses; returns an error message or None"""
+        alerts = [self.data_with_flags[i] for i in missing]
+        started = time.perf_counter()
+        response: Optional[httpx.Response] = None
+        error = None
+        try:
+            with self.client.stream_post(api_url, ANALYSIS_READ_TIMEOUT, json=alerts,
+                                         headers={"Accept": f"{SSE_MEDIA_TYPE}, application/json"}) as response:
+                if response.status_code >= 400:
+                    response.read()  # for the error details
+                response.raise_for_status()
+                if response.headers.get("content-type", "").startswith(SSE_MEDIA_TYPE):
+                    error = yield from self._read_events(response, missing, started)
+                else:
+                    response.read()
+                    self._read_json(response, missing)
+                    yield from ((i, self.analyses[i]) for i in missing if self.analyses[i] is not None)
+        except httpx.TimeoutException:
+            error = "Request timed out. The analysis may take longer. Please try again."
+        except httpx.HTTPError as e:
+            error = _describe_http_error(e)
+
+        # Alerts whose text stopped half-way are failures, not reports
+        for i in missing:
+            if self.analyses[i] is not None and self.analyses[i].get("streaming"):
+                self.analyses[i] = None
+        timing = dict(_timing(response, started), alerts=len(alerts), streamed=True)
+        if self.first_token_ms is not None:
+            timing["first_token_ms"] = self.first_token_ms
+        status = response.status_code if response is not None else "error"
+        record_span("analysis", timing, alert_ids=[alert.get('AlertID') for alert in alerts], status=status)
+        for i, alert in zip(missing, alerts):
+            analysis = self.analyses[i]
+            if analysis is None:
+                record_call("analysis", alert.get('AlertID'), "error", latency_ms=timing["total_ms"],
+                            alerts_in_request=len(alerts), llm=_alert_config(alert),
+                            error=error or "The stream ended before this analysis was complete.")
+                continue
+            self.analyses[i] = dict(analysis, client_timing=timing)
+            record_call("analysis", alert.get('AlertID'), "ok", latency_ms=timing["total_ms"],
+                        server_ms=analysis.get('response_time_ms'), alerts_in_request=len(alerts),
+                        model=analysis.get('model'), method=analysis.get('method'), llm=_alert_config(alert))
+        if error is None and any(self.analyses[i] is None for i in missing) and not self.unmatched:
+            error = "The stream ended before every analysis was complete."
+        return error
+
+    def _read_events(self, response: httpx.Response, missing: List[int],
+                     started: float) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for event, payload in _iter_sse(response):
+            if event == "end":
+                break
+            if event == "error":
+                return payload.get("error", "The service reported an error while generating the analysis.")
+            if not isinstance(payload, dict) or not 0 <= payload.get("index", -1) < len(missing):
+                continue
+            i = missing[payload["index"]]
+            fields = {k: v for k, v in payload.items() if k not in ("index", "delta")}
+            if event == "start":
+                self.analyses[i] = dict(fields, analysis="", streaming=True)
+                continue
+            analysis = self.analyses[i] if self.analyses[i] is not None else {"analysis": "", "streaming": True}
+            if event in ("token", "thinking"):
+                if self.first_token_ms is None:
+                    self.first_token_ms = round(1000 * (time.perf_counter() - started), 2)
+                text_field = "analysis" if event == "token" else "thinking"
+                analysis[text_field] = analysis.get(text_field, "") + payload.get("delta", "")
+            elif event == "done":
+                analysis = dict(analysis, **fields)
+                analysis.pop("streaming", None)
+            else:
+                continue
+            self.analyses[i] = analysis
+            yield i, analysis
+        return None
+
+    def _read_json(self, response: httpx.Response, missing: List[int]) -> None:
+        try:
+            body = response.json()
+        except json.JSONDecodeError:
+            body = {"raw_response": response.text}
+        fresh = extract_analyses(body)
+        # The API answers in request order, one analysis per alert
+        for i, analysis in zip(missing, fresh):
+            self.analyses[i] = analysis if isinstance(analysis, dict) else {"raw_response": analysis}
+        self.unmatched = fresh[len(missing):]
+
+
+def iter_analysis_results(data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL,
+                          cloud: bool = False, llm_on_server: bool = False,
+                          url: str = "", anonymous: bool = False,
+                          audit: bool = False, evaluation: bool = False,
+                          group_size: int = 1, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                          client: Optional[PooledClient] = None,
+                          cache: Optional[ResponseCache] = None,
+                          store: Optional[ResultStore] = None,
+                          cancel: Optional[threading.Event] = None) -> Iterator[Tuple[List[int], Dict[str, Any]]]:
+    """Call the analysis API in groups of group_size alerts run in parallel.
+
+    Yields (alert_indices, result) as each group finishes, fastest first; each
+    result has the same shape as call_analysis_api's return value. Once cancel
+    is set, groups not sent yet are skipped.
+    """
+    client = client or get_http_client(api_base_url)
+    data_with_flags = with_analysis_flags(data, cloud, llm_on_server, url, anonymous, audit, evaluation)
+    group_size = max(1, group_size)
+    groups = [list(range(start, min(start + group_size, len(data_with_flags))))
+              for start in range(0, len(data_with_flags), group_size)]
+    for group, result, _, _ in run_analysis_groups(client, api_base_url, data, data_with_flags, groups,
+                                                   max_concurrency, cache, store, cancel):
+        yield group, result
+
+
+def _timed_post(client: PooledClient, api_base_url: str, alerts: List[Dict[str, Any]],
+                cache: Optional[ResponseCache], store: Optional[ResultStore]) -> Tuple[Dict[str, Any], int, float]:
+    start = time.perf_counter()
+    result, sent = _post_analysis_counted(client, api_base_url, alerts, cache, store)
+    return result, sent, time.perf_counter() - start
+
+
+def run_analysis_groups(client: PooledClient, api_base_url: str, data: List[Dict[str, Any]],
+                        data_with_flags: List[Dict[str, Any]], groups: List[List[int]], max_concurrency: int,
+                        cache: Optional[ResponseCache],
+                        store: Optional[ResultStore] = None,
+                        cancel: Optional[threading.Event] = None
+                        ) -> Iterator[Tuple[List[int], Dict[str, Any], int, float]]:
+    """Send each group of flagged alerts as one request, max_concurrency at a time.
+
+    Yields (alert_indices, result, alerts_sent, seconds) as each group
+    finishes; alerts_sent excludes alerts answered from the cache or store or
+    by an identical request already in flight. Once cancel is set, groups
+    still waiting for a worker are not sent and not yielded.
+    """
+    if not groups:
+        return
+
+    def send(group: List[int]) -> Optional[Tuple[Dict[str, Any], int, float]]:
+        # Checked as each group reaches a worker, so a cancel stops the queue without waiting for a result
+        if cancel is not None and cancel.is_set():
+            return None
+        return _timed_post(client, api_base_url, [data_with_flags[i] for i in group], cache, store)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(groups))))
+    try:
+        futures = {executor.submit(send, group): group for group in groups}
+        for future in as_completed(futures):
+            group = futures[future]
+            outcome = future.result()
+            if outcome is None:
+                continue
+            result, sent, seconds = outcome
+            if not result.get("success"):
+                labels = ", ".join(f"Alert {i+1} (ID: {data[i].get('AlertID', 'N/A')})" for i in group)
+                result = {"success": False, "error": f"{labels}: {result.get('error', 'Unknown error')}"}
+            yield group, result, sent, seconds
+    finally:
+        # Don't block a rerun on requests whose results nobody will read
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_analyses(data: Any) -> List[Any]:
+    """Normalise the analysis API response formats to a list of per-alert analyses"""
+    if isinstance(data, dict):
+        if "data" in data:
+            return data["data"] if isinstance(data["data"], list) else [data["data"]]
+        elif "Analysis" in data:
+            return data["Analysis"] if isinstance(data["Analysis"], list) else [data["Analysis"]]
+        else:
+            return [data]
+    elif isinstance(data, list):
+        return data
+    else:
+        return [data]
+
+
+def combine_analysis_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine several call_analysis_api-style results into one, keeping their order"""
+    analyses = []
+    errors = []
+    for result in results:
+        if result.get("success"):
+            analyses.extend(extract_analyses(result.get("data", {})))
+            errors.extend(result.get("errors", []))
+        else:
+            errors.append(result.get("error", "Unknown error"))
+
+    if errors and not analyses:
+        return {"success": False, "error": "\n".join(errors)}
+    elif errors:
+        return {"success": True, "data": {"data": analyses}, "errors": errors, "partial": True}
+    else:
+        return {"success": True, "data": {"data": analyses}}
+
+
+def merge_analysis_results(outcomes: List[Tuple[List[int], Dict[str, Any]]]) -> Dict[str, Any]:
+    """Combine per-group results from iter_analysis_results into one result in input order"""
+    return combine_analysis_results([result for _, result in sorted(outcomes, key=lambda outcome: outcome[0][0])])
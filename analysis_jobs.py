@@ -0,0 +1,162 @@
+"""Background jobs for AML analysis generation.
+
+A job sends one set of alerts through iter_analysis_results (or the adaptive
+iter_scheduled_analysis) on a worker pool, so the Streamlit script returns at
+once and the analyst can keep working while reports are generated. Jobs live
+in a module-level registry keyed by ID, so they survive reruns and page
+navigation; a session keeps the IDs it submitted and polls their status.
+
+Cancelling a job stops its queued groups from being sent at once (each group
+checks the job's cancel event before its request) and discards what is still
+outstanding. A request already in flight cannot be interrupted; it
+runs to completion in the background and its result is ignored.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from aml_api import DEFAULT_API_BASE_URL, iter_analysis_results, merge_analysis_results
+from batch_scheduler import iter_scheduled_analysis
+
+DEFAULT_JOB_WORKERS = 4
+# Finished jobs are forgotten this long after they end
+JOB_RETENTION_S = 24 * 3600
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class AnalysisJob:
+    """One background analysis run and its progress"""
+
+    def __init__(self, alerts: List[Dict[str, Any]], description: str):
+        self.id = uuid.uuid4().hex[:8]
+        self.description = description
+        self.total = len(alerts)
+        self.alert_ids = [alert.get("AlertID") for alert in alerts]
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.done_alerts = 0
+        self.outcomes: List[Tuple[List[int], Dict[str, Any]]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.plan: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.status not in FINISHED
+
+    def cancel(self) -> None:
+        """Stop sending further groups; the partial result keeps the reports already received"""
+        self._cancel.set()
+        with self._lock:
+            if self.active:
+                self._finish(CANCELLED)
+
+    def _finish(self, status: str) -> None:
+        self.status = status
+        self.finished = time.time()
+        if self.outcomes:
+            self.result = merge_analysis_results(self.outcomes)
+
+    def run(self, data: List[Dict[str, Any]], api_base_url: str, adaptive: bool, group_size: int,
+            kwargs: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._cancel.is_set():
+                return
+            self.status = RUNNING
+            self.started = time.time()
+        # The cancel event also stops groups waiting for a worker, not only the ones after the next result
+        if adaptive:
+            results = iter_scheduled_analysis(data, api_base_url, plan=self.plan, cancel=self._cancel, **kwargs)
+        else:
+            results = iter_analysis_results(data, api_base_url, group_size=group_size, cancel=self._cancel,
+                                            **kwargs)
+        try:
+            for group, result in results:
+                with self._lock:
+                    if self._cancel.is_set():
+                        break
+                    self.outcomes.append((group, result))
+                    self.done_alerts += len(group)
+        except Exception as e:  # keep the worker alive; the error is shown with the job
+            with self._lock:
+                self.error = f"{type(e).__name__}: {e}"
+                if self.active:
+                    self._finish(FAILED)
+            return
+        finally:
+            # Cancels groups not sent yet
+            results.close()
+        with self._lock:
+            if self.active:
+                self._finish(DONE)
+
+    def elapsed_s(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"id": self.id, "description": self.description, "status": self.status,
+                    "alerts": self.total, "done": self.done_alerts, "elapsed_s": self.elapsed_s(),
+                    "queued_s": (self.started or time.time()) - self.submitted, "error": self.error}
+
+
+class JobManager:
+    """Worker pool and registry of analysis jobs"""
+
+    def __init__(self, workers: int = DEFAULT_JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job")
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL,
+               adaptive: bool = False, group_size: int = 1, description: str = "",
+               **kwargs) -> AnalysisJob:
+        """Queue an analysis run; kwargs are passed to iter_analysis_results / iter_scheduled_analysis"""
+        job = AnalysisJob(data, description)
+        self._purge()
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(job.run, data, api_base_url, adaptive, group_size, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[AnalysisJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, job_ids: List[str]) -> List[AnalysisJob]:
+        """The jobs still known among job_ids, in the given order"""
+        with self._lock:
+            return [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+
+    def cancel(self, job_id: str) -> None:
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+
+    def _purge(self) -> None:
+        cutoff = time.time() - JOB_RETENTION_S
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job.finished is not None and job.finished < cutoff]:
+                del self._jobs[job_id]
+
+
+_manager = JobManager()
+
+
+def job_manager() -> JobManager:
+    return _manager
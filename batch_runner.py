@@ -0,0 +1,348 @@
+"""Headless batch runner for the AML AI service.
+
+Reads alerts from a CSV/JSONL/Parquet file or stdin, sends them through
+call_prediction_api / call_analysis_api with bounded concurrency and appends one
+JSON line per alert to the output file as results arrive. The output file is
+also the checkpoint: with --resume, alerts already written with status "ok"
+are not sent again (failed alerts are retried and get a new line). With
+--min-score, alerts scoring lower in the local pre-screen are counted but not
+sent.
+
+Examples:
+    python batch_runner.py predict alerts.csv -o priorities.jsonl
+    cat alerts.jsonl | python batch_runner.py analyze - -o reports.jsonl --resume --audit
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from aml_api import (DEFAULT_API_BASE_URL, call_analysis_api, call_prediction_api, extract_analyses,
+                     extract_predictions)
+from bulk_ingest import DEFAULT_CHUNK_SIZE, IngestSummary, iter_alert_batches
+from call_history import error_category
+from http_pool import DEFAULT_CONNECT_TIMEOUT, get_http_client
+from latency_stats import summarize_latencies
+from prescreen import prescreen_alerts, select_alerts
+from request_timing import span_recorder
+from resilience import (DEFAULT_FAILURE_THRESHOLD, DEFAULT_HEDGE_PERCENTILE, DEFAULT_MAX_ATTEMPTS,
+                        DEFAULT_RESET_TIMEOUT, ResiliencePolicy, ResilientClient, resilience_stats)
+from response_cache import ResponseCache, payload_key
+from result_store import ResultStore, get_result_store
+from warmup import PROBE_READ_TIMEOUT, wait_until_ready
+from wire_codec import available_encodings
+
+KINDS = {"predict": "prediction", "analyze": "analysis"}
+PROGRESS_INTERVAL_SECONDS = 10
+
+
+def alert_key(command: str, alert: Dict[str, Any], flags: Dict[str, Any]) -> str:
+    """Checkpoint key: the alert payload plus the options it is sent with"""
+    return payload_key(command, {"alert": alert, "flags": flags})
+
+
+def load_completed_keys(output_path: str) -> Set[str]:
+    """Keys of alerts already written with status "ok" to output_path"""
+    keys = set()
+    if not os.path.exists(output_path):
+        return keys
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                keys.add(record.get("key"))
+    return keys
+
+
+class RunStats:
+    """Counters and per-request latencies for one batch run"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ok = 0
+        self.failed = 0
+        self.skipped = 0
+        self.latencies_ms: List[float] = []
+        self.errors: Counter = Counter()
+
+    def record(self, records: List[Dict[str, Any]], latency_ms: float) -> None:
+        self.latencies_ms.append(latency_ms)
+        for record in records:
+            if record["status"] == "ok":
+                self.ok += 1
+            else:
+                self.failed += 1
+                self.errors[error_category(record.get("error", ""))] += 1
+
+    def report(self, ingest: IngestSummary) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "alerts_ok": self.ok,
+            "alerts_failed": self.failed,
+            "alerts_skipped": self.skipped,
+            "rows_rejected": ingest.rejected,
+            "alerts_screened_out": ingest.screened_out,
+            "elapsed_s": elapsed,
+            "alerts_per_s": (self.ok + self.failed) / elapsed if elapsed > 0 else 0.0,
+            "latency_ms": summarize_latencies(self.latencies_ms),
+            "errors": dict(self.errors),
+        }
+
+
+def iter_screened(batches: Iterable[List[Dict[str, Any]]], kind: str, min_score: float,
+                  ingest: IngestSummary) -> Iterator[List[Dict[str, Any]]]:
+    """The batches without the alerts scoring below min_score in the local pre-screen"""
+    for batch in batches:
+        selected = select_alerts(batch, prescreen_alerts(batch, kind), min_score)
+        ingest.screened_out += len(batch) - len(selected)
+        yield selected
+
+
+def iter_groups(batches: Iterable[List[Dict[str, Any]]], command: str, flags: Dict[str, Any],
+                completed: Set[str], group_size: int, stats: RunStats) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+    """(key, alert) groups of up to group_size alerts, leaving out alerts finished in an earlier run"""
+    group = []
+    for batch in batches:
+        for alert in batch:
+            key = alert_key(command, alert, flags)
+            if key in completed:
+                stats.skipped += 1
+                continue
+            group.append((key, alert))
+            if len(group) >= group_size:
+                yield group
+                group = []
+    if group:
+        yield group
+
+
+def run_group(command: str, group: List[Tuple[str, Dict[str, Any]]], api_base_url: str, flags: Dict[str, Any],
+              client: ResilientClient, cache: Optional[ResponseCache],
+              store: Optional[ResultStore]) -> Tuple[List[Dict[str, Any]], float]:
+    """Send one group of alerts and turn the response into one output record per alert"""
+    alerts = [alert for _, alert in group]
+    start = time.perf_counter()
+    if command == "predict":
+        result = call_prediction_api(alerts, api_base_url, max_concurrency=1, client=client, cache=cache,
+                                     store=store)
+        items = extract_predictions(result.get("data", {})) if result.get("success") else []
+    else:
+        result = call_analysis_api(alerts, api_base_url, client=client, cache=cache, store=store, **flags)
+        items = extract_analyses(result.get("data", {})) if result.get("success") else []
+    latency_ms = 1000 * (time.perf_counter() - start)
+
+    records = []
+    for i, (key, alert) in enumerate(group):
+        record = {"key": key, "AlertID": alert.get("AlertID"), "FocusColumnValue": alert.get("FocusColumnValue"),
+                  "latency_ms": round(latency_ms, 1)}
+        if not result.get("success"):
+            record.update(status="error", error=result.get("error", "Unknown error"))
+        elif result.get("partial"):
+            record.update(status="error", error="\n".join(result.get("errors", [])))
+        elif len(items) != len(alerts):
+            record.update(status="error", error=f"Expected {len(alerts)} results, got {len(items)}",
+                          response=result.get("data"))
+        else:
+            record.update(status="ok", result=items[i])
+        records.append(record)
+    return records, latency_ms
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    latency = report["latency_ms"]
+    print(f"Alerts: {report['alerts_ok']} ok, {report['alerts_failed']} failed, "
+          f"{report['alerts_skipped']} skipped (already done), {report['rows_rejected']} input rows rejected",
+          file=sys.stderr)
+    print(f"Throughput: {report['alerts_per_s']:.2f} alerts/s over {report['elapsed_s']:.1f} s", file=sys.stderr)
+    print(f"Request latency (ms): p50 {latency['p50']:.0f}, p95 {latency['p95']:.0f}, "
+          f"p99 {latency['p99']:.0f}, max {latency['max']:.0f} ({latency['count']} requests)", file=sys.stderr)
+    resilience = report.get("resilience")
+    if resilience:
+        print(f"Resilience: {resilience['retries']} retries, {resilience['hedges']} hedged "
+              f"({resilience['hedge_wins']} won), {resilience['fast_failures']} failed fast, "
+              f"circuit {resilience['state']}", file=sys.stderr)
+    store = report.get("result_store")
+    if store:
+        print(f"Result store: {store['hits']} answered from {store['path']}, {store['writes']} saved, "
+              f"{store['rows']} stored in total", file=sys.stderr)
+    if report["alerts_screened_out"]:
+        print(f"Pre-screen: {report['alerts_screened_out']} alerts below the minimum score not sent", file=sys.stderr)
+    if report["errors"]:
+        print("Errors: " + ", ".join(f"{name} x{count}" for name, count in report["errors"].items()),
+              file=sys.stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Run alert priority prediction or AML analysis in batch.")
+    parser.add_argument("command", choices=sorted(KINDS), help="'predict' for priorities, 'analyze' for AML reports")
+    parser.add_argument("input", help="CSV/JSONL/Parquet file of alerts, or '-' for stdin")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file the results are appended to")
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"],
+                        help="Input format (default: from the file extension; jsonl for stdin)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip alerts already written successfully to the output file")
+    parser.add_argument("--overwrite", action="store_true", help="Truncate an existing output file")
+    parser.add_argument("--api-base-url", default=DEFAULT_API_BASE_URL)
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Input rows read per step")
+    parser.add_argument("--group-size", type=int, default=1, help="Alerts per analysis request")
+    parser.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT)
+    parser.add_argument("--compress", choices=available_encodings(),
+                        help="Compact wire mode: compress request bodies if the server accepts the coding")
+    parser.add_argument("--warm-up", action="store_true",
+                        help="Probe the service until it answers before sending alerts (wakes a sleeping Space)")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="Tries per request on transient failures (1 disables retries)")
+    parser.add_argument("--no-hedge", action="store_true", help="Never send duplicate prediction requests")
+    parser.add_argument("--hedge-percentile", type=float, default=DEFAULT_HEDGE_PERCENTILE,
+                        help="Duplicate a prediction request running longer than this latency percentile")
+    parser.add_argument("--breaker-threshold", type=int, default=DEFAULT_FAILURE_THRESHOLD,
+                        help="Consecutive failures after which requests fail fast")
+    parser.add_argument("--breaker-reset", type=float, default=DEFAULT_RESET_TIMEOUT,
+                        help="Seconds an open circuit waits before probing the service again")
+    parser.add_argument("--min-score", type=float, default=0,
+                        help="Only send alerts scoring at least this (0-100) in the local pre-screen")
+    parser.add_argument("--cache-dir", help="Reuse responses cached on disk in this directory")
+    parser.add_argument("--store", metavar="PATH",
+                        help="Reuse and save results in this result store database (e.g. the app's .cache/results.db)")
+    parser.add_argument("--spans", help="Append per-request client timing spans (JSONL) to this file")
+    parser.add_argument("--metrics", help="Keep Prometheus text-format timing histograms in this file")
+    parser.add_argument("--report-json", help="Also write the final report to this JSON file")
+    llm = parser.add_argument_group("analysis options")
+    llm.add_argument("--cloud", action="store_true", help="Use Cloud LLM (default if no LLM option is given)")
+    llm.add_argument("--llm-on-server", action="store_true", help="Use a remote Ollama server")
+    llm.add_argument("--remote-url", default="", help="Remote Ollama server URL")
+    llm.add_argument("--anonymous", action="store_true", help="Mask PII")
+    llm.add_argument("--audit", action="store_true", help="Include the model's thinking")
+    llm.add_argument("--evaluation", action="store_true", help="Evaluate and fix the generated analysis")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    command = args.command
+    flags: Dict[str, Any] = {}
+    if command == "analyze":
+        # Same default as the app: Cloud LLM if no LLM option is selected
+        flags = dict(cloud=args.cloud or not args.llm_on_server, llm_on_server=args.llm_on_server,
+                     url=args.remote_url, anonymous=args.anonymous, audit=args.audit, evaluation=args.evaluation)
+
+    if os.path.exists(args.output) and os.path.getsize(args.output) and not (args.resume or args.overwrite):
+        print(f"{args.output} already exists; use --resume to continue it or --overwrite to replace it.",
+              file=sys.stderr)
+        return 2
+    completed = load_completed_keys(args.output) if args.resume else set()
+
+    if args.input == "-":
+        source, file_name = sys.stdin, f"stdin.{args.format or 'jsonl'}"
+    else:
+        source, file_name = args.input, f"input.{args.format}" if args.format else args.input
+
+    span_recorder().configure(args.spans, args.metrics)
+    pool = get_http_client(args.api_base_url, pool_size=max(args.concurrency, 1),
+                           connect_timeout=args.connect_timeout, compression=args.compress)
+    if args.warm_up:
+        print(f"Waking {args.api_base_url}...", file=sys.stderr)
+        probe = wait_until_ready(pool, PROBE_READ_TIMEOUT)
+        if not probe["ok"]:
+            print(f"Service not ready after {PROBE_READ_TIMEOUT:.0f} s: {probe['error'] or probe['status']}",
+                  file=sys.stderr)
+            return 1
+        print(f"Service ready ({probe['latency_ms'] / 1000:.1f} s)", file=sys.stderr)
+    client = ResilientClient(
+        pool,
+        ResiliencePolicy(max_attempts=args.max_attempts, hedge=not args.no_hedge,
+                         hedge_percentile=args.hedge_percentile, failure_threshold=args.breaker_threshold,
+                         reset_timeout=args.breaker_reset))
+    cache = ResponseCache(disk_dir=args.cache_dir) if args.cache_dir else None
+    store = get_result_store(args.store) if args.store else None
+    ingest = IngestSummary()
+    stats = RunStats()
+    group_size = max(args.group_size, 1) if command == "analyze" else 1
+    batches = iter_alert_batches(source, KINDS[command], file_name, args.chunk_size, ingest)
+    if args.min_score > 0:
+        batches = iter_screened(batches, KINDS[command], args.min_score, ingest)
+    groups = iter_groups(batches, command, flags, completed, group_size, stats)
+
+    mode = "w" if args.overwrite else "a"
+    if mode == "a" and os.path.exists(args.output) and os.path.getsize(args.output):
+        with open(args.output, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    else:
+        needs_newline = False
+
+    interrupted = False
+    last_progress = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(args.concurrency, 1))
+    pending: Set[Future] = set()
+    with open(args.output, mode, encoding="utf-8") as out:
+        if needs_newline:
+            out.write("\n")
+
+        def write_done(done: Iterable[Future]) -> None:
+            nonlocal last_progress
+            for future in done:
+                if future.cancelled():
+                    continue
+                records, latency_ms = future.result()
+                stats.record(records, latency_ms)
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if time.perf_counter() - last_progress >= PROGRESS_INTERVAL_SECONDS:
+                last_progress = time.perf_counter()
+                report = stats.report(ingest)
+                print(f"[progress] {stats.ok} ok, {stats.failed} failed, {stats.skipped} skipped, "
+                      f"{report['alerts_per_s']:.2f} alerts/s", file=sys.stderr)
+
+        try:
+            try:
+                for group in groups:
+                    if len(pending) >= 2 * args.concurrency:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        write_done(done)
+                    pending.add(executor.submit(run_group, command, group, args.api_base_url, flags, client, cache,
+                                                store))
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    write_done(done)
+            except KeyboardInterrupt:
+                # Keep the work already in flight; everything else is picked up by --resume
+                interrupted = True
+                for future in pending:
+                    future.cancel()
+                running = [future for future in pending if not future.cancelled()]
+                print(f"Interrupted; waiting for {len(running)} requests in flight (Ctrl-C again to abort)...",
+                      file=sys.stderr)
+                done, _ = wait(running)
+                write_done(done)
+        except ValueError as e:
+            print(f"Could not read input: {e}", file=sys.stderr)
+            return 2
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    span_recorder().flush()
+    report = stats.report(ingest)
+    report["resilience"] = resilience_stats().get(client.base_url, {})
+    if store is not None:
+        report["result_store"] = store.stats()
+    print_report(report)
+    if args.report_json:
+        with open(args.report_json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if interrupted:
+        return 130
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
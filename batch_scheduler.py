@@ -0,0 +1,167 @@
+"""Adaptive batching for the analysis endpoint.
+
+Instead of sending every alert in one request under a fixed read timeout,
+alerts are split into batches by count and serialized size and the batches
+run concurrently. The number of alerts per batch comes from the per-alert
+latency observed for the same LLM configuration (cloud / remote Ollama,
+audit, evaluation) on recent calls: a batch is sized so its predicted
+duration stays under a safety fraction of the read timeout, and small jobs
+are spread over the available concurrency instead of sharing one request.
+
+The latency history lives at module level, so it survives Streamlit reruns.
+"""
+import json
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from aml_api import (ANALYSIS_READ_TIMEOUT, DEFAULT_API_BASE_URL, DEFAULT_MAX_CONCURRENCY, config_key,
+                     run_analysis_groups, with_analysis_flags)
+from http_pool import PooledClient, get_http_client
+from latency_stats import percentile
+from response_cache import ResponseCache
+from result_store import ResultStore
+
+# Predicted batch duration must stay below this fraction of the read timeout
+TIMEOUT_SAFETY = 0.5
+# Largest request body per batch (serialized alerts)
+MAX_BATCH_BYTES = 512 * 1024
+MAX_BATCH_ALERTS = 50
+# Per-alert seconds observed per configuration; the estimate is their p90
+HISTORY_SIZE = 50
+ESTIMATE_PERCENTILE = 90
+# Assumed seconds per alert until a configuration has been observed
+PRIOR_SECONDS_PER_ALERT = {"cloud": 30.0, "remote": 60.0}
+AUDIT_FACTOR = 2.0
+EVALUATION_FACTOR = 2.0
+
+
+class LatencyModel:
+    """Recent per-alert latencies for each base URL and LLM configuration"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._history: Dict[Tuple[str, str], Deque[float]] = {}
+        self.history_size = history_size
+
+    def observe(self, api_base_url: str, config: str, alerts: int, seconds: float) -> None:
+        if alerts <= 0:
+            return
+        with self._lock:
+            history = self._history.setdefault((api_base_url, config), deque(maxlen=self.history_size))
+            history.append(seconds / alerts)
+
+    def estimate(self, api_base_url: str, config: str) -> Tuple[float, int]:
+        """(seconds per alert, number of observations it is based on)"""
+        with self._lock:
+            history = list(self._history.get((api_base_url, config), ()))
+        if history:
+            return percentile(sorted(history), ESTIMATE_PERCENTILE), len(history)
+        parts = config.split("+")
+        prior = PRIOR_SECONDS_PER_ALERT[parts[0]]
+        if "audit" in parts:
+            prior *= AUDIT_FACTOR
+        if "evaluation" in parts:
+            prior *= EVALUATION_FACTOR
+        return prior, 0
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = list(self._history)
+        rows = []
+        for api_base_url, config in keys:
+            seconds, samples = self.estimate(api_base_url, config)
+            rows.append({"api_base_url": api_base_url, "config": config, "seconds_per_alert": seconds,
+                         "samples": samples})
+        return rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._history.clear()
+
+
+_model = LatencyModel()
+
+
+def latency_model() -> LatencyModel:
+    return _model
+
+
+def plan_batches(data_with_flags: List[Dict[str, Any]], seconds_per_alert: float, max_concurrency: int,
+                 read_timeout: float = ANALYSIS_READ_TIMEOUT, max_bytes: int = MAX_BATCH_BYTES,
+                 max_alerts: int = MAX_BATCH_ALERTS) -> Tuple[List[List[int]], Dict[str, Any]]:
+    """Split alerts into batches of consecutive indices; returns (batches, the limits used)"""
+    by_timeout = max(1, math.floor(TIMEOUT_SAFETY * read_timeout / max(seconds_per_alert, 1e-3)))
+    # Enough batches to keep every concurrent slot busy
+    by_concurrency = max(1, math.ceil(len(data_with_flags) / max(1, max_concurrency)))
+    alerts_limit = min(by_timeout, by_concurrency, max_alerts)
+
+    batches: List[List[int]] = []
+    sizes: List[int] = []
+    batch: List[int] = []
+    batch_bytes = 0
+    for i, alert in enumerate(data_with_flags):
+        size = len(json.dumps(alert, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        if batch and (len(batch) >= alerts_limit or batch_bytes + size > max_bytes):
+            batches.append(batch)
+            sizes.append(batch_bytes)
+            batch, batch_bytes = [], 0
+        batch.append(i)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+        sizes.append(batch_bytes)
+    if alerts_limit == by_timeout:
+        limited_by = "timeout"
+    elif alerts_limit == by_concurrency:
+        limited_by = "concurrency"
+    else:
+        limited_by = "max_alerts"
+    limits = {"batch_bytes": sizes, "alerts_per_batch": alerts_limit, "limited_by": limited_by,
+              "max_bytes": max_bytes, "read_timeout_s": read_timeout}
+    return batches, limits
+
+
+def iter_scheduled_analysis(data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL,
+                            cloud: bool = False, llm_on_server: bool = False,
+                            url: str = "", anonymous: bool = False,
+                            audit: bool = False, evaluation: bool = False,
+                            max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                            client: Optional[PooledClient] = None,
+                            cache: Optional[ResponseCache] = None,
+                            store: Optional[ResultStore] = None,
+                            plan: Optional[Dict[str, Any]] = None,
+                            cancel: Optional[threading.Event] = None) -> Iterator[Tuple[List[int], Dict[str, Any]]]:
+    """Like iter_analysis_results, with batches sized by the scheduler.
+
+    If plan is a dict it is filled with the batching decision (configuration,
+    latency estimate, limits) and a 'batches' list that gets one record per
+    batch as it finishes (alerts, bytes, predicted and actual seconds, status).
+    """
+    client = client or get_http_client(api_base_url)
+    plan = plan if plan is not None else {}
+    config = config_key(cloud, llm_on_server, audit, evaluation)
+    seconds_per_alert, samples = _model.estimate(api_base_url, config)
+    data_with_flags = with_analysis_flags(data, cloud, llm_on_server, url, anonymous, audit, evaluation)
+    batches, limits = plan_batches(data_with_flags, seconds_per_alert, max_concurrency)
+    plan.update(limits, config=config, seconds_per_alert=seconds_per_alert, estimate_samples=samples,
+                alerts=len(data), batch_count=len(batches), concurrency=max_concurrency, batches=[])
+
+    batch_numbers = {batch[0]: number for number, batch in enumerate(batches)}
+    for group, result, sent, seconds in run_analysis_groups(client, api_base_url, data, data_with_flags,
+                                                            batches, max_concurrency, cache, store, cancel):
+        # A timed-out batch took at least this long, so it counts too; other failures say nothing
+        if result.get("success") or "timed out" in result.get("error", ""):
+            _model.observe(api_base_url, config, sent, seconds)
+        plan["batches"].append({
+            "batch": batch_numbers[group[0]] + 1,
+            "alerts": len(group),
+            "bytes": limits["batch_bytes"][batch_numbers[group[0]]],
+            "sent": sent,
+            "alert_ids": ", ".join(str(data[i].get("AlertID", "N/A")) for i in group),
+            "predicted_s": round(seconds_per_alert * sent, 1),
+            "elapsed_s": round(seconds, 2),
+            "status": "ok" if result.get("success") else "error",
+        })
+        yield group, result
@@ -0,0 +1,81 @@
+"""Rerun cost of the alert editors in streamlit_demo.py.
+
+Runs the app headless with Streamlit's AppTest, fills the analysis tab with
+example alerts and times reruns in each editor mode. "full rerun" is the whole
+script (what every edit costs with the form editors); "editor rerun" is the
+table editor fragment on its own, which is all that reruns when a cell is
+edited in Table mode. Results are appended to the benchmark history file.
+
+    python bench_editor.py --alerts 10 100 --repeats 5
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from streamlit.testing.v1 import AppTest
+
+from benchmark import DEFAULT_RESULTS_FILE, git_revision, make_alerts
+from latency_stats import summarize_latencies
+from sample_data import ANALYSIS_EXAMPLE
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_demo.py")
+# The form editors allow at most this many alerts
+MAX_FORM_ALERTS = 10
+
+
+def measure(mode: str, alerts: int, repeats: int) -> Dict[str, Any]:
+    app = AppTest.from_file(APP_PATH, default_timeout=120)
+    app.session_state["analysis_data"] = make_alerts(ANALYSIS_EXAMPLE, alerts)
+    app.session_state["analysis_editor_mode"] = mode
+    if mode == "Forms":
+        app.session_state["num_analysis_alerts"] = alerts
+    app.run()
+    if app.exception:
+        raise SystemExit(f"App raised: {app.exception[0].value}")
+
+    full = []
+    for i in range(repeats):
+        if mode == "Forms":
+            # A keystroke in one field of the last alert
+            app.text_input(key=f"analysis_customer_name_{alerts - 1}").set_value(f"Edited {i}")
+        start = time.perf_counter()
+        app.run()
+        full.append(1000 * (time.perf_counter() - start))
+    record = {"scenario": f"editor-{mode.lower()}-{alerts}", "mode": mode, "alerts": alerts,
+              "full_rerun_ms": summarize_latencies(full)}
+    editor_times = app.session_state["run_times"].get("analysis_editor") if mode == "Table" else None
+    record["edit_rerun_ms"] = summarize_latencies(editor_times[-repeats:]) if editor_times else record["full_rerun_ms"]
+    return record
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure rerun times of the alert editors.")
+    parser.add_argument("--alerts", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSONL file results are appended to")
+    args = parser.parse_args(argv)
+
+    records = []
+    for alerts in args.alerts:
+        for mode in ("Forms", "Table"):
+            if mode == "Forms" and alerts > MAX_FORM_ALERTS:
+                print(f"Forms: skipped at {alerts} alerts (the form editors allow {MAX_FORM_ALERTS})")
+                continue
+            records.append(measure(mode, alerts, args.repeats))
+
+    print(f"{'scenario':<22}{'full rerun p50':>16}{'per-edit rerun p50':>20}")
+    for record in records:
+        print(f"{record['scenario']:<22}{record['full_rerun_ms']['p50']:>13.0f} ms"
+              f"{record['edit_rerun_ms']['p50']:>17.0f} ms")
+    run_info = {"timestamp": datetime.now(timezone.utc).isoformat(), "git_rev": git_revision()}
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict(run_info, **record)) + "\n")
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
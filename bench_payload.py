@@ -0,0 +1,112 @@
+"""How payload costs grow with alert count and transactions per customer.
+
+For each size, synthetic_alerts.py generates a seeded batch and the
+benchmark times each stage an alert goes through on its way to the service:
+
+- serialize: the compact JSON request body, with its raw and gzip size
+- ingest: writing the batch to a JSON Lines file and reading it back through bulk_ingest
+- upload: sending the batch to an in-process mock whose latency is zero, so
+  the time is the client, the loopback transfer and the server's parsing
+- render: the alert table the app sends to the browser (the table editor's
+  frame, converted to Arrow)
+- prescreen: the local pre-screen of the batch
+
+The timings are appended to the benchmark history file.
+
+    python bench_payload.py --alerts 10 100 1000 --transactions 10 1000
+    python bench_payload.py --kind prediction --alerts 100 --transactions 10000 --repeats 1
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+
+from alert_editor import EDITOR_FIELDS, alerts_to_frame
+from aml_api import call_analysis_api, call_prediction_api
+from benchmark import DEFAULT_RESULTS_FILE, git_revision
+from bulk_ingest import iter_alert_batches
+from http_pool import get_http_client
+from latency_stats import summarize_latencies
+from mock_server import MockSettings, start_in_background
+from prescreen import prescreen_alerts
+from synthetic_alerts import DEFAULT_SEED, generate_alerts, write_alerts
+from wire_codec import compact_json, compress
+
+STAGES = ["serialize", "ingest", "upload", "render", "prescreen"]
+
+
+def timed(action: Callable[[], Any]) -> float:
+    started = time.perf_counter()
+    action()
+    return 1000 * (time.perf_counter() - started)
+
+
+def measure(kind: str, alerts: List[Dict[str, Any]], base_url: str, repeats: int) -> Dict[str, Any]:
+    client = get_http_client(base_url)
+    body = compact_json(alerts)
+    frame = alerts_to_frame(alerts, EDITOR_FIELDS[kind])
+    times: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "alerts.jsonl")
+        for _ in range(repeats):
+            times["serialize"].append(timed(lambda: compact_json(alerts)))
+            times["ingest"].append(timed(lambda: (write_alerts(iter(alerts), path, kind),
+                                                  list(iter_alert_batches(path, kind)))))
+            if kind == "analysis":
+                send = lambda: call_analysis_api(alerts, base_url, cloud=True, client=client)
+            else:
+                send = lambda: call_prediction_api(alerts, base_url, client=client)
+            times["upload"].append(timed(send))
+            times["render"].append(timed(lambda: convert_pandas_df_to_arrow_bytes(
+                alerts_to_frame(alerts, EDITOR_FIELDS[kind]))))
+            times["prescreen"].append(timed(lambda: prescreen_alerts(alerts, kind)))
+        file_bytes = os.path.getsize(path)
+    record = {"body_bytes": len(body), "gzip_bytes": len(compress(body, "gzip")), "file_bytes": file_bytes,
+              "arrow_bytes": len(convert_pandas_df_to_arrow_bytes(frame))}
+    record.update({f"{stage}_ms": summarize_latencies(values) for stage, values in times.items()})
+    return record
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure how serialization, upload and render costs grow with size.")
+    parser.add_argument("--kind", choices=sorted(EDITOR_FIELDS), default="analysis")
+    parser.add_argument("--alerts", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--transactions", type=int, nargs="+", default=[10, 1000],
+                        help="Transactions per customer")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSONL file results are appended to")
+    args = parser.parse_args(argv)
+
+    base_url, server = start_in_background(MockSettings(prediction_latency_ms=0, analysis_latency_ms=0,
+                                                        report_paragraphs=1, thinking_paragraphs=1, seed=args.seed))
+    records: List[Dict[str, Any]] = []
+    try:
+        for transactions in args.transactions:
+            for count in args.alerts:
+                alerts = generate_alerts(args.kind, count, (transactions, transactions), args.seed)
+                record = {"scenario": f"payload-{args.kind}-{count}x{transactions}", "kind": args.kind,
+                          "alerts": count, "transactions": count * transactions}
+                record.update(measure(args.kind, alerts, base_url, args.repeats))
+                records.append(record)
+    finally:
+        server.should_exit = True
+
+    print(f"{'scenario':<34}{'body MB':>9}{'gzip MB':>9}" + "".join(f"{stage + ' ms':>14}" for stage in STAGES))
+    for record in records:
+        print(f"{record['scenario']:<34}{record['body_bytes'] / 2**20:>9.2f}{record['gzip_bytes'] / 2**20:>9.2f}"
+              + "".join(f"{record[stage + '_ms']['p50']:>14.1f}" for stage in STAGES))
+    run_info = {"timestamp": datetime.now(timezone.utc).isoformat(), "git_rev": git_revision()}
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict(run_info, **record)) + "\n")
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark for the local pre-screening engine on large batches.
+
+Builds batches of distinct analysis alerts, each with its own random
+transaction JSON, times prescreen_alerts on them (JSON parsing included) and
+appends the timings to the benchmark history file.
+
+    python bench_prescreen.py --alerts 1000 5000 --transactions 10 50
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmark import DEFAULT_RESULTS_FILE, git_revision
+from latency_stats import summarize_latencies
+from prescreen import prescreen_alerts
+from sample_data import ANALYSIS_EXAMPLE
+
+TRANSACTION_TYPES = ["Cash Deposit", "Cash Deposit", "Wire Transfer", "Local Transfer", "Cash Withdrawal"]
+
+
+def make_batch(alerts: int, transactions: int, rng: random.Random) -> List[Dict[str, Any]]:
+    """alerts copies of the example alerts, each with transactions random transactions of its own"""
+    batch = []
+    start = datetime(2025, 6, 1)
+    for i in range(alerts):
+        alert = dict(ANALYSIS_EXAMPLE[i % len(ANALYSIS_EXAMPLE)], AlertID=i + 1)
+        records = [{
+            "CUSTOMERID": alert["CUSTOMERID"],
+            "ACCOUNTID": f"AC{alert['CUSTOMERID']}",
+            "CREATEDDATE": (start + timedelta(minutes=rng.randrange(60 * 24 * 30))).strftime("%Y-%m-%d %H:%M:%S"),
+            "TRANSACTIONAMOUNT": round(rng.lognormvariate(9.5, 1.2), 2),
+            "CURRENCY": "PKR",
+            "TRANSACTIONTYPE": rng.choice(TRANSACTION_TYPES),
+            "COUNTERPARTYACCOUNT": rng.choice(["", "PK36SCBL0000001123456702", "AE123456789012345678"]),
+            "EXCESSAMOUNT": 0.0,
+        } for _ in range(transactions)]
+        alert["FilteredTransactions"] = json.dumps(records)
+        batch.append(alert)
+    return batch
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark local alert pre-screening.")
+    parser.add_argument("--alerts", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--transactions", type=int, nargs="+", default=[10, 50], help="Transactions per alert")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSONL file results are appended to")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    records: List[Dict[str, Any]] = []
+    for alerts in args.alerts:
+        for transactions in args.transactions:
+            times = []
+            for _ in range(args.repeats):
+                batch = make_batch(alerts, transactions, rng)
+                started = time.perf_counter()
+                prescreen_alerts(batch)
+                times.append(1000 * (time.perf_counter() - started))
+            records.append({"scenario": f"prescreen-{alerts}x{transactions}", "alerts": alerts,
+                            "transactions": alerts * transactions, "prescreen_ms": summarize_latencies(times)})
+
+    print(f"{'scenario':<24}{'transactions':>14}{'p50 ms':>10}{'max ms':>10}{'alerts/s':>12}")
+    for record in records:
+        timing = record["prescreen_ms"]
+        print(f"{record['scenario']:<24}{record['transactions']:>14,}{timing['p50']:>10.1f}{timing['max']:>10.1f}"
+              f"{1000 * record['alerts'] / timing['p50']:>12,.0f}")
+    run_info = {"timestamp": datetime.now(timezone.utc).isoformat(), "git_rev": git_revision()}
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict(run_info, **record)) + "\n")
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark for the analysis report renderer on multi-megabyte reports.
+
+Compares the original line-by-line inline-styled formatter (kept here as the
+reference) with report_renderer on cold renders and memoized reruns, checks
+that both produce the same document structure, and appends the timings to the
+benchmark history file.
+
+    python bench_renderer.py --sizes-mb 0.1 1 4 --repeats 5
+"""
+import argparse
+import html
+import json
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from benchmark import DEFAULT_RESULTS_FILE, git_revision
+from latency_stats import summarize_latencies
+from mock_server import generate_report, generate_thinking
+from report_renderer import clear_renderer_cache, render_report_html
+from sample_data import ANALYSIS_EXAMPLE
+
+
+def legacy_format(analysis_text: str) -> str:
+    """The formatter display_analysis_result used before report_renderer (reference only)"""
+    text = str(analysis_text)
+    escaped_text = html.escape(text)
+    lines = escaped_text.split('\n')
+    formatted_lines = []
+    in_list = False
+    for i, line in enumerate(lines):
+        line_stripped = line.strip()
+        if not line_stripped:
+            if formatted_lines and not formatted_lines[-1].endswith('<br>'):
+                formatted_lines.append('<br>')
+            continue
+        if (line_stripped.endswith(':') and len(line_stripped) < 60 and
+            not line_stripped.startswith(' ') and
+            (line_stripped.isupper() or
+             any(keyword in line_stripped.lower() for keyword in ['report', 'summary', 'analysis', 'conclusion', 'recommendation', 'assessment', 'background', 'pattern', 'flow']))):
+            formatted_lines.append(f'<h3 style="color: #ffffff; margin: 25px 0 15px 0; font-weight: 700; font-size: 20px; border-bottom: 2px solid rgba(102, 126, 234, 0.6); padding-bottom: 8px;">{line_stripped}</h3>')
+        elif line_stripped.endswith(':') and len(line_stripped) < 50 and not line_stripped.startswith(' '):
+            formatted_lines.append(f'<h4 style="color: #ffffff; margin: 18px 0 10px 0; font-weight: 600; font-size: 16px; color: #a8b5ff;">{line_stripped}</h4>')
+        elif line_stripped.startswith('**') and line_stripped.endswith('**'):
+            bold_text = line_stripped.replace('**', '')
+            formatted_lines.append(f'<p style="color: #ffffff; margin: 12px 0; font-weight: 600; font-size: 16px;">{bold_text}</p>')
+        elif line_stripped.startswith('-') or line_stripped.startswith('•'):
+            if not in_list:
+                formatted_lines.append('<ul style="color: #ffffff; margin: 10px 0; padding-left: 25px;">')
+                in_list = True
+            list_text = line_stripped.lstrip('-•').strip()
+            formatted_lines.append(f'<li style="margin: 8px 0; line-height: 1.8;">{list_text}</li>')
+        else:
+            if in_list:
+                formatted_lines.append('</ul>')
+                in_list = False
+            if ':' in line_stripped and len(line_stripped.split(':')) == 2:
+                key, value = line_stripped.split(':', 1)
+                key = key.strip()
+                value = value.strip()
+                formatted_lines.append(
+                    f'<p style="color: #ffffff; margin: 10px 0; line-height: 1.8;">'
+                    f'<span style="font-weight: 600; color: #a8b5ff;">{key}:</span> '
+                    f'<span>{value}</span></p>'
+                )
+            else:
+                formatted_lines.append(f'<p style="color: #ffffff; margin: 10px 0; line-height: 1.8;">{line_stripped}</p>')
+    if in_list:
+        formatted_lines.append('</ul>')
+    return '\n'.join(formatted_lines)
+
+
+_ATTRIBUTES = re.compile(r' (?:style|class)="[^"]*"')
+
+
+def structure(rendered: str) -> str:
+    """Markup with styling attributes and the wrapper removed, for equivalence checks"""
+    body = _ATTRIBUTES.sub("", rendered)
+    if body.startswith("<div>\n"):
+        body = body[len("<div>\n"):-len("\n</div>")]
+    return body
+
+
+def make_report(size_bytes: int, audit: bool, rng: random.Random) -> str:
+    """Report text of about size_bytes; audit reports interleave long reasoning paragraphs"""
+    alert = ANALYSIS_EXAMPLE[1]
+    parts = []
+    total = 0
+    while total < size_bytes:
+        part = generate_report(alert, 40, rng)
+        if audit:
+            part += "\n\n**Reasoning**\n" + generate_thinking(alert, 20, rng) + "\n"
+        parts.append(part)
+        total += len(part)
+    return "\n".join(parts)
+
+
+def time_ms(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return 1000 * (time.perf_counter() - start)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the analysis report renderer.")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.1, 1.0, 4.0])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSONL file results are appended to")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(42)
+    records: List[Dict[str, Any]] = []
+    for size_mb in args.sizes_mb:
+        for audit in (False, True):
+            text = make_report(int(size_mb * 1024 * 1024), audit, rng)
+            if structure(render_report_html(text)) != structure(legacy_format(text)):
+                raise SystemExit(f"Renderer output differs from the legacy formatter ({size_mb} MB, audit={audit})")
+            legacy, cold, warm = [], [], []
+            for _ in range(args.repeats):
+                legacy.append(time_ms(legacy_format, text))
+                clear_renderer_cache()
+                cold.append(time_ms(render_report_html, text))
+                warm.append(time_ms(render_report_html, text))
+            records.append({
+                "scenario": f"render-{'audit' if audit else 'report'}-{size_mb:g}mb",
+                "text_bytes": len(text.encode("utf-8")),
+                "html_bytes": {"legacy": len(legacy_format(text).encode("utf-8")),
+                               "renderer": len(render_report_html(text).encode("utf-8"))},
+                "legacy_ms": summarize_latencies(legacy),
+                "cold_ms": summarize_latencies(cold),
+                "rerun_ms": summarize_latencies(warm),
+            })
+
+    print(f"{'scenario':<24}{'MB':>7}{'legacy':>10}{'cold':>10}{'rerun':>10}{'html MB':>10}{'legacy html':>13}")
+    for record in records:
+        print(f"{record['scenario']:<24}{record['text_bytes'] / 2**20:>7.2f}{record['legacy_ms']['p50']:>10.1f}"
+              f"{record['cold_ms']['p50']:>10.1f}{record['rerun_ms']['p50']:>10.2f}"
+              f"{record['html_bytes']['renderer'] / 2**20:>10.2f}{record['html_bytes']['legacy'] / 2**20:>13.2f}")
+    run_info = {"timestamp": datetime.now(timezone.utc).isoformat(), "git_rev": git_revision()}
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict(run_info, **record)) + "\n")
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
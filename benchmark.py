@@ -0,0 +1,300 @@
+"""Client-side benchmark suite, run against the local mock service.
+
+Each scenario drives the real client code in aml_api against mock_server (or
+an already running service via --api-base-url) and records throughput, request
+latency percentiles and, for analysis, time to first report (for the streamed
+scenario, time to the first token; for the prioritized scenario, time until
+every High alert has its report). Results are
+printed and appended with the git revision to a JSONL history file, so runs can
+be compared change by change.
+
+    python benchmark.py --alerts 20 --repeats 3
+    python benchmark.py --scenarios analysis-batch analysis-progressive --analysis-latency-ms 2000
+    python benchmark.py --analysis-file alerts.jsonl --prediction-file alerts.parquet --alerts 500
+
+--analysis-file / --prediction-file replace the example alerts with alerts read
+from a bulk-ingest file, e.g. one written by synthetic_alerts.py.
+"""
+import argparse
+import copy
+import json
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from aml_api import AnalysisStream, call_analysis_api, call_prediction_api, iter_analysis_results
+from batch_scheduler import iter_scheduled_analysis
+from bulk_ingest import iter_alert_batches
+from http_pool import get_http_client
+from resilience import ResiliencePolicy, ResilientClient
+from latency_stats import summarize_latencies
+from mock_server import add_settings_arguments, settings_from_args, start_in_background
+from priority_pipeline import (DEFAULT_ANALYSIS_CONCURRENCY, PREDICTION_FIELDS, iter_prioritized_analysis,
+                               prediction_label)
+from sample_data import ANALYSIS_EXAMPLE, PREDICTION_EXAMPLE
+from wire_codec import available_encodings
+
+DEFAULT_RESULTS_FILE = "bench_results.jsonl"
+
+
+class TimedClient:
+    """Wraps a PooledClient and records the latency of every request"""
+
+    def __init__(self, client):
+        self._client = client
+        self._lock = threading.Lock()
+        self.latencies_ms: List[float] = []
+
+    def body_bytes(self) -> Tuple[int, int]:
+        """(JSON bytes, bytes sent) over the pooled client's lifetime"""
+        stats = self._client.stats.snapshot()
+        return stats["bytes_raw"], stats["bytes_sent"]
+
+    def post(self, url: str, read_timeout: Optional[float], **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._client.post(url, read_timeout, **kwargs)
+        finally:
+            with self._lock:
+                self.latencies_ms.append(1000 * (time.perf_counter() - start))
+
+    @contextmanager
+    def stream_post(self, url: str, read_timeout: Optional[float], **kwargs) -> Iterator[httpx.Response]:
+        # Latency of a streamed request runs until its last event has been read
+        start = time.perf_counter()
+        try:
+            with self._client.stream_post(url, read_timeout, **kwargs) as response:
+                yield response
+        finally:
+            with self._lock:
+                self.latencies_ms.append(1000 * (time.perf_counter() - start))
+
+
+def make_alerts(examples: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """count alerts cycled from the examples, each with a distinct AlertID"""
+    alerts = []
+    for i in range(count):
+        alert = copy.deepcopy(examples[i % len(examples)])
+        alert["AlertID"] = 100000 + i
+        alerts.append(alert)
+    return alerts
+
+
+def load_alerts(path: str, kind: str) -> List[Dict[str, Any]]:
+    """Every valid alert of kind in a CSV/JSONL/Parquet file"""
+    alerts = [alert for batch in iter_alert_batches(path, kind) for alert in batch]
+    if not alerts:
+        raise SystemExit(f"No valid {kind} alerts in {path}")
+    return alerts
+
+
+def count_errors(result: Dict[str, Any], alerts: int) -> int:
+    if not result.get("success"):
+        return alerts
+    return len(result.get("errors", []))
+
+
+def scenario_predict(concurrency: int) -> Callable:
+    def run(base_url: str, client: TimedClient, args: argparse.Namespace) -> Dict[str, Any]:
+        alerts = make_alerts(args.prediction_examples, args.alerts)
+        result = call_prediction_api(alerts, base_url, max_concurrency=concurrency, client=client)
+        return {"errors": count_errors(result, len(alerts))}
+    return run
+
+
+def scenario_analysis_batch(base_url: str, client: TimedClient, args: argparse.Namespace) -> Dict[str, Any]:
+    alerts = make_alerts(args.analysis_examples, args.alerts)
+    start = time.perf_counter()
+    result = call_analysis_api(alerts, base_url, cloud=True, audit=args.audit, client=client)
+    # Nothing is shown until the whole batch is back
+    return {"errors": count_errors(result, len(alerts)), "first_result_ms": 1000 * (time.perf_counter() - start)}
+
+
+def scenario_analysis_progressive(base_url: str, client: TimedClient, args: argparse.Namespace) -> Dict[str, Any]:
+    alerts = make_alerts(args.analysis_examples, args.alerts)
+    start = time.perf_counter()
+    first_result_ms = None
+    errors = 0
+    for group, result in iter_analysis_results(alerts, base_url, cloud=True, audit=args.audit,
+                                               group_size=args.group_size, max_concurrency=args.concurrency,
+                                               client=client):
+        if first_result_ms is None:
+            first_result_ms = 1000 * (time.perf_counter() - start)
+        errors += count_errors(result, len(group))
+    return {"errors": errors, "first_result_ms": first_result_ms or 0.0}
+
+
+def scenario_analysis_adaptive(base_url: str, client: TimedClient, args: argparse.Namespace) -> Dict[str, Any]:
+    alerts = make_alerts(args.analysis_examples, args.alerts)
+    start = time.perf_counter()
+    first_result_ms = None
+    errors = 0
+    for group, result in iter_scheduled_analysis(alerts, base_url, cloud=True, audit=args.audit,
+                                                 max_concurrency=args.concurrency, client=client):
+        if first_result_ms is None:
+            first_result_ms = 1000 * (time.perf_counter() - start)
+        errors += count_errors(result, len(group))
+    return {"errors": errors, "first_result_ms": first_result_ms or 0.0}
+
+
+def scenario_analysis_streamed(base_url: str, client: TimedClient, args: argparse.Namespace) -> Dict[str, Any]:
+    alerts = make_alerts(args.analysis_examples, args.alerts)
+    stream = AnalysisStream(alerts, base_url, cloud=True, audit=args.audit, client=client)
+    for _ in stream:
+        pass
+    # One request like analysis-batch, but the analyst reads from the first token on
+    return {"errors": count_errors(stream.result, len(alerts)), "first_result_ms": stream.first_token_ms or 0.0}
+
+
+def scenario_analysis_prioritized(base_url: str, client: TimedClient, args: argparse.Namespace) -> Dict[str, Any]:
+    alerts = make_alerts(args.analysis_examples, args.alerts)
+    # Each alert also carries the prediction fields of a prediction example. The mock predicts High from
+    # AlertScore 90, so every third alert is High; the High ones are listed last
+    for i, (alert, prediction) in enumerate(zip(alerts, make_alerts(args.prediction_examples, args.alerts))):
+        alert.update({field: prediction.get(field) for field in PREDICTION_FIELDS if field != "AlertID"})
+        alert.update(AlertScore=[70, 85, 95][3 * i // len(alerts)], CreateDate=f"2025-06-{1 + i % 28:02d}T09:00:00")
+    start = time.perf_counter()
+    high = set()
+    predicted = 0
+    high_done_ms = 0.0
+    errors = 0
+    for kind, index, result in iter_prioritized_analysis(alerts, base_url, cloud=True, audit=args.audit,
+                                                         analysis_concurrency=DEFAULT_ANALYSIS_CONCURRENCY,
+                                                         max_concurrency=args.concurrency, client=client):
+        if kind == "prediction":
+            predicted += 1
+            if prediction_label(result) == "High":
+                high.add(index)
+            continue
+        errors += count_errors(result, 1)
+        high.discard(index)
+        if predicted == len(alerts) and not high and not high_done_ms:
+            high_done_ms = 1000 * (time.perf_counter() - start)
+    return {"errors": errors, "first_result_ms": high_done_ms}
+
+
+SCENARIOS: Dict[str, Callable[[argparse.Namespace], Callable]] = {
+    "predict-sequential": lambda args: scenario_predict(1),
+    "predict-concurrent": lambda args: scenario_predict(args.concurrency),
+    "analysis-batch": lambda args: scenario_analysis_batch,
+    "analysis-progressive": lambda args: scenario_analysis_progressive,
+    "analysis-adaptive": lambda args: scenario_analysis_adaptive,
+    "analysis-streamed": lambda args: scenario_analysis_streamed,
+    "analysis-prioritized": lambda args: scenario_analysis_prioritized,
+}
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return revision + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_scenario(name: str, base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Run one scenario args.repeats times and summarise it"""
+    scenario = SCENARIOS[name](args)
+    client = get_http_client(base_url, pool_size=max(args.concurrency, 1), compression=args.compress)
+    if args.resilience:
+        # Scenarios share the breaker and latency history, as they would in the app
+        client = ResilientClient(client, ResiliencePolicy(hedge=args.resilience == "hedge"))
+    client = TimedClient(client)
+    raw_before, sent_before = client.body_bytes()
+    wall_ms = []
+    first_result_ms = []
+    errors = 0
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        outcome = scenario(base_url, client, args)
+        wall_ms.append(1000 * (time.perf_counter() - start))
+        errors += outcome["errors"]
+        if "first_result_ms" in outcome:
+            first_result_ms.append(outcome["first_result_ms"])
+    total_alerts = args.alerts * args.repeats
+    raw_after, sent_after = client.body_bytes()
+    record = {
+        "scenario": name,
+        "alerts": args.alerts,
+        "repeats": args.repeats,
+        "concurrency": args.concurrency,
+        "alerts_per_s": total_alerts / (sum(wall_ms) / 1000) if wall_ms else 0.0,
+        "wall_ms": summarize_latencies(wall_ms),
+        "request_latency_ms": summarize_latencies(client.latencies_ms),
+        "errors": errors,
+        "compression": args.compress,
+        "resilience": args.resilience,
+        "request_bytes": {"json": raw_after - raw_before, "sent": sent_after - sent_before},
+    }
+    if first_result_ms:
+        record["first_result_ms"] = summarize_latencies(first_result_ms)
+    return record
+
+
+def print_table(records: List[Dict[str, Any]]) -> None:
+    print(f"{'scenario':<22}{'alerts/s':>10}{'wall p50':>10}{'req p50':>10}{'req p95':>10}{'req p99':>10}"
+          f"{'first':>10}{'errors':>8}{'sent KB':>10}")
+    for record in records:
+        latency = record["request_latency_ms"]
+        first = record.get("first_result_ms", {}).get("p50")
+        first_text = f"{first:.0f}" if first is not None else "-"
+        print(f"{record['scenario']:<22}{record['alerts_per_s']:>10.2f}{record['wall_ms']['p50']:>10.0f}"
+              f"{latency['p50']:>10.0f}{latency['p95']:>10.0f}{latency['p99']:>10.0f}"
+              f"{first_text:>10}{record['errors']:>8}{record['request_bytes']['sent'] / 1024:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the AML API client against the local mock service.")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--alerts", type=int, default=10, help="Alerts per scenario run")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--group-size", type=int, default=1, help="Alerts per progressive analysis request")
+    parser.add_argument("--audit", action="store_true", help="Request thinking text (larger responses)")
+    parser.add_argument("--compress", choices=available_encodings(), help="Compact wire mode request coding")
+    parser.add_argument("--resilience", choices=["retry", "hedge"],
+                        help="Send through the resilience layer: retries and circuit breaker, plus hedging with 'hedge'")
+    parser.add_argument("--api-base-url", help="Benchmark this running service instead of starting a mock")
+    parser.add_argument("--analysis-file", help="Analysis alerts to send instead of the examples (CSV/JSONL/Parquet)")
+    parser.add_argument("--prediction-file", help="Prediction alerts to send instead of the examples")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_FILE, help="JSONL file results are appended to")
+    add_settings_arguments(parser)
+    # Shorter than the mock's realistic defaults so the suite finishes quickly
+    parser.set_defaults(prediction_latency_ms=200.0, analysis_latency_ms=1000.0, seed=42)
+    args = parser.parse_args(argv)
+    args.analysis_examples = load_alerts(args.analysis_file, "analysis") if args.analysis_file else ANALYSIS_EXAMPLE
+    args.prediction_examples = (load_alerts(args.prediction_file, "prediction") if args.prediction_file
+                                else PREDICTION_EXAMPLE)
+
+    if args.api_base_url:
+        base_url, server, target = args.api_base_url, None, {"external": args.api_base_url}
+    else:
+        settings = settings_from_args(args)
+        base_url, server = start_in_background(settings)
+        target = {"mock": settings.as_dict()}
+
+    try:
+        records = [run_scenario(name, base_url, args) for name in args.scenarios]
+    finally:
+        if server is not None:
+            server.should_exit = True
+
+    print_table(records)
+    run_info = {"timestamp": datetime.now(timezone.utc).isoformat(), "git_rev": git_revision(), **target,
+                "analysis_file": args.analysis_file, "prediction_file": args.prediction_file}
+    with open(args.output, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(dict(run_info, **record)) + "\n")
+    print(f"Results appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
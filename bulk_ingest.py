@@ -0,0 +1,235 @@
+"""Bulk alert ingestion from CSV, JSON Lines and Parquet files.
+
+Files are read in chunks so memory stays bounded by the chunk size, and each
+chunk is validated column-wise with pandas. Valid rows are turned into alert
+dicts in the same shape as PREDICTION_EXAMPLE / ANALYSIS_EXAMPLE, ready for
+call_prediction_api / call_analysis_api; rejected rows are counted with the
+reason in an IngestSummary.
+"""
+import json
+import os
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from json_fields import parse_field
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REJECTED_SAMPLES = 100
+
+SUPPORTED_EXTENSIONS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+RISK_LEVELS = ['Low', 'Medium', 'High']
+
+# Column rules per alert kind. Columns in 'defaults' are optional and filled in
+# when missing; every other listed column is required.
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "prediction": {
+        "integer": ["AlertID"],
+        "numeric": ["AlertScore"],
+        "datetime": ["CreateDate"],
+        "text": ["FocusColumnValue", "CreateDate", "riskLevel", "MatchDetails", "MatchInfoJson",
+                 "ScenarioName", "workflow"],
+        "non_empty": ["FocusColumnValue", "MatchInfoJson"],
+        "choices": {"riskLevel": RISK_LEVELS},
+        "json_text": ["MatchDetails", "MatchInfoJson"],
+        "json_objects": {},
+        "defaults": {"riskLevel": "Low", "MatchDetails": "", "ScenarioName": "", "workflow": "Unassigned"},
+    },
+    "analysis": {
+        "integer": ["AlertID", "STRCount"],
+        "numeric": [],
+        "datetime": [],
+        "text": ["FilteredTransactions", "FocusColumnValue", "KYCMonthlyIncome", "KYCNoOfCredits",
+                 "KYCNoOfDebits", "KYCRiskCategoryValue", "KYCValueOfCredits", "KYCValueOfDebits",
+                 "OccupationValue", "STRScenarioHistory", "ScenarioName", "CustomerName", "CUSTOMERID",
+                 "BranchID", "Country", "CustomerType", "CustomerStatus", "CreatedDate",
+                 "RelationshipStartDate", "RiskScore"],
+        "non_empty": ["FocusColumnValue", "FilteredTransactions", "CUSTOMERID"],
+        "choices": {"KYCRiskCategoryValue": RISK_LEVELS},
+        "json_text": ["FilteredTransactions"],
+        "json_objects": {"PreviousAlerts": list, "Counterparties": list, "BranchQueries": dict},
+        "defaults": {
+            "KYCMonthlyIncome": "", "KYCNoOfCredits": "", "KYCNoOfDebits": "", "KYCRiskCategoryValue": "Low",
+            "KYCValueOfCredits": "", "KYCValueOfDebits": "", "OccupationValue": "", "STRCount": 0,
+            "STRScenarioHistory": "", "ScenarioName": "", "CustomerName": "", "BranchID": "",
+            "Country": "Pakistan", "CustomerType": "Retail", "CustomerStatus": "", "CreatedDate": "",
+            "RelationshipStartDate": "", "RiskScore": "", "PreviousAlerts": "[]", "Counterparties": "[]",
+            "BranchQueries": "{}",
+        },
+    },
+}
+
+
+class IngestSummary:
+    """Running totals of accepted and rejected rows for one ingestion run"""
+
+    def __init__(self):
+        self.rows_read = 0
+        self.accepted = 0
+        self.rejected = 0
+        # Accepted alerts the caller chose not to send (e.g. below a pre-screen score)
+        self.screened_out = 0
+        self.reasons: Counter = Counter()
+        self.rejected_samples: List[Dict[str, Any]] = []
+
+    def record_rejects(self, rows: pd.Series, reasons: pd.Series) -> None:
+        self.rejected += len(reasons)
+        for reason_list in reasons:
+            self.reasons.update(reason.strip() for reason in reason_list.split(";") if reason.strip())
+        room = MAX_REJECTED_SAMPLES - len(self.rejected_samples)
+        if room > 0:
+            self.rejected_samples.extend(
+                {"row": int(row), "reason": reason.strip().rstrip(";")}
+                for row, reason in zip(rows.iloc[:room], reasons.iloc[:room])
+            )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows_read": self.rows_read,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "screened_out": self.screened_out,
+            "reasons": dict(self.reasons.most_common()),
+        }
+
+
+def detect_format(file_name: str) -> str:
+    """File format from the file extension"""
+    extension = os.path.splitext(file_name)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Unsupported file type '{extension}'. Use one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+    return SUPPORTED_EXTENSIONS[extension]
+
+
+def read_chunks(source: Union[str, BinaryIO], file_format: str, kind: str,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Raw data frames of at most chunk_size rows, without validation"""
+    schema = SCHEMAS[kind]
+    if file_format == "csv":
+        # Read text columns as strings so IDs like '100001' aren't turned into numbers
+        text_columns = schema["text"] + list(schema["json_objects"])
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype={c: str for c in text_columns},
+                               keep_default_na=False, na_values=[""])
+    elif file_format == "jsonl":
+        yield from pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False)
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Reading Parquet files requires the 'pyarrow' package.")
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported file format '{file_format}'")
+
+
+def _flag(reasons: pd.Series, bad: pd.Series, message: str) -> pd.Series:
+    """Append message to the reasons of every row where bad is True"""
+    return reasons.where(~bad, reasons + message + "; ")
+
+
+def _to_json_text(value: Any) -> Any:
+    # JSONL/Parquet may carry the nested fields as objects instead of JSON strings
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def _parse_json_object(value: Any, expected: type) -> Any:
+    if isinstance(value, expected):
+        return value
+    if hasattr(value, "tolist"):
+        value = value.tolist()
+        return value if isinstance(value, expected) else None
+    try:
+        parsed = json.loads(value) if isinstance(value, str) and value.strip() else expected()
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, expected) else None
+
+
+def _json_field_reason(column: str, value: Any) -> str:
+    # Coarse reason so the summary groups rows by problem; the details are in validate_alerts
+    if not isinstance(value, str):
+        return ""
+    parsed, errors = parse_field(column, value)
+    if not errors:
+        return ""
+    if parsed is None:
+        return f"{column} is not valid JSON of the expected type; "
+    return f"{column} does not match the transaction schema; "
+
+
+def validate_chunk(df: pd.DataFrame, kind: str, summary: IngestSummary) -> List[Dict[str, Any]]:
+    """Validate one chunk column-wise; returns the accepted alerts and records rejects in summary"""
+    schema = SCHEMAS[kind]
+    first_row = summary.rows_read + 1
+    summary.rows_read += len(df)
+    df = df.reset_index(drop=True)
+    row_numbers = pd.Series(range(first_row, first_row + len(df)))
+    reasons = pd.Series("", index=df.index, dtype=object)
+
+    required = [c for c in dict.fromkeys(schema["integer"] + schema["numeric"] + schema["text"] +
+                                         list(schema["json_objects"])) if c not in schema["defaults"]]
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        summary.record_rejects(row_numbers, pd.Series(f"missing column(s): {', '.join(missing)}", index=df.index))
+        return []
+
+    for column, default in schema["defaults"].items():
+        if column not in df.columns:
+            df[column] = default
+        else:
+            df[column] = df[column].where(df[column].notna(), default)
+
+    for column in schema["integer"]:
+        values = pd.to_numeric(df[column], errors="coerce")
+        reasons = _flag(reasons, values.isna() | (values % 1 != 0), f"{column} must be an integer")
+        df[column] = values.fillna(0).astype("int64")
+    for column in schema["numeric"]:
+        values = pd.to_numeric(df[column], errors="coerce")
+        reasons = _flag(reasons, values.isna(), f"{column} must be a number")
+        df[column] = values.fillna(0.0).astype(float)
+    for column in schema["json_text"]:
+        df[column] = df[column].map(_to_json_text)
+    for column in schema["text"]:
+        df[column] = df[column].where(df[column].isna(), df[column].astype(str))
+    for column in schema["json_text"]:
+        reasons = reasons + df[column].map(lambda value: _json_field_reason(column, value))
+    for column in schema["non_empty"]:
+        reasons = _flag(reasons, df[column].isna() | (df[column].str.strip() == ""), f"{column} is empty")
+    for column in schema["datetime"]:
+        parsed = pd.to_datetime(df[column], errors="coerce", format="ISO8601")
+        reasons = _flag(reasons, parsed.isna(), f"{column} is not an ISO date")
+    for column, allowed in schema["choices"].items():
+        reasons = _flag(reasons, ~df[column].isin(allowed), f"{column} must be one of {'/'.join(allowed)}")
+    for column, expected in schema["json_objects"].items():
+        parsed = df[column].map(lambda value: _parse_json_object(value, expected))
+        reasons = _flag(reasons, parsed.isna(), f"{column} is not a JSON {expected.__name__}")
+        df[column] = parsed
+
+    rejected = reasons != ""
+    if rejected.any():
+        summary.record_rejects(row_numbers[rejected], reasons[rejected])
+    columns = list(dict.fromkeys(required + list(schema["defaults"])))
+    accepted = df.loc[~rejected, columns].to_dict("records")
+    summary.accepted += len(accepted)
+    return accepted
+
+
+def iter_alert_batches(source: Union[str, BinaryIO], kind: str, file_name: Optional[str] = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       summary: Optional[IngestSummary] = None) -> Iterator[List[Dict[str, Any]]]:
+    """Yield validated alerts chunk by chunk from a CSV/JSONL/Parquet file.
+
+    kind is 'prediction' or 'analysis'. Rejected rows are recorded in summary;
+    chunks with no valid rows are skipped.
+    """
+    summary = summary if summary is not None else IngestSummary()
+    file_format = detect_format(file_name or str(source))
+    for df in read_chunks(source, file_format, kind, chunk_size):
+        alerts = validate_chunk(df, kind, summary)
+        if alerts:
+            yield alerts
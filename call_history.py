@@ -0,0 +1,153 @@
+"""Rolling history of prediction and analysis calls for the performance dashboard.
+
+aml_api records one row per alert it answers (from the service or from the
+response cache) or fails: endpoint, client latency, server response time,
+model, method and LLM configuration. The history is kept at module level, so
+it survives Streamlit reruns and covers every session of the app process; the
+dashboard tab turns it into percentiles, histograms, error rates and cache
+effectiveness with the helpers below.
+"""
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from latency_stats import summarize_latencies
+
+HISTORY_SIZE = 10000
+HISTORY_COLUMNS = ["time", "endpoint", "alert_id", "status", "cached", "latency_ms", "server_ms",
+                   "alerts_in_request", "model", "method", "llm", "error"]
+GROUP_COLUMNS = {"Endpoint": "endpoint", "Model": "model", "Method": "method", "LLM Flags": "llm"}
+# Log-spaced latency bins (ms) for the histogram, 1 ms to 10 min; faster and slower calls go in the end bins
+HISTOGRAM_EDGES = np.logspace(0, np.log10(600000), 24)
+
+
+def error_category(error: str) -> str:
+    """Coarse error class: timeout, open circuit, HTTP status or other"""
+    if "timed out" in error.lower():
+        return "timeout"
+    if "circuit open" in error.lower():
+        return "circuit open"
+    status = re.search(r"'(\d{3}) ", error)
+    return f"HTTP {status.group(1)}" if status else "connection/other"
+
+
+class CallHistory:
+    """Thread-safe ring buffer of per-alert call outcomes"""
+
+    def __init__(self, size: int = HISTORY_SIZE):
+        self._lock = threading.Lock()
+        self._rows: Deque[Dict[str, Any]] = deque(maxlen=size)
+
+    def record(self, endpoint: str, alert_id: Any, status: str, latency_ms: Optional[float] = None,
+               cached: bool = False, server_ms: Optional[float] = None, alerts_in_request: int = 1,
+               model: Optional[str] = None, method: Optional[str] = None, llm: Optional[str] = None,
+               error: Optional[str] = None) -> None:
+        row = {"time": time.time(), "endpoint": endpoint, "alert_id": alert_id, "status": status,
+               "cached": cached, "latency_ms": latency_ms, "server_ms": server_ms,
+               "alerts_in_request": alerts_in_request, "model": model, "method": method, "llm": llm,
+               "error": error_category(error) if error else None}
+        with self._lock:
+            self._rows.append(row)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+
+_history = CallHistory()
+
+
+def call_history() -> CallHistory:
+    return _history
+
+
+def record_call(endpoint: str, alert_id: Any, status: str, **fields) -> None:
+    _history.record(endpoint, alert_id, status, **fields)
+
+
+def history_frame(since: Optional[float] = None) -> pd.DataFrame:
+    """The history as a DataFrame (optionally only rows recorded after since, a Unix time)"""
+    frame = pd.DataFrame(_history.rows(), columns=HISTORY_COLUMNS)
+    if since is not None:
+        frame = frame[frame["time"] >= since]
+    for column in ("model", "method", "llm"):
+        frame[column] = frame[column].fillna("n/a")
+    frame["timestamp"] = pd.to_datetime(frame["time"], unit="s")
+    return frame
+
+
+def overview(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Totals over the whole frame: alerts, error and cache hit rates, throughput"""
+    sent = frame[~frame["cached"]]
+    span_s = frame["time"].max() - frame["time"].min() if len(frame) > 1 else 0.0
+    return {
+        "alerts": len(frame),
+        "errors": int((frame["status"] == "error").sum()),
+        "error_rate": float((frame["status"] == "error").mean()) if len(frame) else 0.0,
+        "cache_hit_rate": float(frame["cached"].mean()) if len(frame) else 0.0,
+        "alerts_per_min": float(60 * len(frame) / span_s) if span_s > 0 else None,
+        "latency_ms": summarize_latencies(sent["latency_ms"].dropna()),
+    }
+
+
+def latency_table(frame: pd.DataFrame, by: str) -> pd.DataFrame:
+    """Per group: alert count, error percentage, cache hits and client/server latency percentiles.
+
+    Cached answers are left out of the latency figures, which describe the service.
+    """
+    rows = []
+    for group, rows_in_group in frame.groupby(by, sort=True):
+        sent = rows_in_group[~rows_in_group["cached"]]
+        latency = summarize_latencies(sent["latency_ms"].dropna())
+        server = sent["server_ms"].dropna()
+        rows.append({
+            by: group,
+            "alerts": len(rows_in_group),
+            "error %": 100 * (rows_in_group["status"] == "error").mean(),
+            "cache hits": int(rows_in_group["cached"].sum()),
+            "p50 ms": latency["p50"],
+            "p95 ms": latency["p95"],
+            "p99 ms": latency["p99"],
+            "max ms": latency["max"],
+            "server p50 ms": float(server.median()) if len(server) else None,
+        })
+    return pd.DataFrame(rows)
+
+
+def latency_histogram(frame: pd.DataFrame, by: str) -> pd.DataFrame:
+    """Alerts per log-spaced latency bin and group (long format: bin, group, alerts), in bin order.
+
+    Bins outside the range of the data are left out; cached answers are not counted.
+    """
+    sent = frame[~frame["cached"] & frame["latency_ms"].notna()]
+    labels = [f"{edge / 1000:.3g} s" if edge >= 1000 else f"{edge:.3g} ms" for edge in HISTOGRAM_EDGES[1:]]
+    bins = pd.cut(sent["latency_ms"].clip(lower=HISTOGRAM_EDGES[0], upper=HISTOGRAM_EDGES[-1]), HISTOGRAM_EDGES, labels=labels,
+                  include_lowest=True)
+    counts = sent.groupby([bins, sent[by]], observed=False).size().unstack(fill_value=0)
+    nonzero = np.flatnonzero(counts.sum(axis=1).to_numpy())
+    if not len(nonzero):
+        return pd.DataFrame(columns=["latency up to", by, "alerts"])
+    counts = counts.iloc[nonzero[0]:nonzero[-1] + 1]
+    counts.index = counts.index.astype(str).rename("latency up to")
+    return counts.reset_index().melt(id_vars="latency up to", var_name=by, value_name="alerts")
+
+
+def throughput(frame: pd.DataFrame, by: str, freq: str = "1min") -> pd.DataFrame:
+    """Alerts answered per interval (rows) and group (columns)"""
+    if frame.empty:
+        return pd.DataFrame()
+    return frame.groupby([pd.Grouper(key="timestamp", freq=freq), by]).size().unstack(fill_value=0)
+
+
+def error_breakdown(frame: pd.DataFrame) -> pd.DataFrame:
+    errors = frame[frame["status"] == "error"]
+    return errors.groupby(["endpoint", "error"]).size().reset_index(name="alerts")
@@ -0,0 +1,299 @@
+"""Process-wide pooled HTTP clients for the AML AI service.
+
+One httpx.Client is kept per API base URL so keep-alive connections (and the
+TLS sessions behind them) are reused across alerts and across Streamlit reruns.
+Streamlit re-executes the main script on every rerun but imports this module
+only once, so the registry below acts as the process-wide resource cache.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import httpx
+
+from wire_codec import IDENTITY, choose_encoding, encode_body, parse_accept_encoding
+
+DEFAULT_POOL_SIZE = 16
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_KEEPALIVE_EXPIRY = 120.0
+RECENT_REQUESTS = 50
+NEGOTIATE_TIMEOUT = 10.0
+
+# HTTP/2 needs the optional 'h2' package; fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class RequestTrace:
+    """Collects httpcore trace events (first occurrence time) for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events: Dict[str, float] = {}
+
+    def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.events.setdefault(event_name, time.perf_counter())
+
+    def first(self, *suffixes: str) -> Optional[float]:
+        """Earliest timestamp of an event ending with any of the suffixes (http11/http2 agnostic)"""
+        times = [t for name, t in self.events.items() if name.endswith(suffixes)]
+        return min(times) if times else None
+
+    @property
+    def new_connection(self) -> bool:
+        return "connection.connect_tcp.started" in self.events
+
+    @property
+    def tls_handshake(self) -> bool:
+        return "connection.start_tls.complete" in self.events
+
+    @property
+    def wait_time_s(self) -> float:
+        """Time spent before a connection was available (pool queueing)"""
+        acquired = self.first("connection.connect_tcp.started", "send_request_headers.started")
+        return acquired - self.started if acquired is not None else 0.0
+
+    def _between(self, start: str, end: str) -> Optional[float]:
+        started, ended = self.first(start), self.first(end)
+        return 1000 * (ended - started) if started is not None and ended is not None else None
+
+    def phases(self) -> Dict[str, Any]:
+        """Client-side timing of the request in ms.
+
+        connect includes the DNS lookup (httpcore resolves inside connect_tcp);
+        ttfb is from the request body being sent to the response headers, i.e.
+        network round-trip plus server time.
+        """
+        phases = {
+            "queue_ms": 1000 * self.wait_time_s,
+            "connect_ms": self._between("connection.connect_tcp.started", "connection.connect_tcp.complete"),
+            "tls_ms": self._between("connection.start_tls.started", "connection.start_tls.complete"),
+            "send_ms": self._between("send_request_headers.started", "send_request_body.complete"),
+            "ttfb_ms": self._between("send_request_body.complete", "receive_response_headers.complete"),
+            "download_ms": self._between("receive_response_headers.complete", "receive_response_body.complete"),
+        }
+        phases = {name: round(ms, 2) for name, ms in phases.items() if ms is not None}
+        phases["new_connection"] = self.new_connection
+        return phases
+
+
+class PoolStats:
+    """Thread-safe connection pool counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.reused_connections = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+        self.recent: "deque[Dict[str, Any]]" = deque(maxlen=RECENT_REQUESTS)
+
+    def record(self, trace: RequestTrace) -> None:
+        wait_s = trace.wait_time_s
+        with self._lock:
+            self.requests += 1
+            if trace.new_connection:
+                self.new_connections += 1
+            elif trace.first("send_request_headers.started") is not None:
+                self.reused_connections += 1
+            if trace.tls_handshake:
+                self.tls_handshakes += 1
+            self.total_wait_s += wait_s
+            self.max_wait_s = max(self.max_wait_s, wait_s)
+
+    def record_body(self, path: str, raw_bytes: int, sent_bytes: int, encoding: str, status: int) -> None:
+        """Request body size before and after compression"""
+        with self._lock:
+            self.bytes_raw += raw_bytes
+            self.bytes_sent += sent_bytes
+            self.recent.append({"path": path, "raw_bytes": raw_bytes, "sent_bytes": sent_bytes,
+                                "encoding": encoding, "status": status})
+
+    def recent_requests(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.recent)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "reused_connections": self.reused_connections,
+                "new_connections": self.new_connections,
+                "tls_handshakes": self.tls_handshakes,
+                "hit_rate": self.reused_connections / self.requests if self.requests else 0.0,
+                "avg_wait_ms": 1000 * self.total_wait_s / self.requests if self.requests else 0.0,
+                "max_wait_ms": 1000 * self.max_wait_s,
+                "bytes_raw": self.bytes_raw,
+                "bytes_sent": self.bytes_sent,
+                "compression_ratio": self.bytes_sent / self.bytes_raw if self.bytes_raw else 1.0,
+            }
+
+
+class PooledClient:
+    """Keep-alive httpx.Client for one base URL that records pool statistics.
+
+    With compression set ('gzip' or 'zstd') JSON bodies are sent in compact
+    wire mode, compressed only if the server lists the coding in an
+    Accept-Encoding response header (asked once with OPTIONS); servers that
+    do not get uncompressed bodies.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = DEFAULT_POOL_SIZE, http2: bool = False,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, compression: Optional[str] = None):
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.connect_timeout = connect_timeout
+        self.compression = compression
+        self.stats = PoolStats()
+        # Request codings the server accepts; None until it has told us
+        self.accepted_encodings: Optional[Set[str]] = None
+        self._negotiate_lock = threading.Lock()
+        self._client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+            ),
+            http2=self.http2,
+            timeout=httpx.Timeout(None, connect=connect_timeout),
+        )
+
+    def request_encoding(self) -> str:
+        """Coding to use for the next request body"""
+        if not self.compression or self.accepted_encodings is None:
+            return IDENTITY
+        return choose_encoding(self.compression, self.accepted_encodings)
+
+    def negotiate(self, url: str) -> None:
+        """Ask the server once (OPTIONS) which request codings it accepts; concurrent callers wait"""
+        with self._negotiate_lock:
+            if self.accepted_encodings is not None:
+                return
+            try:
+                response = self._client.options(url, timeout=httpx.Timeout(NEGOTIATE_TIMEOUT,
+                                                                           connect=self.connect_timeout))
+            except httpx.HTTPError:
+                return  # unknown for now: send uncompressed and ask again next time
+            self.accepted_encodings = parse_accept_encoding(response.headers.get("accept-encoding"))
+
+    def post(self, url: str, read_timeout: Optional[float], **kwargs) -> httpx.Response:
+        """POST with separate connect/read timeouts; raises httpx.HTTPError subclasses"""
+        if self.compression and "json" in kwargs:
+            payload = kwargs.pop("json")
+            if self.accepted_encodings is None:
+                self.negotiate(url)
+            encoding = self.request_encoding()
+            response = self._send(url, read_timeout, payload, encoding, kwargs)
+            if response.status_code == 415 and encoding != IDENTITY:
+                # The server refused the coding after all: stop compressing and resend as-is
+                self.accepted_encodings = parse_accept_encoding(response.headers.get("accept-encoding"))
+                response = self._send(url, read_timeout, payload, IDENTITY, kwargs)
+            return response
+        response = self._post(url, read_timeout, **kwargs)
+        size = len(response.request.content)
+        self.stats.record_body(response.request.url.path, size, size, IDENTITY, response.status_code)
+        return response
+
+    def _send(self, url: str, read_timeout: Optional[float], payload: Any, encoding: str,
+              kwargs: Dict[str, Any]) -> httpx.Response:
+        body, headers, raw_bytes = encode_body(payload, encoding)
+        response = self._post(url, read_timeout, content=body,
+                              headers=dict(kwargs.get("headers") or {}, **headers),
+                              **{k: v for k, v in kwargs.items() if k != "headers"})
+        self.stats.record_body(response.request.url.path, raw_bytes, len(body),
+                               headers.get("Content-Encoding", IDENTITY), response.status_code)
+        return response
+
+    def get(self, url: str, read_timeout: Optional[float]) -> httpx.Response:
+        """GET with separate connect/read timeouts, e.g. a health probe that also opens a pooled connection"""
+        return self._request("GET", url, read_timeout)
+
+    def _post(self, url: str, read_timeout: Optional[float], **kwargs) -> httpx.Response:
+        return self._request("POST", url, read_timeout, **kwargs)
+
+    def _request(self, method: str, url: str, read_timeout: Optional[float], **kwargs) -> httpx.Response:
+        trace = RequestTrace()
+        extensions = dict(kwargs.pop("extensions", None) or {}, trace=trace)
+        try:
+            response = self._client.request(
+                method,
+                url,
+                timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout),
+                extensions=extensions,
+                **kwargs
+            )
+        finally:
+            self.stats.record(trace)
+        response.extensions["timing"] = trace.phases()
+        accept_encoding = response.headers.get("accept-encoding")
+        if accept_encoding is not None:
+            self.accepted_encodings = parse_accept_encoding(accept_encoding)
+        return response
+
+    @contextmanager
+    def stream_post(self, url: str, read_timeout: Optional[float], **kwargs) -> Iterator[httpx.Response]:
+        """POST whose response body is read inside the with block (e.g. Server-Sent Events).
+
+        The response's timing extension covers the phases up to the response
+        headers. Bodies are always sent uncompressed.
+        """
+        trace = RequestTrace()
+        extensions = dict(kwargs.pop("extensions", None) or {}, trace=trace)
+        try:
+            with self._client.stream(
+                "POST",
+                url,
+                timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout),
+                extensions=extensions,
+                **kwargs
+            ) as response:
+                response.extensions["timing"] = trace.phases()
+                size = len(response.request.content)
+                self.stats.record_body(response.request.url.path, size, size, IDENTITY, response.status_code)
+                yield response
+        finally:
+            self.stats.record(trace)
+
+    def close(self) -> None:
+        self._client.close()
+
+
+# One client per base URL and settings. Sessions with different sidebar settings, background jobs and
+# pipeline threads may all hold a client, so clients are never closed while the process runs; the number of
+# setting combinations in use is small.
+_clients: Dict[Tuple[str, Tuple[int, bool, float, Optional[str]]], PooledClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(base_url: str, pool_size: int = DEFAULT_POOL_SIZE, http2: bool = False,
+                    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                    compression: Optional[str] = None) -> PooledClient:
+    """Return the shared client for base_url with these pool settings, creating it on first use"""
+    key = (base_url.rstrip("/"), (pool_size, http2 and HTTP2_AVAILABLE, connect_timeout, compression))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = PooledClient(key[0], pool_size=pool_size, http2=http2, connect_timeout=connect_timeout,
+                                  compression=compression)
+            _clients[key] = client
+        return client
+
+
+def pool_stats() -> List[Dict[str, Any]]:
+    """Statistics for every pooled client (one per base URL and settings), with its latest request sizes"""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return [dict(client.stats.snapshot(), base_url=client.base_url, http2=client.http2, pool_size=client.pool_size,
+                 connect_timeout=client.connect_timeout, compression=client.compression,
+                 request_encoding=client.request_encoding(), recent_requests=client.stats.recent_requests())
+            for client in clients]
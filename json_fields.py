@@ -0,0 +1,177 @@
+"""Parsing and schema checks for the JSON-string alert fields.
+
+MatchDetails, MatchInfoJson and FilteredTransactions are sent as JSON text
+inside the JSON payload, so a typo in them is otherwise only noticed by the
+service after a full round-trip. Each value is parsed once (with orjson when
+it is installed), checked against FIELD_SCHEMAS and the result is memoized by
+the text itself, so validating the same alert again or reading its parsed
+transactions later costs a dictionary lookup.
+"""
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
+PARSE_CACHE_SIZE = 4096
+# Errors reported per field before the rest are summarised
+MAX_ERRORS_PER_FIELD = 5
+
+# Value checks for keys of transaction records
+NUMBER = "number"
+INTEGER = "integer"
+CURRENCY = "currency"
+DATETIME = "datetime"
+SCALAR = "scalar"
+
+TRANSACTION_KEYS: Dict[str, str] = {
+    "TRANSACTIONAMOUNT": NUMBER,
+    "EXCESSAMOUNT": NUMBER,
+    "CURRENCY": CURRENCY,
+    "CREATEDDATE": DATETIME,
+    "INSTALLMENTNUMBER": INTEGER,
+    "CUSTOMERID": SCALAR,
+    "IDENTITYNUMBERS": SCALAR,
+    "LOANID": SCALAR,
+    "ACCOUNTID": SCALAR,
+    "ID": SCALAR,
+}
+
+# Per field: the JSON type of the whole value and, for arrays of transaction
+# records, the keys every record must have. Empty text is always accepted.
+FIELD_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "FilteredTransactions": {"type": list, "record_keys": TRANSACTION_KEYS,
+                             "required": ["TRANSACTIONAMOUNT", "CURRENCY", "CREATEDDATE"]},
+    "MatchInfoJson": {"type": list, "record_keys": TRANSACTION_KEYS,
+                      "required": ["TRANSACTIONAMOUNT", "CURRENCY"]},
+    "MatchDetails": {"type": dict},
+}
+
+FIELDS_BY_KIND: Dict[str, List[str]] = {
+    "prediction": ["MatchDetails", "MatchInfoJson"],
+    "analysis": ["FilteredTransactions"],
+}
+
+
+def _check_value(value: Any, check: str) -> Optional[str]:
+    if check == NUMBER:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return f"expected a number, got {value!r}"
+    elif check == INTEGER:
+        if isinstance(value, bool) or not (isinstance(value, int) or (isinstance(value, float) and value.is_integer())):
+            return f"expected an integer, got {value!r}"
+    elif check == CURRENCY:
+        if not (isinstance(value, str) and len(value) == 3 and value.isalpha() and value.isupper()):
+            return f"expected a 3-letter currency code, got {value!r}"
+    elif check == DATETIME:
+        try:
+            datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return f"expected a date like 2025-06-01 10:15:00, got {value!r}"
+    elif check == SCALAR:
+        if isinstance(value, (list, dict)):
+            return "expected a single value, got a nested object"
+    return None
+
+
+def _validate_records(records: List[Any], schema: Dict[str, Any]) -> List[str]:
+    errors = []
+    record_keys = schema["record_keys"]
+    for i, record in enumerate(records):
+        if not isinstance(record, dict):
+            errors.append(f"[{i}]: expected an object, got {type(record).__name__}")
+            continue
+        missing = [key for key in schema["required"] if key not in record]
+        if missing:
+            errors.append(f"[{i}]: missing {', '.join(missing)}")
+        for key, value in record.items():
+            check = record_keys.get(key)
+            if check is not None and value is not None:
+                problem = _check_value(value, check)
+                if problem:
+                    errors.append(f"[{i}].{key}: {problem}")
+    return errors
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_field(field: str, text: str) -> Tuple[Any, Tuple[str, ...]]:
+    """(parsed value, errors) for one JSON-string field; memoized by (field, text).
+
+    The parsed value is shared between callers and must not be modified.
+    """
+    schema = FIELD_SCHEMAS[field]
+    if not text.strip():
+        return schema["type"](), ()
+    try:
+        value = _loads(text)
+    except ValueError as e:  # orjson.JSONDecodeError is a ValueError too
+        return None, (f"invalid JSON: {e}",)
+    if not isinstance(value, schema["type"]):
+        expected = "an array" if schema["type"] is list else "an object"
+        return None, (f"expected {expected}, got {type(value).__name__}",)
+    errors = _validate_records(value, schema) if "record_keys" in schema else []
+    if len(errors) > MAX_ERRORS_PER_FIELD:
+        errors = errors[:MAX_ERRORS_PER_FIELD] + [f"... and {len(errors) - MAX_ERRORS_PER_FIELD} more"]
+    return value, tuple(errors)
+
+
+def parsed_field(alert: Dict[str, Any], field: str) -> Any:
+    """Parsed value of a JSON-string field (None if it does not validate)"""
+    value = alert.get(field)
+    if not isinstance(value, str):
+        return value
+    return parse_field(field, value)[0]
+
+
+def load_json_text(text: str) -> Any:
+    """Parsed JSON text without the schema checks (None if it is not valid JSON); not memoized"""
+    try:
+        return _loads(text)
+    except ValueError:
+        return None
+
+
+def validate_alert(alert: Dict[str, Any], kind: str) -> Dict[str, List[str]]:
+    """Errors per JSON-string field of one alert; empty if all fields are valid"""
+    problems = {}
+    for field in FIELDS_BY_KIND[kind]:
+        value = alert.get(field)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            problems[field] = [f"expected JSON text, got {type(value).__name__}"]
+            continue
+        errors = parse_field(field, value)[1]
+        if errors:
+            problems[field] = list(errors)
+    return problems
+
+
+def validate_alerts(alerts: List[Dict[str, Any]], kind: str) -> Dict[int, Dict[str, List[str]]]:
+    """Errors per alert position and field, for alerts with at least one invalid field"""
+    report = {}
+    for i, alert in enumerate(alerts):
+        problems = validate_alert(alert, kind)
+        if problems:
+            report[i] = problems
+    return report
+
+
+def format_validation_errors(report: Dict[int, Dict[str, List[str]]],
+                             alerts: List[Dict[str, Any]]) -> List[str]:
+    """One message per invalid field, e.g. 'Alert 2 (ID 1002) - MatchInfoJson: [0]: missing CURRENCY'"""
+    messages = []
+    for i, problems in report.items():
+        alert_id = alerts[i].get("AlertID", "N/A")
+        for field, errors in problems.items():
+            messages.append(f"Alert {i + 1} (ID {alert_id}) - {field}: " + "; ".join(errors))
+    return messages
+
+
+def parse_cache_info() -> Dict[str, Any]:
+    info = parse_field.cache_info()
+    return {"entries": info.currsize, "hits": info.hits, "misses": info.misses}
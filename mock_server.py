@@ -0,0 +1,352 @@
+"""Local stand-in for the AML AI service endpoints.
+
+Serves /api/ai-service/predictalertpriority and /api/ai-service/generateamlanalysis
+with the same response shapes the app displays (including thinking,
+response_time_ms, model and method), so client throughput can be measured
+without the live Hugging Face Space. Latency, cold starts, error rates and
+report sizes are configurable. A client that sends "Accept: text/event-stream"
+to the analysis endpoint gets the reports as Server-Sent Events instead,
+token by token (see SSE_MEDIA_TYPE below).
+
+    python mock_server.py --port 8000 --analysis-latency-ms 8000 --error-rate 0.02
+    streamlit run streamlit_demo.py   # then set API Base URL to http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from wire_codec import available_encodings, decompress
+
+
+class MockSettings:
+    """Behaviour of the mock service; latencies are lognormal around the given median"""
+
+    def __init__(self, prediction_latency_ms: float = 300.0, prediction_sigma: float = 0.3,
+                 analysis_latency_ms: float = 8000.0, analysis_sigma: float = 0.5,
+                 cold_start_ms: float = 0.0, idle_timeout_s: float = 300.0,
+                 error_rate: float = 0.0, hang_rate: float = 0.0, hang_seconds: float = 600.0,
+                 report_paragraphs: int = 8, thinking_paragraphs: int = 12, seed: Optional[int] = None,
+                 request_encodings: str = "gzip,zstd", first_token_ms: float = 800.0):
+        self.prediction_latency_ms = prediction_latency_ms
+        self.prediction_sigma = prediction_sigma
+        self.analysis_latency_ms = analysis_latency_ms
+        self.analysis_sigma = analysis_sigma
+        self.cold_start_ms = cold_start_ms
+        self.idle_timeout_s = idle_timeout_s
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.report_paragraphs = report_paragraphs
+        self.thinking_paragraphs = thinking_paragraphs
+        self.seed = seed
+        # Compressed request bodies accepted (and advertised); "" behaves like a server without support
+        self.request_encodings = request_encodings
+        # Streamed analyses: time before an alert's first token (the rest of its latency is spread over the text)
+        self.first_token_ms = first_token_ms
+
+    def accepted_encodings(self) -> List[str]:
+        wanted = [e.strip() for e in self.request_encodings.split(",") if e.strip()]
+        return [e for e in wanted if e in available_encodings()]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+# Server-Sent Events for streamed analyses; data is JSON and 'index' is the alert's position in the request:
+#   start    {index, AlertID, CustomerName, FocusColumnValue}
+#   thinking {index, delta}   audit-mode reasoning text, before the report
+#   token    {index, delta}   report text
+#   done     {index, AlertID, ..., response_time_ms, model, method}   everything but the texts
+#   error    {error}          generation failed; no further events
+#   end      {status, message}
+SSE_MEDIA_TYPE = "text/event-stream"
+# Words per streamed event
+STREAM_CHUNK_WORDS = 4
+
+REPORT_SECTIONS = [
+    ("Alert Summary", ["Alert ID", "Scenario", "Customer Name", "Customer ID"]),
+    ("Customer Background", ["Occupation", "KYC Monthly Income", "Risk Category"]),
+    ("Transaction Pattern Analysis", []),
+    ("Risk Assessment", ["Overall Risk"]),
+    ("Conclusion and Recommendation", []),
+]
+
+FILLER = ("The observed activity was compared against the declared KYC profile and the customer's "
+          "historical behaviour. Amounts, frequency and counterparties were reviewed for consistency "
+          "with the stated source of funds and the branch response.")
+
+
+def generate_report(alert: Dict[str, Any], paragraphs: int, rng: random.Random) -> str:
+    """Analysis text with the headings, key-value lines and lists the app formats"""
+    values = {
+        "Alert ID": alert.get("AlertID", "N/A"),
+        "Scenario": alert.get("ScenarioName", "N/A"),
+        "Customer Name": alert.get("CustomerName", "N/A"),
+        "Customer ID": alert.get("CUSTOMERID", "N/A"),
+        "Occupation": alert.get("OccupationValue", "N/A"),
+        "KYC Monthly Income": alert.get("KYCMonthlyIncome", "N/A"),
+        "Risk Category": alert.get("KYCRiskCategoryValue", "N/A"),
+        "Overall Risk": rng.choice(["Low", "Medium", "High"]),
+    }
+    lines = ["AML INVESTIGATION REPORT:", ""]
+    for title, keys in REPORT_SECTIONS:
+        lines.append(f"{title}:")
+        lines.extend(f"{key}: {values[key]}" for key in keys)
+        for _ in range(max(1, paragraphs // len(REPORT_SECTIONS))):
+            lines.append(FILLER)
+            lines.append(f"- Observation {rng.randint(1, 999)}: amount {rng.randint(5, 900) * 1000:,} PKR")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def generate_thinking(alert: Dict[str, Any], paragraphs: int, rng: random.Random) -> str:
+    return "\n\n".join(
+        f"Step {i + 1}: considering alert {alert.get('AlertID', 'N/A')} - {FILLER}" for i in range(paragraphs)
+    )
+
+
+def text_chunks(text: str, words: int = STREAM_CHUNK_WORDS) -> List[str]:
+    """text split into pieces of a few words each (trailing whitespace kept, so they join back to text)"""
+    pieces = re.findall(r"\s*\S+\s*", text) if text.strip() else []
+    return ["".join(pieces[i:i + words]) for i in range(0, len(pieces), words)]
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class MockState:
+    """Request counters and warm/cold tracking for one mock app"""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.last_request: Optional[float] = None
+        self.ready_at = 0.0
+        self.cold_starts = 0
+        self.requests: Dict[str, int] = {"predict": 0, "analysis": 0}
+        self.alerts: Dict[str, int] = {"predict": 0, "analysis": 0}
+        self.errors = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+
+    def latency_s(self, median_ms: float, sigma: float) -> float:
+        return median_ms * math.exp(sigma * self.rng.gauss(0.0, 1.0)) / 1000
+
+    async def wait_until_warm(self) -> None:
+        # The first request after an idle period pays the container start-up
+        now = time.monotonic()
+        if self.last_request is None or now - self.last_request > self.settings.idle_timeout_s:
+            if self.settings.cold_start_ms > 0 and self.ready_at <= now:
+                self.ready_at = now + self.settings.cold_start_ms / 1000
+                self.cold_starts += 1
+        self.last_request = now
+        delay = self.ready_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def inject_failure(self) -> Optional[JSONResponse]:
+        """Error response or a hang, according to the configured rates"""
+        roll = self.rng.random()
+        if roll < self.settings.hang_rate:
+            await asyncio.sleep(self.settings.hang_seconds)
+        elif roll < self.settings.hang_rate + self.settings.error_rate:
+            self.errors += 1
+            return JSONResponse({"detail": "Mock service error"}, status_code=503)
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"requests": dict(self.requests), "alerts": dict(self.alerts), "errors": self.errors,
+                "cold_starts": self.cold_starts, "bytes_received": self.bytes_received,
+                "bytes_decoded": self.bytes_decoded}
+
+
+def predict_alert(alert: Dict[str, Any]) -> Dict[str, Any]:
+    # Deterministic so repeated benchmark runs see the same priorities
+    try:
+        score = float(alert.get("AlertScore", 0))
+    except (TypeError, ValueError):
+        score = 0.0
+    prediction = "High" if score >= 90 else "Medium" if score >= 80 else "Low"
+    return {
+        "AlertID": alert.get("AlertID"),
+        "FocusColumnValue": alert.get("FocusColumnValue"),
+        "Prediction": prediction,
+        "STRScenario": alert.get("ScenarioName", ""),
+    }
+
+
+def create_app(settings: Optional[MockSettings] = None) -> FastAPI:
+    settings = settings or MockSettings()
+    state = MockState(settings)
+    app = FastAPI(title="AML AI service mock")
+    app.state.mock = state
+    accepted = settings.accepted_encodings()
+    accept_header = ", ".join(accepted + ["identity"])
+
+    @app.middleware("http")
+    async def advertise_encodings(request: Request, call_next):
+        # RFC 7694: tell clients which codings request bodies may use
+        response = await call_next(request)
+        response.headers["Accept-Encoding"] = accept_header
+        return response
+
+    async def read_json(request: Request) -> Any:
+        body = await request.body()
+        state.bytes_received += len(body)
+        encoding = request.headers.get("content-encoding", "identity").strip().lower()
+        if encoding != "identity" and encoding not in accepted:
+            raise HTTPException(415, f"Unsupported Content-Encoding '{encoding}'")
+        try:
+            body = decompress(body, encoding)
+        except ValueError as e:
+            raise HTTPException(400, f"Could not decode {encoding} body: {e}")
+        state.bytes_decoded += len(body)
+        return json.loads(body)
+
+    @app.get("/")
+    async def health() -> Dict[str, Any]:
+        await state.wait_until_warm()
+        return {"status": "ok"}
+
+    @app.post("/api/ai-service/predictalertpriority")
+    async def predict_alert_priority(request: Request):
+        alert = await read_json(request)
+        state.requests["predict"] += 1
+        state.alerts["predict"] += 1
+        await state.wait_until_warm()
+        failure = await state.inject_failure()
+        if failure is not None:
+            return failure
+        await asyncio.sleep(state.latency_s(settings.prediction_latency_ms, settings.prediction_sigma))
+        return {"status": 200, "message": "Success", "data": [predict_alert(alert)]}
+
+    @app.post("/api/ai-service/generateamlanalysis")
+    async def generate_aml_analysis(request: Request):
+        alerts = await read_json(request)
+        alerts = alerts if isinstance(alerts, list) else [alerts]
+        state.requests["analysis"] += 1
+        state.alerts["analysis"] += len(alerts)
+        await state.wait_until_warm()
+        failure = await state.inject_failure()
+        if failure is not None:
+            return failure
+
+        if SSE_MEDIA_TYPE in request.headers.get("accept", ""):
+            return StreamingResponse(stream_analyses(alerts), media_type=SSE_MEDIA_TYPE)
+
+        # The service generates reports one alert after another
+        analyses: List[Dict[str, Any]] = []
+        for alert in alerts:
+            latency = state.latency_s(settings.analysis_latency_ms, settings.analysis_sigma)
+            await asyncio.sleep(latency)
+            analyses.append(build_analysis(alert, latency))
+        return {"status": 200, "message": "Success", "data": analyses}
+
+    def build_analysis(alert: Dict[str, Any], latency: float) -> Dict[str, Any]:
+        audit = bool(alert.get("audit"))
+        analysis = {
+            "AlertID": alert.get("AlertID"),
+            "CustomerName": alert.get("CustomerName", ""),
+            "FocusColumnValue": alert.get("FocusColumnValue"),
+            "analysis": generate_report(alert, settings.report_paragraphs, state.rng),
+            "response_time_ms": latency * 1000,
+            "model": "mock-thinking-llm" if audit else "mock-llm",
+            "method": "hybrid_template_llm" + ("_evaluated" if alert.get("evaluation") else ""),
+        }
+        if audit:
+            analysis["thinking"] = generate_thinking(alert, settings.thinking_paragraphs, state.rng)
+        return analysis
+
+    async def stream_analyses(alerts: List[Dict[str, Any]]) -> AsyncIterator[str]:
+        # Same total time per alert as the plain endpoint, but the text arrives as it is "generated"
+        for index, alert in enumerate(alerts):
+            latency = state.latency_s(settings.analysis_latency_ms, settings.analysis_sigma)
+            analysis = build_analysis(alert, latency)
+            yield sse_event("start", {"index": index, "AlertID": analysis["AlertID"],
+                                      "CustomerName": analysis["CustomerName"],
+                                      "FocusColumnValue": analysis["FocusColumnValue"]})
+            first_token_s = min(settings.first_token_ms / 1000, latency)
+            await asyncio.sleep(first_token_s)
+            chunks = ([("thinking", chunk) for chunk in text_chunks(analysis.get("thinking", ""))]
+                      + [("token", chunk) for chunk in text_chunks(analysis["analysis"])])
+            gap_s = (latency - first_token_s) / max(1, len(chunks))
+            for event, chunk in chunks:
+                yield sse_event(event, {"index": index, "delta": chunk})
+                await asyncio.sleep(gap_s)
+            yield sse_event("done", dict({k: v for k, v in analysis.items() if k not in ("analysis", "thinking")},
+                                         index=index))
+        yield sse_event("end", {"status": 200, "message": "Success"})
+
+    @app.get("/mock/stats")
+    async def mock_stats() -> Dict[str, Any]:
+        return dict(state.stats(), settings=settings.as_dict())
+
+    return app
+
+
+def start_in_background(settings: Optional[MockSettings] = None, host: str = "127.0.0.1",
+                        port: int = 0) -> Tuple[str, uvicorn.Server]:
+    """Run a mock server on a daemon thread; returns (base_url, server)"""
+    config = uvicorn.Config(create_app(settings), host=host, port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("Mock server failed to start")
+        time.sleep(0.02)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://{host}:{bound_port}", server
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser) -> None:
+    """Command-line options for MockSettings (shared with the benchmark)"""
+    group = parser.add_argument_group("mock service behaviour")
+    defaults = MockSettings()
+    group.add_argument("--prediction-latency-ms", type=float, default=defaults.prediction_latency_ms)
+    group.add_argument("--prediction-sigma", type=float, default=defaults.prediction_sigma)
+    group.add_argument("--analysis-latency-ms", type=float, default=defaults.analysis_latency_ms,
+                       help="Median LLM time per alert")
+    group.add_argument("--analysis-sigma", type=float, default=defaults.analysis_sigma)
+    group.add_argument("--cold-start-ms", type=float, default=defaults.cold_start_ms,
+                       help="Extra delay for the first request after --idle-timeout-s without traffic")
+    group.add_argument("--idle-timeout-s", type=float, default=defaults.idle_timeout_s)
+    group.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of 503 responses")
+    group.add_argument("--hang-rate", type=float, default=defaults.hang_rate,
+                       help="Fraction of requests that hang for --hang-seconds")
+    group.add_argument("--hang-seconds", type=float, default=defaults.hang_seconds)
+    group.add_argument("--report-paragraphs", type=int, default=defaults.report_paragraphs)
+    group.add_argument("--thinking-paragraphs", type=int, default=defaults.thinking_paragraphs)
+    group.add_argument("--seed", type=int, default=None)
+    group.add_argument("--request-encodings", default=defaults.request_encodings,
+                       help="Comma-separated request body codings to accept ('' for none)")
+    group.add_argument("--first-token-ms", type=float, default=defaults.first_token_ms,
+                       help="Time to the first token of a streamed analysis")
+
+
+def settings_from_args(args: argparse.Namespace) -> MockSettings:
+    return MockSettings(**{name: getattr(args, name) for name in MockSettings().as_dict()})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local mock of the AML AI service endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(settings_from_args(args)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Local pre-screening of alerts before they are sent to the AI service.
+
+The transactions of a whole batch of alerts (FilteredTransactions for
+analysis alerts, MatchInfoJson for prediction alerts) are parsed once into a
+single columnar frame, and every feature is computed for all alerts at once
+with NumPy: turnover against the declared monthly income, credit and debit
+counts and values against the KYC ranges, cash deposits just under the
+reporting threshold on the same day (structuring), transfers to foreign
+accounts and the customer's STR history. The weighted features give an
+instant provisional score from 0 to 100, so analysts can decide which alerts
+are worth a slow LLM call. The score is a triage aid computed from the
+alert's own fields, not a prediction of the model.
+"""
+from itertools import chain
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from json_fields import load_json_text
+
+TRANSACTION_FIELDS = {"analysis": "FilteredTransactions", "prediction": "MatchInfoJson"}
+TRANSACTION_COLUMNS = ["TRANSACTIONAMOUNT", "CURRENCY", "TRANSACTIONTYPE", "CREATEDDATE", "COUNTERPARTYACCOUNT"]
+ALERT_COLUMNS = ["AlertID", "FocusColumnValue", "KYCMonthlyIncome", "KYCNoOfCredits", "KYCNoOfDebits",
+                 "KYCValueOfCredits", "KYCValueOfDebits", "KYCRiskCategoryValue", "riskLevel", "STRCount"]
+
+# Transaction types that take money out of the customer's account; every other type counts as a credit
+DEBIT_TYPES = ["wire transfer", "local transfer", "cash withdrawal", "outgoing transfer", "payment"]
+CASH_DEPOSIT = "cash deposit"
+HOME_CURRENCY = "PKR"
+HOME_COUNTRY_CODE = "PK"
+# Cash deposits from 90% of the reporting threshold up to just below it, several on one day
+STRUCTURING_THRESHOLD = 10000
+STRUCTURING_BAND = 0.9
+STRUCTURING_MIN_COUNT = 3
+
+# Points per feature at full strength; the score is their sum, capped at 100
+WEIGHTS = {"income": 25, "credit_count": 10, "debit_count": 10, "credit_value": 10, "debit_value": 5,
+           "structuring": 25, "foreign": 10, "str_history": 10, "risk_category": 5}
+RISK_CATEGORY_POINTS = {"High": 1.0, "Medium": 0.4, "Low": 0.0}
+HIGH_SCORE = 60
+MEDIUM_SCORE = 30
+
+RESULT_COLUMNS = ["AlertID", "FocusColumnValue", "score", "level", "transactions", "total_amount", "income_ratio",
+                  "credits", "debits", "structuring_deposits", "foreign_transfers", "reasons"]
+
+
+def transactions_frame(alerts: List[Dict[str, Any]], field: str) -> Tuple[pd.DataFrame, np.ndarray]:
+    """(every transaction of every alert in one frame, unreadable flag per alert).
+
+    The frame's 'alert' column is the position of the alert in alerts. Alerts whose field is not valid JSON
+    contribute no transactions and are flagged. Records are not checked against the field schema (that is
+    json_fields.validate_alerts' job); amounts that are not numbers count as 0.
+    """
+    parsed = [load_json_text(value) if isinstance(value, str) else value
+              for value in (alert.get(field) for alert in alerts)]
+    unreadable = np.fromiter((value is None and bool(alert.get(field)) for alert, value in zip(alerts, parsed)),
+                             dtype=bool, count=len(alerts))
+    per_alert = [value if isinstance(value, list) else [] for value in parsed]
+    lengths = np.fromiter(map(len, per_alert), dtype=np.int64, count=len(alerts))
+    records = [record if isinstance(record, dict) else {} for record in chain.from_iterable(per_alert)]
+    frame = pd.DataFrame({name: [record.get(name) for record in records] for name in TRANSACTION_COLUMNS})
+    frame.insert(0, "alert", np.repeat(np.arange(len(alerts)), lengths))
+    frame["TRANSACTIONAMOUNT"] = pd.to_numeric(frame["TRANSACTIONAMOUNT"], errors="coerce").fillna(0.0)
+    return frame, unreadable
+
+
+def kyc_range(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """(low, high) of KYC text like '85,000 PKR', '3-5' or '150,000 - 200,000 PKR'; NaN where there is no number"""
+    # KYC text repeats across alerts, so each distinct value is parsed once
+    codes, distinct = pd.factorize(values.astype(str))
+    parts = pd.Series(distinct).str.replace(",", "", regex=False).str.extract(
+        r"(\d+(?:\.\d+)?)(?:\s*-\s*(\d+(?:\.\d+)?))?")
+    low = pd.to_numeric(parts[0], errors="coerce").to_numpy(float)[codes]
+    high = pd.to_numeric(parts[1], errors="coerce").to_numpy(float)[codes]
+    return low, np.where(np.isnan(high), low, high)
+
+
+def _ratio(value: np.ndarray, limit: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(limit > 0, value / limit, np.nan)
+
+
+def _ramp(value: np.ndarray, start: float, full: float) -> np.ndarray:
+    """0 up to start, rising linearly to 1 at full (NaN counts as 0)"""
+    return np.nan_to_num(np.clip((value - start) / (full - start), 0.0, 1.0))
+
+
+def _per_alert(alert: np.ndarray, mask: np.ndarray, n: int, weights: np.ndarray = None) -> np.ndarray:
+    return np.bincount(alert[mask], weights=None if weights is None else weights[mask], minlength=n)
+
+
+def prescreen_alerts(alerts: List[Dict[str, Any]], kind: str = "analysis") -> pd.DataFrame:
+    """Provisional score, level, features and reasons per alert, one row per alert in input order"""
+    n = len(alerts)
+    transactions, unreadable = transactions_frame(alerts, TRANSACTION_FIELDS[kind])
+    alert = transactions["alert"].to_numpy()
+    amount = transactions["TRANSACTIONAMOUNT"].to_numpy(float)
+    # String tests run once per distinct value and are spread back to the transactions by code
+    type_codes, types = pd.factorize(transactions["TRANSACTIONTYPE"].fillna("").astype(str))
+    types = types.str.strip().str.lower()
+    debit = np.asarray(types.isin(DEBIT_TYPES))[type_codes]
+    cash_deposit = np.asarray(types == CASH_DEPOSIT)[type_codes]
+    credit = ~debit
+    every = np.ones(len(alert), dtype=bool)
+
+    near_threshold = (cash_deposit & (transactions["CURRENCY"] == HOME_CURRENCY).to_numpy()
+                      & (amount >= STRUCTURING_BAND * STRUCTURING_THRESHOLD) & (amount < STRUCTURING_THRESHOLD))
+    day = transactions["CREATEDDATE"].fillna("").astype(str).str[:10].to_numpy()
+    structuring = (pd.DataFrame({"alert": alert[near_threshold], "day": day[near_threshold]})
+                   .groupby(["alert", "day"]).size().groupby(level="alert").max()
+                   .reindex(range(n), fill_value=0).to_numpy())
+    account_codes, accounts = pd.factorize(transactions["COUNTERPARTYACCOUNT"].fillna("").astype(str))
+    country = accounts.str[:2].str.upper()
+    foreign = np.asarray(country.str.fullmatch("[A-Z]{2}") & (country != HOME_COUNTRY_CODE), dtype=bool)[account_codes]
+
+    fields = pd.DataFrame([{column: a.get(column) for column in ALERT_COLUMNS} for a in alerts],
+                          columns=ALERT_COLUMNS)
+    _, income = kyc_range(fields["KYCMonthlyIncome"])
+    _, credits_limit = kyc_range(fields["KYCNoOfCredits"])
+    _, debits_limit = kyc_range(fields["KYCNoOfDebits"])
+    _, credit_value_limit = kyc_range(fields["KYCValueOfCredits"])
+    _, debit_value_limit = kyc_range(fields["KYCValueOfDebits"])
+    risk_category = fields["KYCRiskCategoryValue"].fillna(fields["riskLevel"])
+    str_count = pd.to_numeric(fields["STRCount"], errors="coerce").fillna(0).to_numpy(float)
+
+    count = _per_alert(alert, every, n)
+    total = _per_alert(alert, every, n, amount)
+    credits = _per_alert(alert, credit, n)
+    debits = _per_alert(alert, debit, n)
+    income_ratio = _ratio(total, income)
+    credit_count_ratio = _ratio(credits, credits_limit)
+    debit_count_ratio = _ratio(debits, debits_limit)
+    credit_value_ratio = _ratio(_per_alert(alert, credit, n, amount), credit_value_limit)
+    debit_value_ratio = _ratio(_per_alert(alert, debit, n, amount), debit_value_limit)
+    foreign_transfers = _per_alert(alert, foreign, n)
+    structured = structuring >= STRUCTURING_MIN_COUNT
+
+    points = (WEIGHTS["income"] * _ramp(income_ratio, 1, 3)
+              + WEIGHTS["credit_count"] * _ramp(credit_count_ratio, 1, 2)
+              + WEIGHTS["debit_count"] * _ramp(debit_count_ratio, 1, 2)
+              + WEIGHTS["credit_value"] * _ramp(credit_value_ratio, 1, 2)
+              + WEIGHTS["debit_value"] * _ramp(debit_value_ratio, 1, 2)
+              + WEIGHTS["structuring"] * structured
+              + WEIGHTS["foreign"] * _ramp(foreign_transfers, 0, 2)
+              + WEIGHTS["str_history"] * _ramp(str_count, 0, 2)
+              + WEIGHTS["risk_category"] * risk_category.map(RISK_CATEGORY_POINTS).fillna(0).to_numpy(float))
+    score = np.clip(points, 0, 100).round(1)
+
+    reasons = np.full(n, "", dtype=object)
+    for mask, reason in ((income_ratio > 1, "turnover above monthly income"),
+                         (credit_count_ratio > 1, "more credits than KYC"),
+                         (debit_count_ratio > 1, "more debits than KYC"),
+                         (credit_value_ratio > 1, "credit value above KYC"),
+                         (debit_value_ratio > 1, "debit value above KYC"),
+                         (structured, f"{STRUCTURING_MIN_COUNT}+ cash deposits just under "
+                                      f"{STRUCTURING_THRESHOLD:,} {HOME_CURRENCY} in a day"),
+                         (foreign_transfers > 0, "foreign counterparty"),
+                         (str_count > 0, "previous STRs"),
+                         (unreadable, "transactions unreadable")):
+        reasons = reasons + np.where(mask, reason + "; ", "")
+
+    return pd.DataFrame({
+        "AlertID": fields["AlertID"],
+        "FocusColumnValue": fields["FocusColumnValue"],
+        "score": score,
+        "level": np.select([score >= HIGH_SCORE, score >= MEDIUM_SCORE], ["High", "Medium"], "Low"),
+        "transactions": count,
+        "total_amount": total,
+        "income_ratio": income_ratio,
+        "credits": credits,
+        "debits": debits,
+        "structuring_deposits": structuring,
+        "foreign_transfers": foreign_transfers,
+        "reasons": pd.Series(reasons).str.rstrip("; "),
+    }, columns=RESULT_COLUMNS)
+
+
+def select_alerts(alerts: List[Dict[str, Any]], screened: pd.DataFrame, min_score: float) -> List[Dict[str, Any]]:
+    """The alerts scoring at least min_score, in input order"""
+    return [alert for alert, keep in zip(alerts, screened["score"].to_numpy() >= min_score) if keep]
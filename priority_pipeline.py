@@ -0,0 +1,168 @@
+"""Prediction-to-analysis pipeline that analyzes the riskiest alerts first.
+
+Every alert is sent to the prediction API (max_concurrency at a time); as each
+prediction comes back the alert joins a priority queue for the analysis API,
+ordered by Prediction (High, then Medium, then Low, then alerts that were not
+predicted) and then by alert age (oldest CreateDate first). A fixed
+number of analysis workers take the next alert from the queue whenever one of
+them is free, so when analysis capacity is the bottleneck the High alerts
+get their reports first. Alerts predicted while every worker is busy
+overtake lower-priority alerts already waiting; alerts predicted while a
+worker is idle start at once.
+
+Alerts carry the fields of both APIs. The prediction request gets the
+prediction fields, from the alert itself or from the same alert (by AlertID)
+in prediction_alerts. They are model inputs, so none is ever made up: an
+alert that lacks any of them is not predicted (its result is marked
+"skipped") and is queued behind the predicted ones. The analysis request
+gets everything but the prediction-only fields.
+"""
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from aml_api import (DEFAULT_API_BASE_URL, DEFAULT_MAX_CONCURRENCY, call_analysis_api, call_prediction_api,
+                     extract_predictions)
+from http_pool import PooledClient, get_http_client
+from response_cache import ResponseCache
+from result_store import ResultStore
+
+DEFAULT_ANALYSIS_CONCURRENCY = 2
+
+PREDICTION_FIELDS = ["AlertID", "FocusColumnValue", "AlertScore", "CreateDate", "riskLevel", "MatchDetails",
+                     "MatchInfoJson", "ScenarioName", "workflow"]
+PREDICTION_ONLY_FIELDS = ["AlertScore", "CreateDate", "riskLevel", "MatchDetails", "MatchInfoJson", "workflow"]
+
+PRIORITY_ORDER = ["High", "Medium", "Low"]
+
+
+def prediction_payload(alert: Dict[str, Any],
+                       prediction_alert: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], List[str]]:
+    """The prediction API fields of alert, taken from prediction_alert where alert lacks them, and the missing ones"""
+    payload, missing = {}, []
+    for field in PREDICTION_FIELDS:
+        value = alert.get(field)
+        if value in (None, "") and prediction_alert is not None:
+            value = prediction_alert.get(field)
+        if value in (None, ""):
+            missing.append(field)
+        else:
+            payload[field] = value
+    return payload, missing
+
+
+def analysis_payload(alert: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: value for field, value in alert.items() if field not in PREDICTION_ONLY_FIELDS}
+
+
+def prediction_label(result: Dict[str, Any]) -> Optional[str]:
+    """Prediction of a single-alert call_prediction_api result (None if it failed or was skipped)"""
+    if not result.get("success"):
+        return None
+    predictions = extract_predictions(result.get("data", {}))
+    first = predictions[0] if predictions else None
+    return first.get("Prediction") if isinstance(first, dict) else None
+
+
+def _age_key(create_date: Any) -> float:
+    """Sort key putting older alerts first; alerts without a readable date go last"""
+    try:
+        return datetime.fromisoformat(str(create_date)).timestamp()
+    except ValueError:
+        return float("inf")
+
+
+def priority_key(prediction: Optional[str], create_date: Any) -> Tuple[int, float]:
+    rank = PRIORITY_ORDER.index(prediction) if prediction in PRIORITY_ORDER else len(PRIORITY_ORDER)
+    return rank, _age_key(create_date)
+
+
+def iter_prioritized_analysis(data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL,
+                              cloud: bool = False, llm_on_server: bool = False,
+                              url: str = "", anonymous: bool = False,
+                              audit: bool = False, evaluation: bool = False,
+                              analysis_concurrency: int = DEFAULT_ANALYSIS_CONCURRENCY,
+                              max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                              client: Optional[PooledClient] = None,
+                              cache: Optional[ResponseCache] = None,
+                              store: Optional[ResultStore] = None,
+                              prediction_alerts: Optional[List[Dict[str, Any]]] = None
+                              ) -> Iterator[Tuple[str, int, Dict[str, Any]]]:
+    """Predict every alert, then analyze them highest priority first as the predictions arrive.
+
+    Yields ("prediction", index, result) as each prediction returns and ("analysis", index, result) as each
+    report is ready, where result has the shape of call_prediction_api's / call_analysis_api's return value
+    for that one alert; an alert without the prediction fields gets a failed result with "skipped" set.
+    prediction_alerts supplies prediction fields by AlertID. Closing the iterator stops queued alerts from
+    being sent.
+    """
+    if not data:
+        return
+    client = client or get_http_client(api_base_url)
+    by_id = {str(alert.get("AlertID")): alert for alert in prediction_alerts or [] if isinstance(alert, dict)}
+    events: "queue.Queue[Tuple[str, int, Dict[str, Any]]]" = queue.Queue()
+    ready: List[Tuple[Tuple[int, float], int]] = []
+    condition = threading.Condition()
+    state = {"predicted": 0, "stopped": False}
+
+    def predict(index: int) -> None:
+        create_date = data[index].get("CreateDate")
+        try:
+            payload, missing = prediction_payload(data[index], by_id.get(str(data[index].get("AlertID"))))
+            create_date = payload.get("CreateDate", create_date)
+            if missing:
+                result = {"success": False, "skipped": True,
+                          "error": f"Not predicted: missing prediction fields {', '.join(missing)}"}
+            else:
+                result = call_prediction_api([payload], api_base_url, max_concurrency=1, client=client,
+                                             cache=cache, store=store)
+        except Exception as e:  # a failed prediction only costs the alert its place in the queue
+            result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+        with condition:
+            # Queued under the lock so an alert's prediction event always comes before its analysis event
+            events.put(("prediction", index, result))
+            heapq.heappush(ready, (priority_key(prediction_label(result), create_date), index))
+            state["predicted"] += 1
+            condition.notify()
+
+    def analyze() -> None:
+        while True:
+            with condition:
+                while not ready and state["predicted"] < len(data) and not state["stopped"]:
+                    condition.wait()
+                if state["stopped"] or not ready:
+                    return
+                _, index = heapq.heappop(ready)
+            try:
+                result = call_analysis_api([analysis_payload(data[index])], api_base_url, cloud=cloud,
+                                           llm_on_server=llm_on_server, url=url, anonymous=anonymous, audit=audit,
+                                           evaluation=evaluation, client=client, cache=cache, store=store)
+            except Exception as e:  # keep the worker alive for the rest of the queue
+                result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+            events.put(("analysis", index, result))
+
+    predictors = ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(data))),
+                                    thread_name_prefix="pipeline-predict")
+    workers = max(1, min(analysis_concurrency, len(data)))
+    analysts = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline-analyze")
+    try:
+        for index in range(len(data)):
+            predictors.submit(predict, index)
+        for _ in range(workers):
+            analysts.submit(analyze)
+        analyzed = 0
+        while analyzed < len(data):
+            event = events.get()
+            if event[0] == "analysis":
+                analyzed += 1
+            yield event
+    finally:
+        with condition:
+            state["stopped"] = True
+            condition.notify_all()
+        # Requests already in flight finish in the background; nobody reads their results
+        predictors.shutdown(wait=False, cancel_futures=True)
+        analysts.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,149 @@
+"""HTML rendering of AML analysis reports.
+
+The report text is classified line by line in a single pass with precompiled
+rules (headings, sub-headings, bold lines, list items, key-value pairs,
+paragraphs) and turned into class-based HTML styled by REPORT_CSS. Rendered HTML is memoized by a hash
+of the report text, so Streamlit reruns of an unchanged report do no
+formatting work.
+"""
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+MAX_CACHED_REPORTS = 256
+
+# Lines ending with ':' that contain one of these words are main headings
+_HEADING_KEYWORDS = re.compile(r"report|summary|analysis|conclusion|recommendation|assessment|background|pattern|flow")
+
+REPORT_CSS = """
+    div.aml-report {
+        background: linear-gradient(135deg, rgba(102, 126, 234, 0.08) 0%, rgba(118, 75, 162, 0.08) 100%);
+        padding: 30px;
+        border-radius: 12px;
+        border-left: 4px solid #667eea;
+        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
+        line-height: 1.8;
+        color: #ffffff;
+        font-size: 15px;
+        max-height: 800px;
+        overflow-y: auto;
+        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    }
+    div.aml-report h3.aml-h3 {
+        color: #ffffff; margin: 25px 0 15px 0; font-weight: 700; font-size: 20px;
+        border-bottom: 2px solid rgba(102, 126, 234, 0.6); padding-bottom: 8px;
+    }
+    div.aml-report h4.aml-h4 { color: #a8b5ff; margin: 18px 0 10px 0; font-weight: 600; font-size: 16px; }
+    div.aml-report p.aml-bold { color: #ffffff; margin: 12px 0; font-weight: 600; font-size: 16px; }
+    div.aml-report p.aml-p { color: #ffffff; margin: 10px 0; line-height: 1.8; }
+    div.aml-report span.aml-key { font-weight: 600; color: #a8b5ff; }
+    div.aml-report ul.aml-list { color: #ffffff; margin: 10px 0; padding-left: 25px; }
+    div.aml-report ul.aml-list li { margin: 8px 0; line-height: 1.8; }
+"""
+
+
+def _render(text: str) -> str:
+    """Single pass over the escaped report lines, emitting HTML as each line is classified"""
+    formatted: List[str] = []
+    append = formatted.append
+    heading_keyword = _HEADING_KEYWORDS.search
+    in_list = False
+    for line in html.escape(text).split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            # Collapse runs of blank lines into one break
+            if formatted and formatted[-1] != "<br>":
+                append("<br>")
+            continue
+        if stripped[-1] == ":" and len(stripped) < 60:
+            if stripped.isupper() or heading_keyword(stripped.lower()):
+                append(f'<h3 class="aml-h3">{stripped}</h3>')
+                continue
+            if len(stripped) < 50:
+                append(f'<h4 class="aml-h4">{stripped}</h4>')
+                continue
+        if stripped.startswith("**") and stripped.endswith("**"):
+            append(f'<p class="aml-bold">{stripped.replace("**", "")}</p>')
+        elif stripped[0] in "-•":
+            if not in_list:
+                append('<ul class="aml-list">')
+                in_list = True
+            append(f'<li>{stripped.lstrip("-•").strip()}</li>')
+        else:
+            if in_list:
+                append("</ul>")
+                in_list = False
+            if stripped.count(":") == 1:
+                key, value = stripped.split(":")
+                append(f'<p class="aml-p"><span class="aml-key">{key.strip()}:</span> <span>{value.strip()}</span></p>')
+            else:
+                append(f'<p class="aml-p">{stripped}</p>')
+    if in_list:
+        append("</ul>")
+    return "\n".join(formatted)
+
+
+class _RenderCache:
+    """LRU of rendered HTML keyed by a digest of the report text"""
+
+    def __init__(self, max_entries: int):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[bytes, str]" = OrderedDict()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: bytes):
+        with self._lock:
+            rendered = self._entries.get(key)
+            if rendered is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return rendered
+
+    def put(self, key: bytes, rendered: str) -> None:
+        with self._lock:
+            self._entries[key] = rendered
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+_cache = _RenderCache(MAX_CACHED_REPORTS)
+
+
+def render_report_html(text: Any, memoize: bool = True) -> str:
+    """Report text as a styled <div class="aml-report"> block.
+
+    memoize=False skips the cache, for partial text that is never rendered twice (streaming).
+    """
+    text = str(text)
+    if not memoize:
+        return f'<div class="aml-report">\n{_render(text)}\n</div>'
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    rendered = _cache.get(key)
+    if rendered is None:
+        rendered = f'<div class="aml-report">\n{_render(text)}\n</div>'
+        _cache.put(key, rendered)
+    return rendered
+
+
+def renderer_cache_info() -> Dict[str, Any]:
+    return _cache.info()
+
+
+def clear_renderer_cache() -> None:
+    _cache.clear()
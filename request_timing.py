@@ -0,0 +1,151 @@
+"""Per-request client timing: spans file and Prometheus metrics.
+
+aml_api attaches a 'client_timing' dict to every result it receives from the
+service (pool queue, connect incl. DNS, TLS, send, time to first byte, first
+streamed token, download, JSON decode and total, all in ms) and reports the
+same figures here; the app adds the time it took to render each analysis report. When a
+spans file is configured every span is appended to it as one JSON line; when
+a metrics file is configured it is rewritten with Prometheus text-format
+histograms per endpoint and phase (suitable for node_exporter's textfile
+collector) every METRICS_INTERVAL_S seconds while new spans come in, and
+whenever flush() is called.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+PHASES = ["queue_ms", "connect_ms", "tls_ms", "send_ms", "ttfb_ms", "first_token_ms", "download_ms", "decode_ms",
+          "render_ms", "total_ms"]
+# Histogram bucket bounds in seconds, from a pooled request to a long analysis
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+METRIC_NAME = "aml_client_phase_seconds"
+
+DEFAULT_SPANS_FILE = "request_spans.jsonl"
+DEFAULT_METRICS_FILE = "request_metrics.prom"
+METRICS_INTERVAL_S = 15.0
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+
+class SpanRecorder:
+    """Appends spans to a JSONL file and keeps Prometheus histograms of their phases.
+
+    The metrics file is written by a background thread every interval_s seconds when spans were recorded since
+    the last write, and by flush().
+    """
+
+    def __init__(self, interval_s: float = METRICS_INTERVAL_S):
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        # Held for file writes only, so recording a span never waits on disk behind another
+        self._spans_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self.spans_file: Optional[str] = None
+        self.metrics_file: Optional[str] = None
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._dirty = False
+        self._writer: Optional[threading.Thread] = None
+
+    def configure(self, spans_file: Optional[str] = None, metrics_file: Optional[str] = None) -> None:
+        """Set (or with None, stop writing) the output files"""
+        with self._lock:
+            if metrics_file and metrics_file != self.metrics_file:
+                self._dirty = True
+            self.spans_file = spans_file
+            self.metrics_file = metrics_file
+            if metrics_file and self._writer is None:
+                self._writer = threading.Thread(target=self._write_periodically, name="span-metrics", daemon=True)
+                self._writer.start()
+
+    def record(self, endpoint: str, timing: Dict[str, Any], **fields) -> None:
+        with self._lock:
+            for phase in PHASES:
+                if timing.get(phase) is not None:
+                    self._histograms.setdefault((endpoint, phase), _Histogram()).observe(timing[phase] / 1000)
+            self._dirty = True
+            spans_file = self.spans_file
+        if spans_file:
+            line = json.dumps(dict(fields, ts=time.time(), endpoint=endpoint, **timing), default=str) + "\n"
+            with self._spans_lock:
+                with open(spans_file, "a", encoding="utf-8") as f:
+                    f.write(line)
+
+    def flush(self) -> None:
+        """Write the metrics file now if one is configured and spans came in since it was last written"""
+        with self._metrics_lock:
+            with self._lock:
+                metrics_file, dirty = self.metrics_file, self._dirty
+                if not metrics_file or not dirty:
+                    return
+                text = self._prometheus_text()
+                self._dirty = False
+            self._write_metrics(metrics_file, text)
+
+    def _write_periodically(self) -> None:
+        while True:
+            time.sleep(self.interval_s)
+            try:
+                self.flush()
+            except OSError:  # e.g. the directory went away; try again next interval
+                with self._lock:
+                    self._dirty = True
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            return self._prometheus_text()
+
+    def _prometheus_text(self) -> str:
+        lines = [f"# HELP {METRIC_NAME} Client-side time per request phase of the AML AI service calls",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        for (endpoint, phase), histogram in sorted(self._histograms.items()):
+            labels = f'endpoint="{endpoint}",phase="{phase[:-3]}"'
+            for bound, count in zip(BUCKETS, histogram.counts):
+                lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{METRIC_NAME}_sum{{{labels}}} {histogram.sum:.6f}")
+            lines.append(f"{METRIC_NAME}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _write_metrics(path: str, text: str) -> None:
+        # Write-then-rename so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Mean ms per endpoint and phase"""
+        with self._lock:
+            return [{"endpoint": endpoint, "phase": phase[:-3], "count": h.count, "mean_ms": 1000 * h.sum / h.count}
+                    for (endpoint, phase), h in sorted(self._histograms.items())]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._dirty = True
+
+
+_recorder = SpanRecorder()
+
+
+def span_recorder() -> SpanRecorder:
+    return _recorder
+
+
+def record_span(endpoint: str, timing: Dict[str, Any], **fields) -> None:
+    _recorder.record(endpoint, timing, **fields)
@@ -0,0 +1,373 @@
+"""Retries, hedged requests and a circuit breaker for the AML AI service.
+
+ResilientClient wraps a PooledClient with the same post() and stream_post()
+signatures, so the aml_api functions use it unchanged:
+
+- Retryable failures (connection errors, 429/502/503/504 and, for the
+  idempotent prediction call only, read timeouts) are retried with full-jitter
+  exponential backoff, honouring a numeric Retry-After header.
+- A prediction request still running after the recent latency percentile
+  gets one duplicate; the first answer that is not a failure status wins
+  and the other's response is closed when it returns. Hedges are limited to a fraction of all
+  requests and stop while the breaker is not closed.
+- After consecutive failures (transport errors, 429 and any 5xx response)
+  the breaker opens and requests fail at once with CircuitOpenError until a
+  cool-down has passed; then a single probe request decides whether it
+  closes again.
+
+Breaker, latency history and counters are kept per base URL at module level,
+so they survive Streamlit reruns like the connection pool does.
+"""
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+import httpx
+
+from http_pool import PooledClient
+from latency_stats import percentile
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+# Paths whose requests may be sent twice: retried after read timeouts and hedged
+IDEMPOTENT_PATHS = ("/api/ai-service/predictalertpriority",)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+DEFAULT_HEDGE_PERCENTILE = 95
+# Latencies needed before the hedge delay is trusted, and how many are kept
+HEDGE_MIN_SAMPLES = 20
+LATENCY_HISTORY = 200
+# At most this fraction of requests gets a duplicate
+HEDGE_BUDGET = 0.1
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised instead of sending a request while the breaker for a base URL is open"""
+
+
+class ResiliencePolicy:
+    """Retry, hedging and breaker settings for a ResilientClient"""
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX, hedge: bool = True,
+                 hedge_percentile: float = DEFAULT_HEDGE_PERCENTILE,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Seconds to wait before retry number attempt (1-based): full jitter, at least Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker for one base URL"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opens = 0
+        self.fast_failures = 0
+        self._probing = False
+
+    def configure(self, failure_threshold: int, reset_timeout: float) -> None:
+        with self._lock:
+            self.failure_threshold = max(1, failure_threshold)
+            self.reset_timeout = reset_timeout
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a probe request through"""
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def before_request(self, base_url: str) -> None:
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.state == OPEN and self.retry_in() <= 0:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                return
+            self.fast_failures += 1
+            wait_s = self.retry_in()
+        raise CircuitOpenError(f"Circuit open for {base_url} after {self.failure_threshold} consecutive "
+                               f"failures; not sending. Next attempt allowed in {wait_s:.0f}s.")
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opens += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures, "opens": self.opens,
+                    "fast_failures": self.fast_failures,
+                    "retry_in_s": self.retry_in() if self.state == OPEN else 0.0}
+
+
+class EndpointState:
+    """Breaker, per-path latencies and retry/hedge counters for one base URL"""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def observe(self, path: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(path, deque(maxlen=LATENCY_HISTORY)).append(seconds)
+
+    def hedge_delay(self, path: str, pct: float) -> Optional[float]:
+        """Seconds after which a duplicate is sent, or None if hedging is not allowed now"""
+        with self._lock:
+            history = sorted(self._latencies.get(path, ()))
+            within_budget = self.hedges < HEDGE_BUDGET * self.requests
+        if len(history) < HEDGE_MIN_SAMPLES or not within_budget:
+            return None
+        return percentile(history, pct)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {"requests": self.requests, "retries": self.retries, "hedges": self.hedges,
+                     "hedge_wins": self.hedge_wins}
+            latency_samples = {path: len(history) for path, history in self._latencies.items()}
+        return dict(stats, latency_samples=latency_samples, **self.breaker.snapshot())
+
+
+_states: Dict[str, EndpointState] = {}
+_states_lock = threading.Lock()
+
+
+def endpoint_state(base_url: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                   reset_timeout: float = DEFAULT_RESET_TIMEOUT) -> EndpointState:
+    """The shared state for base_url; the breaker settings only apply if it is created by this call"""
+    key = base_url.rstrip("/")
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            state = _states[key] = EndpointState(failure_threshold, reset_timeout)
+        return state
+
+
+def configure_breaker(base_url: str, failure_threshold: int, reset_timeout: float) -> None:
+    """Change the shared breaker settings for base_url (for every client of it)"""
+    endpoint_state(base_url).breaker.configure(failure_threshold, reset_timeout)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None  # absent, or an HTTP date
+
+
+def _is_failure(status_code: int) -> bool:
+    """Statuses that count against the breaker: every server error and the retryable ones (429)"""
+    return status_code >= 500 or status_code in RETRY_STATUSES
+
+
+def _discard(future: Future) -> None:
+    """Close the losing hedge attempt's response as soon as it returns.
+
+    A synchronous request cannot be interrupted while it waits for the response, so the loser's
+    connection is released when its response arrives (or it fails), not when the winner does.
+    """
+    def close(done: Future) -> None:
+        if not done.cancelled() and done.exception() is None:
+            done.result().close()
+
+    future.add_done_callback(close)
+
+
+def _run_in_thread(fn: Callable[[], httpx.Response]) -> Future:
+    """Run fn on a daemon thread, so a hung loser never delays interpreter exit"""
+    future: Future = Future()
+
+    def run():
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+class ResilientClient:
+    """PooledClient wrapper adding retries, hedging and a circuit breaker to post()"""
+
+    def __init__(self, client: PooledClient, policy: Optional[ResiliencePolicy] = None):
+        self._client = client
+        self.policy = policy or ResiliencePolicy()
+        # The breaker is shared per base URL: the policy's thresholds only set up a new one (see configure_breaker)
+        self.state = endpoint_state(client.base_url, self.policy.failure_threshold, self.policy.reset_timeout)
+
+    @property
+    def base_url(self) -> str:
+        return self._client.base_url
+
+    @property
+    def stats(self):
+        return self._client.stats
+
+    def post(self, url: str, read_timeout: Optional[float], **kwargs) -> httpx.Response:
+        """POST through the breaker with retries; raises httpx.HTTPError subclasses like PooledClient"""
+        path = httpx.URL(url).path
+        idempotent = path in IDEMPOTENT_PATHS
+        breaker = self.state.breaker
+        self.state.count("requests")
+        attempt = 1
+        while True:
+            breaker.before_request(self.base_url)
+            retry_after = None
+            try:
+                response = self._attempt(url, path, read_timeout, idempotent, kwargs)
+            except httpx.TimeoutException as e:
+                breaker.record_failure()
+                retryable = idempotent or isinstance(e, (httpx.ConnectTimeout, httpx.PoolTimeout))
+                if not retryable or attempt >= self.policy.max_attempts:
+                    raise
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                retryable = idempotent or isinstance(e, httpx.ConnectError)
+                if not retryable or attempt >= self.policy.max_attempts:
+                    raise
+            except httpx.HTTPError:
+                breaker.record_failure()
+                raise
+            else:
+                if _is_failure(response.status_code):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code not in RETRY_STATUSES or attempt >= self.policy.max_attempts:
+                    return response
+                retry_after = _retry_after(response)
+            self.state.count("retries")
+            time.sleep(self.policy.backoff(attempt, retry_after))
+            attempt += 1
+
+    @contextmanager
+    def stream_post(self, url: str, read_timeout: Optional[float], **kwargs) -> Iterator[httpx.Response]:
+        """PooledClient.stream_post through the breaker; never retried or hedged, as a stream cannot be replayed"""
+        breaker = self.state.breaker
+        breaker.before_request(self.base_url)
+        self.state.count("requests")
+        try:
+            with self._client.stream_post(url, read_timeout, **kwargs) as response:
+                if _is_failure(response.status_code):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                yield response
+        except httpx.TransportError:
+            # Failed before the headers or while reading the stream; statuses were counted above
+            breaker.record_failure()
+            raise
+
+    def _timed_post(self, url: str, path: str, read_timeout: Optional[float],
+                    kwargs: Dict[str, Any]) -> httpx.Response:
+        started = time.perf_counter()
+        response = self._client.post(url, read_timeout, **kwargs)
+        if response.status_code < 400:
+            self.state.observe(path, time.perf_counter() - started)
+        return response
+
+    def _attempt(self, url: str, path: str, read_timeout: Optional[float], idempotent: bool,
+                 kwargs: Dict[str, Any]) -> httpx.Response:
+        delay = None
+        if idempotent and self.policy.hedge and self.state.breaker.state == CLOSED:
+            delay = self.state.hedge_delay(path, self.policy.hedge_percentile)
+        if delay is None:
+            return self._timed_post(url, path, read_timeout, kwargs)
+
+        primary = _run_in_thread(lambda: self._timed_post(url, path, read_timeout, kwargs))
+        done, _ = wait([primary], timeout=delay)
+        if done or self.state.breaker.state != CLOSED:
+            return primary.result()
+        self.state.count("hedges")
+        hedge = _run_in_thread(lambda: self._timed_post(url, path, read_timeout, kwargs))
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                # A fast error response does not win over a slower answer
+                if future.exception() is None and not _is_failure(future.result().status_code):
+                    if future is hedge:
+                        self.state.count("hedge_wins")
+                    other = hedge if future is primary else primary
+                    if other in pending:
+                        _discard(other)
+                    elif other.exception() is None:
+                        other.result().close()
+                    return future.result()
+        # Neither succeeded: prefer a response (its status may be retried) over an error, the primary's first
+        responses = [future for future in (primary, hedge) if future.exception() is None]
+        if not responses:
+            return primary.result()
+        for future in responses[1:]:
+            future.result().close()
+        return responses[0].result()
+
+
+def resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """Breaker state and retry/hedge counters, keyed by base URL"""
+    with _states_lock:
+        states = dict(_states)
+    return {base_url: state.snapshot() for base_url, state in states.items()}
+
+
+def reset_circuit(base_url: str) -> None:
+    """Close the breaker for base_url, e.g. after the Space has been restarted"""
+    endpoint_state(base_url).breaker.reset()
@@ -0,0 +1,164 @@
+"""Content-addressed cache for AML AI service responses.
+
+Entries are keyed on a SHA-256 of the endpoint plus the canonical JSON of the
+request payload (for analysis alerts this includes the LLM flags), so an
+identical alert sent with identical options is answered locally. The memory
+tier is LRU with a TTL; an optional disk tier keeps entries across restarts.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses")
+
+
+def canonical_json(payload: Any) -> str:
+    """Deterministic JSON text for a payload (sorted keys, no whitespace)"""
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def payload_key(endpoint: str, payload: Any) -> str:
+    """Cache key for a request: hash of the endpoint and the canonical payload"""
+    digest = hashlib.sha256(endpoint.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonical_json(payload).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe LRU+TTL cache with an optional on-disk tier"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 disk_dir: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, max_entries: int, ttl_seconds: float, disk_dir: Optional[str]) -> None:
+        with self._lock:
+            self.max_entries = max_entries
+            self.ttl_seconds = ttl_seconds
+            self.disk_dir = disk_dir
+            self._evict_over_capacity()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None if absent or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            disk_dir = self.disk_dir
+
+        entry = self._read_disk(disk_dir, key) if disk_dir else None
+        with self._lock:
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries[key] = entry
+                self._evict_over_capacity()
+                self.disk_hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: Any, stored_at: Optional[float] = None) -> None:
+        """Cache value for key; stored_at (default now) is when it was produced, which its TTL counts from"""
+        entry = (time.time() if stored_at is None else stored_at, value)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict_over_capacity()
+            disk_dir = self.disk_dir
+        if disk_dir:
+            self._write_disk(disk_dir, key, entry)
+
+    def clear(self) -> None:
+        """Drop all entries, including the disk tier, and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.disk_hits = self.misses = self.evictions = 0
+            disk_dir = self.disk_dir
+        if disk_dir and os.path.isdir(disk_dir):
+            for name in os.listdir(disk_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(disk_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
+
+    def _evict_over_capacity(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _read_disk(disk_dir: str, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            with open(os.path.join(disk_dir, f"{key}.json"), encoding="utf-8") as f:
+                stored = json.load(f)
+            return stored["stored_at"], stored["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @staticmethod
+    def _write_disk(disk_dir: str, key: str, entry: Tuple[float, Any]) -> None:
+        # Write to a temp file and rename so readers never see a partial entry
+        tmp_path = None
+        try:
+            os.makedirs(disk_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": entry[0], "value": entry[1]}, f, ensure_ascii=False)
+            os.replace(tmp_path, os.path.join(disk_dir, f"{key}.json"))
+        except (OSError, TypeError, ValueError):
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+_cache = ResponseCache()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache as currently configured"""
+    return _cache
+
+
+def configure_response_cache(max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                             disk_dir: Optional[str] = None) -> ResponseCache:
+    """Apply settings to the process-wide response cache; they hold for every session until changed again"""
+    _cache.configure(max_entries, ttl_seconds, disk_dir)
+    return _cache
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    """Counters for the process-wide response cache"""
+    return _cache.stats()
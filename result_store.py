@@ -0,0 +1,236 @@
+"""Persistent store of prediction and analysis results shared by all sessions.
+
+Results otherwise live in one session's state (and, for a while, in the
+response cache). The store keeps every result received from the service in a
+SQLite database through SQLAlchemy, so other sessions, later runs and the
+batch runner can reuse it. Rows are keyed by the response cache's payload
+hash: aml_api looks an alert up here before sending it, so an alert answered
+with identical options within the last max_age_s seconds is not generated
+again; older rows stay searchable but are never reused. AlertID,
+FocusColumnValue and CUSTOMERID are indexed together with the time the result
+was stored, so a customer's history can be searched and paged without calling
+the service.
+
+Database errors never fail an API call; they are counted and the alert is
+sent as if the store were not there.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import (Column, Float, Index, Integer, MetaData, String, Table, Text, create_engine, delete, event,
+                        func, select)
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from response_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "results.db")
+DEFAULT_PAGE_SIZE = 50
+# Age after which a stored result is no longer reused (it stays in the history)
+DEFAULT_MAX_AGE_S = 7 * 24 * 3600
+# Seconds a writer waits for another process holding the database lock
+LOCK_TIMEOUT_S = 30
+
+SUMMARY_COLUMNS = ["id", "stored_at", "endpoint", "alert_id", "focus_column_value", "customer_id", "prediction",
+                   "model", "method", "llm"]
+
+_metadata = MetaData()
+
+results_table = Table(
+    "results", _metadata,
+    Column("id", Integer, primary_key=True),
+    Column("payload_hash", String(64), nullable=False, unique=True),
+    Column("endpoint", String(16), nullable=False),
+    Column("alert_id", String(64)),
+    Column("focus_column_value", String(128)),
+    Column("customer_id", String(64)),
+    Column("prediction", String(32)),
+    Column("model", String(64)),
+    Column("method", String(64)),
+    Column("llm", String(64)),
+    Column("stored_at", Float, nullable=False),
+    Column("response", Text, nullable=False),
+    # History lookups filter on one identifier and page newest first
+    Index("ix_results_alert_id", "alert_id", "stored_at"),
+    Index("ix_results_focus_column_value", "focus_column_value", "stored_at"),
+    Index("ix_results_customer_id", "customer_id", "stored_at"),
+    Index("ix_results_stored_at", "stored_at"),
+)
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None or value == "" else str(value)
+
+
+def _prediction_label(value: Any) -> Optional[str]:
+    """Prediction of a single-alert response ({'data': [{...}]} or the prediction itself)"""
+    data = value.get("data", value) if isinstance(value, dict) else value
+    first = data[0] if isinstance(data, list) and data else data
+    return _text(first.get("Prediction")) if isinstance(first, dict) else None
+
+
+class ResultStore:
+    """SQLite table of results keyed by payload hash"""
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, max_age_s: float = DEFAULT_MAX_AGE_S):
+        self.path = path
+        self.max_age_s = max_age_s
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._engine = create_engine(f"sqlite:///{path}",
+                                     connect_args={"check_same_thread": False, "timeout": LOCK_TIMEOUT_S})
+        event.listen(self._engine, "connect", self._on_connect)
+        _metadata.create_all(self._engine)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.writes = self.errors = 0
+
+    @staticmethod
+    def _on_connect(dbapi_connection, _record) -> None:
+        # WAL lets sessions read while a worker writes
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, key: str) -> Optional[Any]:
+        """The stored result for a payload hash, or None if absent or older than max_age_s"""
+        entry = self.get_entry(key)
+        return entry[1] if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[float, Any]]:
+        """(stored_at, result) for a payload hash, or None if absent or older than max_age_s"""
+        try:
+            with self._engine.connect() as conn:
+                row = conn.execute(select(results_table.c.stored_at, results_table.c.response)
+                                   .where(results_table.c.payload_hash == key)).first()
+        except SQLAlchemyError:
+            self._count("errors")
+            return None
+        if row is None:
+            self._count("misses")
+            return None
+        if time.time() - row.stored_at > self.max_age_s:
+            self._count("misses")
+            self._count("expired")
+            return None
+        self._count("hits")
+        return row.stored_at, json.loads(row.response)
+
+    def put(self, key: str, endpoint: str, alert: Dict[str, Any], value: Any, llm: Optional[str] = None) -> None:
+        """Store (or replace) the result of sending alert to endpoint"""
+        is_dict = isinstance(value, dict)
+        row = {
+            "payload_hash": key,
+            "endpoint": endpoint,
+            "alert_id": _text(alert.get("AlertID")),
+            "focus_column_value": _text(alert.get("FocusColumnValue")),
+            "customer_id": _text(alert.get("CUSTOMERID")),
+            "prediction": _prediction_label(value) if endpoint == "predict" else None,
+            "model": _text(value.get("model")) if is_dict else None,
+            "method": _text(value.get("method")) if is_dict else None,
+            "llm": llm,
+            "stored_at": time.time(),
+        }
+        try:
+            row["response"] = json.dumps(value, ensure_ascii=False)
+        except (TypeError, ValueError):
+            self._count("errors")
+            return
+        statement = insert(results_table).values(**row)
+        statement = statement.on_conflict_do_update(
+            index_elements=[results_table.c.payload_hash],
+            set_={name: statement.excluded[name] for name in row if name != "payload_hash"})
+        try:
+            with self._engine.begin() as conn:
+                conn.execute(statement)
+        except SQLAlchemyError:
+            self._count("errors")
+            return
+        self._count("writes")
+
+    @staticmethod
+    def _conditions(customer_id: str, alert_id: str, focus_column_value: str, endpoint: Optional[str]) -> List[Any]:
+        conditions = [results_table.c[column] == str(value).strip()
+                      for column, value in (("customer_id", customer_id), ("alert_id", alert_id),
+                                            ("focus_column_value", focus_column_value)) if value]
+        if endpoint:
+            conditions.append(results_table.c.endpoint == endpoint)
+        return conditions
+
+    def count(self, customer_id: str = "", alert_id: str = "", focus_column_value: str = "",
+              endpoint: Optional[str] = None) -> int:
+        """Rows matching every identifier given (exact match)"""
+        conditions = self._conditions(customer_id, alert_id, focus_column_value, endpoint)
+        with self._engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(results_table).where(*conditions)).scalar() or 0
+
+    def search(self, customer_id: str = "", alert_id: str = "", focus_column_value: str = "",
+               endpoint: Optional[str] = None, page: int = 1,
+               page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, Any]]:
+        """One 1-based page of the rows count() counts, newest first, without their responses"""
+        conditions = self._conditions(customer_id, alert_id, focus_column_value, endpoint)
+        query = (select(*[results_table.c[name] for name in SUMMARY_COLUMNS]).where(*conditions)
+                 .order_by(results_table.c.stored_at.desc(), results_table.c.id.desc())
+                 .limit(page_size).offset((max(page, 1) - 1) * page_size))
+        with self._engine.connect() as conn:
+            return [dict(row._mapping) for row in conn.execute(query)]
+
+    def load(self, row_id: int) -> Optional[Dict[str, Any]]:
+        """One row by id, with its response decoded under 'result'"""
+        with self._engine.connect() as conn:
+            row = conn.execute(select(results_table).where(results_table.c.id == row_id)).first()
+        if row is None:
+            return None
+        record = dict(row._mapping)
+        record["result"] = json.loads(record.pop("response"))
+        return record
+
+    def clear(self) -> None:
+        """Delete every stored result and reset the counters"""
+        with self._engine.begin() as conn:
+            conn.execute(delete(results_table))
+        with self._lock:
+            self.hits = self.misses = self.expired = self.writes = self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self._engine.connect() as conn:
+                counts = dict(conn.execute(select(results_table.c.endpoint, func.count())
+                                           .group_by(results_table.c.endpoint)).all())
+        except SQLAlchemyError:
+            counts = {}
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "rows": sum(counts.values()),
+                "predictions": counts.get("predict", 0),
+                "analyses": counts.get("analysis", 0),
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "max_age_s": self.max_age_s,
+                "writes": self.writes,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_stores: Dict[str, ResultStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_result_store(path: str = DEFAULT_STORE_PATH) -> ResultStore:
+    """The process-wide store for the database at path, opened (and created) on first use"""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = ResultStore(path)
+        return store
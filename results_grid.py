@@ -0,0 +1,92 @@
+"""Server-side paging, sorting and filtering of prediction results.
+
+Predictions are flattened once into a DataFrame; the app then filters and
+sorts it in pandas and sends only the visible page to the browser, so the
+amount drawn per rerun does not grow with the number of results.
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+GRID_COLUMNS = ["AlertID", "FocusColumnValue", "Prediction", "STRScenario"]
+SORT_COLUMNS = ["AlertID", "Prediction", "STRScenario"]
+PAGE_SIZES = [25, 50, 100, 250]
+DEFAULT_PAGE_SIZE = 50
+
+# Sorting by Prediction follows priority rather than the alphabet
+PREDICTION_ORDER = ["High", "Medium", "Low"]
+PREDICTION_ICONS = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
+
+
+def predictions_frame(predictions: List[Any]) -> pd.DataFrame:
+    """One row per prediction with the grid columns; _pos is the position in predictions"""
+    rows = []
+    for position, pred in enumerate(predictions):
+        if not isinstance(pred, dict):
+            continue
+        rows.append({
+            "_pos": position,
+            "AlertID": pred.get("AlertID"),
+            "FocusColumnValue": pred.get("FocusColumnValue"),
+            "Prediction": pred.get("Prediction", "N/A"),
+            "STRScenario": pred.get("STRScenario", pred.get("ScenarioName", "Unknown")),
+        })
+    frame = pd.DataFrame(rows, columns=["_pos"] + GRID_COLUMNS)
+    frame["Prediction"] = frame["Prediction"].astype(str)
+    frame["STRScenario"] = frame["STRScenario"].astype(str)
+    # Text copy of the ID for substring search; numeric IDs still sort numerically
+    frame["_alert_text"] = frame["AlertID"].astype(str)
+    return frame
+
+
+def filter_options(frame: pd.DataFrame) -> Dict[str, List[str]]:
+    """Distinct values for the Prediction and STRScenario filters"""
+    predictions = set(frame["Prediction"].unique())
+    ordered = [p for p in PREDICTION_ORDER if p in predictions]
+    return {
+        "Prediction": ordered + sorted(predictions - set(ordered)),
+        "STRScenario": sorted(frame["STRScenario"].unique()),
+    }
+
+
+def query_predictions(frame: pd.DataFrame, predictions: Optional[Sequence[str]] = None,
+                      scenarios: Optional[Sequence[str]] = None, alert_id: str = "",
+                      sort_by: str = "AlertID", ascending: bool = True) -> pd.DataFrame:
+    """Rows matching the filters (empty filter = no restriction), sorted by sort_by"""
+    mask = pd.Series(True, index=frame.index)
+    if predictions:
+        mask &= frame["Prediction"].isin(predictions)
+    if scenarios:
+        mask &= frame["STRScenario"].isin(scenarios)
+    alert_id = alert_id.strip()
+    if alert_id:
+        mask &= frame["_alert_text"].str.contains(alert_id, case=False, regex=False)
+    selected = frame[mask]
+
+    if sort_by == "Prediction":
+        rank = {p: i for i, p in enumerate(PREDICTION_ORDER)}
+        key = lambda column: column.map(rank).fillna(len(rank))
+    elif sort_by == "AlertID":
+        key = lambda column: pd.to_numeric(column, errors="coerce").fillna(float("inf"))
+    else:
+        key = None
+    return selected.sort_values(sort_by, ascending=ascending, key=key, kind="stable")
+
+
+def page_count(rows: int, page_size: int) -> int:
+    return max(1, -(-rows // page_size))
+
+
+def page_slice(frame: pd.DataFrame, page: int, page_size: int) -> Tuple[pd.DataFrame, int]:
+    """(rows of the 1-based page, number of pages); page is clamped into range"""
+    pages = page_count(len(frame), page_size)
+    page = min(max(page, 1), pages)
+    start = (page - 1) * page_size
+    return frame.iloc[start:start + page_size], pages
+
+
+def display_frame(page: pd.DataFrame) -> pd.DataFrame:
+    """The visible grid columns, with the priority icon in front of the prediction"""
+    shown = page[GRID_COLUMNS].copy()
+    shown["Prediction"] = [f"{PREDICTION_ICONS.get(p, '⚪')} {p}" for p in shown["Prediction"]]
+    return shown.reset_index(drop=True)
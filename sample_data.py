@@ -0,0 +1,157 @@
+"""Example alerts for the prediction and analysis APIs."""
+
+# Example data for Prediction API
+PREDICTION_EXAMPLE = [
+    {
+        "AlertID": 1001,
+        "FocusColumnValue": "PK-42101-1234567-1",
+        "AlertScore": 85.5,
+        "CreateDate": "2025-06-15T10:30:00",
+        "riskLevel": "Low",
+        "MatchDetails": '{"id": "PK-42101-1234567-1", "scenario": "Unusually large installment", "score": 85.5, "riskLevel": "Low"}',
+        "MatchInfoJson": '[{"ID": "PK-42101-1234567-1", "TRANSACTIONAMOUNT": 150000, "CURRENCY": "PKR", "INSTALLMENTNUMBER": 1}, {"ID": "PK-42101-1234567-1", "TRANSACTIONAMOUNT": 180000, "CURRENCY": "PKR", "INSTALLMENTNUMBER": 2}, {"ID": "PK-42101-1234567-1", "TRANSACTIONAMOUNT": 200000, "CURRENCY": "PKR", "INSTALLMENTNUMBER": 3}]',
+        "ScenarioName": "Unusually large installment",
+        "workflow": "Unassigned"
+    },
+    {
+        "AlertID": 1002,
+        "FocusColumnValue": "PK-35202-9876543-2",
+        "AlertScore": 92.0,
+        "CreateDate": "2025-06-20T14:15:00",
+        "riskLevel": "High",
+        "MatchDetails": '{"id": "PK-35202-9876543-2", "scenario": "Structuring / Smurfing activity", "score": 92.0, "riskLevel": "High"}',
+        "MatchInfoJson": '[{"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9500, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9800, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9200, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9600, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9400, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9900, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9100, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}]',
+        "ScenarioName": "Structuring / Smurfing activity",
+        "workflow": "Unassigned"
+    },
+    {
+        "AlertID": 1003,
+        "FocusColumnValue": "PK-37405-5551234-3",
+        "AlertScore": 78.3,
+        "CreateDate": "2025-06-25T09:45:00",
+        "riskLevel": "Medium",
+        "MatchDetails": '{"id": "PK-37405-5551234-3", "scenario": "Rapid movement of funds", "score": 78.3, "riskLevel": "Medium"}',
+        "MatchInfoJson": '[{"ID": "PK-37405-5551234-3", "TRANSACTIONAMOUNT": 250000, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Wire Transfer", "COUNTERPARTYACCOUNT": "AE987654321098765432"}, {"ID": "PK-37405-5551234-3", "TRANSACTIONAMOUNT": 300000, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Wire Transfer", "COUNTERPARTYACCOUNT": "GB12ABCD123456789012"}]',
+        "ScenarioName": "Rapid movement of funds",
+        "workflow": "Unassigned"
+    }
+]
+
+# Example data for Analysis API
+ANALYSIS_EXAMPLE = [
+    {
+        "AlertID": 1,
+        "FilteredTransactions": '[{"CUSTOMERID":"100001","IDENTITYNUMBERS":"42101-1234567-1","LOANID":"LN2024001","ACCOUNTID":"AC100001","CREATEDDATE":"2025-06-01 10:15:00","TRANSACTIONAMOUNT":150000.0,"CURRENCY":"PKR","INSTALLMENTNUMBER":1,"EXCESSAMOUNT":0.0},{"CUSTOMERID":"100001","IDENTITYNUMBERS":"42101-1234567-1","LOANID":"LN2024001","ACCOUNTID":"AC100001","CREATEDDATE":"2025-06-15 14:20:00","TRANSACTIONAMOUNT":180000.0,"CURRENCY":"PKR","INSTALLMENTNUMBER":2,"EXCESSAMOUNT":0.0},{"CUSTOMERID":"100001","IDENTITYNUMBERS":"42101-1234567-1","LOANID":"LN2024001","ACCOUNTID":"AC100001","CREATEDDATE":"2025-06-28 16:45:00","TRANSACTIONAMOUNT":200000.0,"CURRENCY":"PKR","INSTALLMENTNUMBER":3,"EXCESSAMOUNT":0.0}]',
+        "FocusColumnValue": "100001",
+        "KYCMonthlyIncome": "85,000 PKR",
+        "KYCNoOfCredits": "3-5",
+        "KYCNoOfDebits": "8-12",
+        "KYCRiskCategoryValue": "Low",
+        "KYCValueOfCredits": "150,000 - 200,000 PKR",
+        "KYCValueOfDebits": "80,000 - 120,000 PKR",
+        "OccupationValue": "Private Employee",
+        "STRCount": 0,
+        "STRScenarioHistory": "",
+        "ScenarioName": "Unusually large installment",
+        "CustomerName": "Muhammad Bilal Sheikh",
+        "CUSTOMERID": "100001",
+        "BranchID": "KHI-DHA",
+        "Country": "Pakistan",
+        "CustomerType": "Retail",
+        "CustomerStatus": "Retail Customer",
+        "CreatedDate": "2020-01-15",
+        "RelationshipStartDate": "2020-01-15",
+        "RiskScore": "4.2",
+        "PreviousAlerts": [],
+        "Counterparties": [],
+        "BranchQueries": {
+            "Requested": "Verification required for loan installments totaling 530,000 PKR within one month, significantly exceeding declared monthly income of 85,000 PKR. Please confirm source of funds and provide documentation for additional income sources.",
+            "Response": "Customer stated installments are from remittances received from brother working in UAE, family savings from wedding expenses, and advance salary from employer for Eid holidays. Customer provided remittance receipts and employer letter."
+        }
+    },
+    {
+        "AlertID": 2,
+        "FilteredTransactions": '[{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 09:30:00","TRANSACTIONAMOUNT":9500.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 11:30:00","TRANSACTIONAMOUNT":9800.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 13:30:00","TRANSACTIONAMOUNT":9200.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 15:30:00","TRANSACTIONAMOUNT":9600.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 17:30:00","TRANSACTIONAMOUNT":9400.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 19:30:00","TRANSACTIONAMOUNT":9900.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 21:30:00","TRANSACTIONAMOUNT":9100.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-03 10:15:00","TRANSACTIONAMOUNT":450000.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Wire Transfer","COUNTERPARTYACCOUNT":"AE123456789012345678","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-03 14:30:00","TRANSACTIONAMOUNT":500000.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Wire Transfer","COUNTERPARTYACCOUNT":"GB29NWBK60161331926819","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-03 16:45:00","TRANSACTIONAMOUNT":56525.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Local Transfer","COUNTERPARTYACCOUNT":"PK36SCBL0000001123456702","EXCESSAMOUNT":0.0}]',
+        "FocusColumnValue": "100002",
+        "KYCMonthlyIncome": "55,000 PKR",
+        "KYCNoOfCredits": "7",
+        "KYCNoOfDebits": "6",
+        "KYCRiskCategoryValue": "Medium",
+        "KYCValueOfCredits": "66,500 PKR",
+        "KYCValueOfDebits": "56,525 PKR",
+        "OccupationValue": "Textile Trader",
+        "STRCount": 2,
+        "STRScenarioHistory": "Large Cash Deposits, Rapid Fund Transfers",
+        "ScenarioName": "Structuring / Smurfing activity",
+        "CustomerName": "Ayesha Malik",
+        "CUSTOMERID": "100002",
+        "BranchID": "LHR-GUL",
+        "Country": "Pakistan",
+        "CustomerType": "Retail",
+        "CustomerStatus": "Retail Customer",
+        "CreatedDate": "2019-03-20",
+        "RelationshipStartDate": "2019-03-20",
+        "RiskScore": "8.5",
+        "PreviousAlerts": [
+            {
+                "AlertName": "Large Cash Deposits",
+                "Description": "1,200,000 PKR deposited in cash across multiple transactions in single day",
+                "BranchExplanation": "Proceeds from sale of commercial property in Faisalabad",
+                "Documentation": "",
+                "RiskEscalation": ""
+            },
+            {
+                "AlertName": "Rapid Fund Transfers",
+                "Description": "950,000 PKR transferred to multiple accounts in Dubai and UK within 48 hours of deposit",
+                "BranchExplanation": "Payment for textile machinery imports and supplier advance",
+                "Documentation": "",
+                "RiskEscalation": "Risk score escalated due to rapid fund movement to multiple high-risk jurisdictions without proper trade documentation."
+            }
+        ],
+        "Counterparties": [
+            {
+                "Name": "Al-Madina Textile Machinery LLC",
+                "AccountID": "AE123456789012345678",
+                "Country": "United Arab Emirates",
+                "Jurisdiction": "Dubai",
+                "TransactionAmount": 450000.0,
+                "Currency": "PKR",
+                "TransactionDate": "2025-06-03 10:15:00",
+                "TransactionType": "Wire Transfer",
+                "Relationship": "Supplier",
+                "RiskLevel": "Medium",
+                "ScreeningResult": "No adverse media found"
+            },
+            {
+                "Name": "Manchester Textile Imports Ltd",
+                "AccountID": "GB29NWBK60161331926819",
+                "Country": "United Kingdom",
+                "Jurisdiction": "Manchester",
+                "TransactionAmount": 500000.0,
+                "Currency": "PKR",
+                "TransactionDate": "2025-06-03 14:30:00",
+                "TransactionType": "Wire Transfer",
+                "Relationship": "Business Partner",
+                "RiskLevel": "High",
+                "ScreeningResult": "Flagged for enhanced due diligence - multiple transactions with high-risk jurisdictions"
+            },
+            {
+                "Name": "Ahmed Textiles Faisalabad",
+                "AccountID": "PK36SCBL0000001123456702",
+                "Country": "Pakistan",
+                "Jurisdiction": "Faisalabad",
+                "TransactionAmount": 56525.0,
+                "Currency": "PKR",
+                "TransactionDate": "2025-06-03 16:45:00",
+                "TransactionType": "Local Transfer",
+                "Relationship": "Local Supplier",
+                "RiskLevel": "Low",
+                "ScreeningResult": "Verified local business entity"
+            }
+        ],
+        "BranchQueries": {
+            "Requested": "Multiple cash deposits totaling 66,500 PKR made in same day, each below 10,000 PKR threshold. Pattern suggests potential structuring to avoid CTR reporting. Please verify legitimate business purpose and provide sales invoices or receipts.",
+            "Response": "Customer explained these are daily cash collections from retail textile sales at Anarkali Bazaar. Customer provided daily sales register and GST invoices. Stated pattern is normal for cash-based business operations."
+        }
+    }
+]
@@ -0,0 +1,306 @@
+"""Per-session memory budget for long report, thinking and transaction text.
+
+Analysis results stay in a session's state for as long as the analyst keeps
+the page open, and audit-mode thinking text is often longer than the report
+itself. Before a result is kept, every long text field in it is replaced by a
+TextRef: the text is zlib-compressed into the session's SessionTexts, which
+holds compressed text in memory up to the session's byte budget and spills
+the least recently used text to disk beyond it. The app loads the text back
+only when the analyst asks to see it. When a result is replaced its texts are
+released, and the disk spill has a cap of its own: beyond it the least
+recently used spilled text is dropped and shows a placeholder if it is still
+opened.
+
+Each session also reports how much its state holds, key by key, so the
+server can be sized for many concurrent analysts; the reports of all
+sessions are kept here at module level.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from aml_api import extract_analyses
+from response_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_BUDGET_MB = 8
+DEFAULT_DISK_BUDGET_MB = 64
+DEFAULT_SPILL_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "session_text")
+# Shorter strings are kept as they are
+MIN_COMPACT_CHARS = 2048
+COMPACT_FIELDS = ("analysis", "Analysis", "AnalysisReport", "thinking", "FilteredTransactions")
+# Sessions not seen for this long are forgotten (Streamlit does not say when a session ends)
+SESSION_RETENTION_S = 24 * 3600
+# Shown instead of a text that was dropped to keep the spill under its cap
+DROPPED_TEXT = "[Text no longer available: it was dropped to keep this session's memory within its limit.]"
+
+
+class TextRef:
+    """Stand-in for a long string held (compressed) by a SessionTexts"""
+
+    __slots__ = ("texts", "digest", "chars")
+
+    def __init__(self, texts: "SessionTexts", digest: str, chars: int):
+        self.texts = texts
+        self.digest = digest
+        self.chars = chars
+
+    def load(self) -> str:
+        return self.texts.load(self.digest)
+
+    def __repr__(self) -> str:
+        return f"TextRef({self.digest[:12]}, {self.chars} chars)"
+
+
+def text_of(value: Any) -> Any:
+    """The text behind a TextRef; any other value unchanged"""
+    return value.load() if isinstance(value, TextRef) else value
+
+
+class SessionTexts:
+    """One session's compressed texts: in memory up to budget_bytes, the least recently used beyond it on disk.
+
+    Each text is counted once per TextRef handed out for it and removed when all of them are released. Spilled
+    text beyond disk_budget_bytes is dropped, least recently used first.
+    """
+
+    def __init__(self, session_id: str, budget_bytes: int, spill_dir: str = DEFAULT_SPILL_DIR,
+                 disk_budget_bytes: int = DEFAULT_DISK_BUDGET_MB * 2**20):
+        self.session_id = session_id
+        self.budget_bytes = budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self.spill_dir = os.path.join(spill_dir, session_id)
+        self._lock = threading.Lock()
+        self._blobs: "OrderedDict[str, bytes]" = OrderedDict()
+        self._spilled: "OrderedDict[str, int]" = OrderedDict()
+        self._chars: Dict[str, int] = {}
+        self._refs: Dict[str, int] = {}
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.loads = 0
+        self.spills = 0
+        self.dropped = 0
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.spill_dir, f"{digest}.z")
+
+    def put(self, text: str) -> TextRef:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        blob: Optional[bytes] = None
+        while True:
+            with self._lock:
+                stored = digest in self._blobs or digest in self._spilled
+                if not stored and blob is not None:
+                    self._blobs[digest] = blob
+                    self._chars[digest] = len(text)
+                    self.memory_bytes += len(blob)
+                    self._enforce_budget()
+                    stored = True
+                if stored:
+                    if digest in self._blobs:
+                        self._blobs.move_to_end(digest)
+                    self._refs[digest] = self._refs.get(digest, 0) + 1
+                    return TextRef(self, digest, len(text))
+            # Compressed without the lock, so loads and other puts never wait behind a large text
+            blob = zlib.compress(data, 6)
+
+    def load(self, digest: str) -> str:
+        with self._lock:
+            self.loads += 1
+            blob = self._blobs.get(digest)
+            if blob is not None:
+                self._blobs.move_to_end(digest)
+            elif digest in self._spilled:
+                self._spilled.move_to_end(digest)
+                with open(self._path(digest), "rb") as f:
+                    blob = f.read()
+            else:
+                return DROPPED_TEXT
+        return zlib.decompress(blob).decode("utf-8")
+
+    def release(self, refs: List[TextRef]) -> None:
+        """Give back TextRefs that are no longer kept; texts without references left are removed"""
+        with self._lock:
+            for ref in refs:
+                count = self._refs.get(ref.digest, 0) - 1
+                if count > 0:
+                    self._refs[ref.digest] = count
+                elif ref.digest in self._refs:
+                    self._remove(ref.digest)
+
+    def _remove(self, digest: str) -> None:
+        self._refs.pop(digest, None)
+        self._chars.pop(digest, None)
+        blob = self._blobs.pop(digest, None)
+        if blob is not None:
+            self.memory_bytes -= len(blob)
+        size = self._spilled.pop(digest, None)
+        if size is not None:
+            self.disk_bytes -= size
+            try:
+                os.remove(self._path(digest))
+            except OSError:
+                pass
+
+    def set_budget(self, budget_bytes: int) -> None:
+        with self._lock:
+            self.budget_bytes = budget_bytes
+            self._enforce_budget()
+
+    def _enforce_budget(self) -> None:
+        while self._blobs and self.memory_bytes > self.budget_bytes:
+            digest, blob = self._blobs.popitem(last=False)
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._path(digest), "wb") as f:
+                f.write(blob)
+            self._spilled[digest] = len(blob)
+            self.memory_bytes -= len(blob)
+            self.disk_bytes += len(blob)
+            self.spills += 1
+        while self._spilled and self.disk_bytes > self.disk_budget_bytes:
+            self._remove(next(iter(self._spilled)))
+            self.dropped += 1
+
+    def clear(self) -> None:
+        """Forget every text (TextRefs handed out before can no longer be loaded)"""
+        with self._lock:
+            self._blobs.clear()
+            self._spilled.clear()
+            self._chars.clear()
+            self._refs.clear()
+            self.memory_bytes = 0
+            self.disk_bytes = 0
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"texts": len(self._chars), "chars": sum(self._chars.values()),
+                    "memory_bytes": self.memory_bytes, "disk_bytes": self.disk_bytes,
+                    "budget_bytes": self.budget_bytes, "disk_budget_bytes": self.disk_budget_bytes,
+                    "loads": self.loads, "spills": self.spills, "dropped": self.dropped}
+
+
+def compact_fields(record: Dict[str, Any], texts: SessionTexts,
+                   fields: tuple = COMPACT_FIELDS) -> Dict[str, Any]:
+    """Copy of record with its long string fields replaced by TextRefs"""
+    compacted = dict(record)
+    for field in fields:
+        value = compacted.get(field)
+        if isinstance(value, str) and len(value) >= MIN_COMPACT_CHARS:
+            compacted[field] = texts.put(value)
+    return compacted
+
+
+def compact_analysis_result(result: Dict[str, Any], texts: SessionTexts) -> Dict[str, Any]:
+    """Copy of a call_analysis_api-style result with long texts in texts.
+
+    The result itself is left alone: it may be shared with the response cache or a background job.
+    """
+    if not result.get("success"):
+        return result
+    analyses = [compact_fields(analysis, texts) if isinstance(analysis, dict) else analysis
+                for analysis in extract_analyses(result.get("data", {}))]
+    return dict(result, data={"data": analyses})
+
+
+def text_refs(result: Any) -> List[TextRef]:
+    """Every TextRef held by a result kept with compact_analysis_result"""
+    if not isinstance(result, dict) or not result.get("success"):
+        return []
+    return [value for analysis in extract_analyses(result.get("data", {})) if isinstance(analysis, dict)
+            for value in analysis.values() if isinstance(value, TextRef)]
+
+
+def format_bytes(size: float) -> str:
+    return f"{size / 2**20:.2f} MB" if size >= 2**20 else f"{size / 1024:.1f} KB"
+
+
+def deep_size(value: Any, _seen: Optional[set] = None) -> int:
+    """Approximate bytes held by value, following containers (each object counted once)"""
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, TextRef):
+        return sys.getsizeof(value)
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in value)
+    return size
+
+
+def state_sizes(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Bytes held per key of a session's state, largest first"""
+    seen: set = set()
+    rows = [{"key": str(key), "bytes": deep_size(value, seen)} for key, value in state.items()]
+    return sorted(rows, key=lambda row: row["bytes"], reverse=True)
+
+
+class SessionMemory:
+    """Registry of every session's texts and latest memory report"""
+
+    def __init__(self, spill_dir: str = DEFAULT_SPILL_DIR):
+        self.spill_dir = spill_dir
+        self._lock = threading.Lock()
+        self._texts: Dict[str, SessionTexts] = {}
+        self._reports: Dict[str, Dict[str, Any]] = {}
+
+    def texts(self, session_id: str, budget_bytes: int) -> SessionTexts:
+        """The session's texts, created on first use; budget_bytes replaces the previous budget"""
+        self._purge()
+        with self._lock:
+            texts = self._texts.get(session_id)
+            if texts is None:
+                texts = self._texts[session_id] = SessionTexts(session_id, budget_bytes, self.spill_dir)
+        if texts.budget_bytes != budget_bytes:
+            texts.set_budget(budget_bytes)
+        return texts
+
+    def report(self, session_id: str, state_bytes: int) -> None:
+        """Record a session's latest state size (peak kept)"""
+        with self._lock:
+            previous = self._reports.get(session_id, {})
+            self._reports[session_id] = {"seen": time.time(), "state_bytes": state_bytes,
+                                         "peak_bytes": max(state_bytes, previous.get("peak_bytes", 0))}
+
+    def sessions(self) -> List[Dict[str, Any]]:
+        """Latest report and text statistics of every session still known"""
+        with self._lock:
+            reports = dict(self._reports)
+            texts = dict(self._texts)
+        rows = []
+        for session_id, report in reports.items():
+            stats = texts[session_id].stats() if session_id in texts else {}
+            rows.append({"session": session_id, "state_bytes": report["state_bytes"],
+                         "peak_bytes": report["peak_bytes"], "text_memory_bytes": stats.get("memory_bytes", 0),
+                         "text_disk_bytes": stats.get("disk_bytes", 0), "seen": report["seen"]})
+        return sorted(rows, key=lambda row: row["seen"], reverse=True)
+
+    def _purge(self) -> None:
+        cutoff = time.time() - SESSION_RETENTION_S
+        with self._lock:
+            stale = [session_id for session_id, report in self._reports.items() if report["seen"] < cutoff]
+            for session_id in stale:
+                del self._reports[session_id]
+            stale_texts = [self._texts.pop(session_id) for session_id in stale if session_id in self._texts]
+        for texts in stale_texts:
+            texts.clear()
+
+
+_memory = SessionMemory()
+
+
+def session_memory() -> SessionMemory:
+    return _memory
@@ -0,0 +1,90 @@
+"""Process-wide de-duplication of identical requests in flight.
+
+When several sessions (or background jobs) send the same alert with the same
+options at the same time, only the first call goes to the service; the others
+wait for it and receive its outcome, errors included. Calls are keyed by the
+response cache's payload hash (endpoint URL plus canonical JSON body), so only
+byte-for-byte equivalent requests are joined. Nothing is kept once a call has
+finished: repeats after that are the response cache's job.
+"""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Registry of calls in progress, keyed by payload hash"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, endpoint: str, counter: str, amount: int = 1) -> None:
+        counts = self._counts.setdefault(endpoint, {"calls": 0, "saved": 0, "alerts_saved": 0})
+        counts[counter] += amount
+
+    def do(self, key: str, fn: Callable[[], T], endpoint: str = "", alerts: int = 1) -> Tuple[T, bool]:
+        """(fn's result, shared): run fn, or wait for the identical call already running and share its result.
+
+        An exception raised by the running call is raised in every caller waiting for it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._count(endpoint, "calls")
+            else:
+                call.waiters += 1
+                self._count(endpoint, "saved")
+                self._count(endpoint, "alerts_saved", alerts)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Upstream calls made, calls saved and alerts saved, per endpoint"""
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self._counts.items()}
+
+    def clear_stats(self) -> None:
+        with self._lock:
+            self._counts.clear()
+
+
+_flights = SingleFlight()
+
+
+def single_flight() -> SingleFlight:
+    return _flights
+
+
+def coalesce(key: str, fn: Callable[[], T], endpoint: str = "", alerts: int = 1) -> Tuple[T, bool]:
+    return _flights.do(key, fn, endpoint, alerts)
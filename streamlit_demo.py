@@ -1,10 +1,44 @@
 import streamlit as st
-import requests
+import altair as alt
 import json
-from typing import List, Dict, Any
+from typing import Callable, Iterator, List, Dict, Any, Optional, Tuple, Union
 import pandas as pd
+import time
+import uuid
 from datetime import datetime
 
+from alert_editor import EDITOR_FIELDS, RISK_LEVELS, alerts_to_frame, frame_to_alerts
+from aml_api import (DEFAULT_API_BASE_URL, DEFAULT_MAX_CONCURRENCY, AnalysisStream, call_prediction_api,
+                     call_analysis_api,
+                     combine_analysis_results, combine_prediction_results, config_key, extract_analyses,
+                     extract_predictions, iter_analysis_results, merge_analysis_results)
+from analysis_jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, AnalysisJob, job_manager
+from batch_scheduler import iter_scheduled_analysis
+from bulk_ingest import DEFAULT_CHUNK_SIZE, IngestSummary, iter_alert_batches
+from call_history import (GROUP_COLUMNS, HISTORY_SIZE, call_history, error_breakdown, history_frame,
+                          latency_histogram, latency_table, overview, throughput)
+from http_pool import (DEFAULT_CONNECT_TIMEOUT, DEFAULT_POOL_SIZE, HTTP2_AVAILABLE, PooledClient,
+                       get_http_client, pool_stats)
+from json_fields import format_validation_errors, validate_alerts
+from latency_stats import summarize_latencies
+from prescreen import prescreen_alerts, select_alerts
+from priority_pipeline import DEFAULT_ANALYSIS_CONCURRENCY, iter_prioritized_analysis, prediction_label
+from report_renderer import REPORT_CSS, render_report_html
+from request_timing import DEFAULT_METRICS_FILE, DEFAULT_SPANS_FILE, record_span, span_recorder
+from warmup import DEFAULT_KEEPALIVE_MINUTES, READY, WARMING, ensure_warmer, warmup_status
+from resilience import (DEFAULT_HEDGE_PERCENTILE, DEFAULT_MAX_ATTEMPTS, ResiliencePolicy, ResilientClient,
+                        configure_breaker, endpoint_state, reset_circuit, resilience_stats)
+from results_grid import (DEFAULT_PAGE_SIZE, PAGE_SIZES, PREDICTION_ICONS, SORT_COLUMNS, display_frame,
+                          filter_options, page_count, page_slice, predictions_frame, query_predictions)
+from sample_data import ANALYSIS_EXAMPLE, PREDICTION_EXAMPLE
+from wire_codec import ZSTD_AVAILABLE
+from response_cache import (DEFAULT_CACHE_DIR, ResponseCache, configure_response_cache, get_response_cache,
+                            response_cache_stats)
+from result_store import DEFAULT_STORE_PATH, ResultStore, get_result_store
+from session_memory import (DEFAULT_BUDGET_MB, SessionTexts, TextRef, compact_analysis_result, format_bytes,
+                            session_memory, state_sizes, text_of, text_refs)
+from single_flight import single_flight
+
 # Page configuration
 st.set_page_config(
     page_title="AML AI Analysis & Alert Prioritization Demo",
@@ -72,245 +106,702 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Default API Base URL
-DEFAULT_API_BASE_URL = "https://syedkhizarrayaz-bm-ai-analysis-and-alert-priorit-2625d69.hf.space"
-
-# Example data for Prediction API
-PREDICTION_EXAMPLE = [
-    {
-        "AlertID": 1001,
-        "FocusColumnValue": "PK-42101-1234567-1",
-        "AlertScore": 85.5,
-        "CreateDate": "2025-06-15T10:30:00",
-        "riskLevel": "Low",
-        "MatchDetails": '{"id": "PK-42101-1234567-1", "scenario": "Unusually large installment", "score": 85.5, "riskLevel": "Low"}',
-        "MatchInfoJson": '[{"ID": "PK-42101-1234567-1", "TRANSACTIONAMOUNT": 150000, "CURRENCY": "PKR", "INSTALLMENTNUMBER": 1}, {"ID": "PK-42101-1234567-1", "TRANSACTIONAMOUNT": 180000, "CURRENCY": "PKR", "INSTALLMENTNUMBER": 2}, {"ID": "PK-42101-1234567-1", "TRANSACTIONAMOUNT": 200000, "CURRENCY": "PKR", "INSTALLMENTNUMBER": 3}]',
-        "ScenarioName": "Unusually large installment",
-        "workflow": "Unassigned"
-    },
-    {
-        "AlertID": 1002,
-        "FocusColumnValue": "PK-35202-9876543-2",
-        "AlertScore": 92.0,
-        "CreateDate": "2025-06-20T14:15:00",
-        "riskLevel": "High",
-        "MatchDetails": '{"id": "PK-35202-9876543-2", "scenario": "Structuring / Smurfing activity", "score": 92.0, "riskLevel": "High"}',
-        "MatchInfoJson": '[{"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9500, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9800, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9200, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9600, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9400, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9900, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}, {"ID": "PK-35202-9876543-2", "TRANSACTIONAMOUNT": 9100, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Cash Deposit"}]',
-        "ScenarioName": "Structuring / Smurfing activity",
-        "workflow": "Unassigned"
-    },
-    {
-        "AlertID": 1003,
-        "FocusColumnValue": "PK-37405-5551234-3",
-        "AlertScore": 78.3,
-        "CreateDate": "2025-06-25T09:45:00",
-        "riskLevel": "Medium",
-        "MatchDetails": '{"id": "PK-37405-5551234-3", "scenario": "Rapid movement of funds", "score": 78.3, "riskLevel": "Medium"}',
-        "MatchInfoJson": '[{"ID": "PK-37405-5551234-3", "TRANSACTIONAMOUNT": 250000, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Wire Transfer", "COUNTERPARTYACCOUNT": "AE987654321098765432"}, {"ID": "PK-37405-5551234-3", "TRANSACTIONAMOUNT": 300000, "CURRENCY": "PKR", "TRANSACTIONTYPE": "Wire Transfer", "COUNTERPARTYACCOUNT": "GB12ABCD123456789012"}]',
-        "ScenarioName": "Rapid movement of funds",
-        "workflow": "Unassigned"
-    }
-]
-
-# Example data for Analysis API
-ANALYSIS_EXAMPLE = [
-    {
-        "AlertID": 1,
-        "FilteredTransactions": '[{"CUSTOMERID":"100001","IDENTITYNUMBERS":"42101-1234567-1","LOANID":"LN2024001","ACCOUNTID":"AC100001","CREATEDDATE":"2025-06-01 10:15:00","TRANSACTIONAMOUNT":150000.0,"CURRENCY":"PKR","INSTALLMENTNUMBER":1,"EXCESSAMOUNT":0.0},{"CUSTOMERID":"100001","IDENTITYNUMBERS":"42101-1234567-1","LOANID":"LN2024001","ACCOUNTID":"AC100001","CREATEDDATE":"2025-06-15 14:20:00","TRANSACTIONAMOUNT":180000.0,"CURRENCY":"PKR","INSTALLMENTNUMBER":2,"EXCESSAMOUNT":0.0},{"CUSTOMERID":"100001","IDENTITYNUMBERS":"42101-1234567-1","LOANID":"LN2024001","ACCOUNTID":"AC100001","CREATEDDATE":"2025-06-28 16:45:00","TRANSACTIONAMOUNT":200000.0,"CURRENCY":"PKR","INSTALLMENTNUMBER":3,"EXCESSAMOUNT":0.0}]',
-        "FocusColumnValue": "100001",
-        "KYCMonthlyIncome": "85,000 PKR",
-        "KYCNoOfCredits": "3-5",
-        "KYCNoOfDebits": "8-12",
-        "KYCRiskCategoryValue": "Low",
-        "KYCValueOfCredits": "150,000 - 200,000 PKR",
-        "KYCValueOfDebits": "80,000 - 120,000 PKR",
-        "OccupationValue": "Private Employee",
-        "STRCount": 0,
-        "STRScenarioHistory": "",
-        "ScenarioName": "Unusually large installment",
-        "CustomerName": "Muhammad Bilal Sheikh",
-        "CUSTOMERID": "100001",
-        "BranchID": "KHI-DHA",
-        "Country": "Pakistan",
-        "CustomerType": "Retail",
-        "CustomerStatus": "Retail Customer",
-        "CreatedDate": "2020-01-15",
-        "RelationshipStartDate": "2020-01-15",
-        "RiskScore": "4.2",
-        "PreviousAlerts": [],
-        "Counterparties": [],
-        "BranchQueries": {
-            "Requested": "Verification required for loan installments totaling 530,000 PKR within one month, significantly exceeding declared monthly income of 85,000 PKR. Please confirm source of funds and provide documentation for additional income sources.",
-            "Response": "Customer stated installments are from remittances received from brother working in UAE, family savings from wedding expenses, and advance salary from employer for Eid holidays. Customer provided remittance receipts and employer letter."
-        }
-    },
-    {
-        "AlertID": 2,
-        "FilteredTransactions": '[{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 09:30:00","TRANSACTIONAMOUNT":9500.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 11:30:00","TRANSACTIONAMOUNT":9800.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 13:30:00","TRANSACTIONAMOUNT":9200.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 15:30:00","TRANSACTIONAMOUNT":9600.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 17:30:00","TRANSACTIONAMOUNT":9400.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 19:30:00","TRANSACTIONAMOUNT":9900.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-02 21:30:00","TRANSACTIONAMOUNT":9100.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Cash Deposit","COUNTERPARTYACCOUNT":"","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-03 10:15:00","TRANSACTIONAMOUNT":450000.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Wire Transfer","COUNTERPARTYACCOUNT":"AE123456789012345678","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-03 14:30:00","TRANSACTIONAMOUNT":500000.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Wire Transfer","COUNTERPARTYACCOUNT":"GB29NWBK60161331926819","EXCESSAMOUNT":0.0},{"CUSTOMERID":"100002","IDENTITYNUMBERS":"35202-9876543-2","LOANID":"","ACCOUNTID":"AC100002","CREATEDDATE":"2025-06-03 16:45:00","TRANSACTIONAMOUNT":56525.0,"CURRENCY":"PKR","TRANSACTIONTYPE":"Local Transfer","COUNTERPARTYACCOUNT":"PK36SCBL0000001123456702","EXCESSAMOUNT":0.0}]',
-        "FocusColumnValue": "100002",
-        "KYCMonthlyIncome": "55,000 PKR",
-        "KYCNoOfCredits": "7",
-        "KYCNoOfDebits": "6",
-        "KYCRiskCategoryValue": "Medium",
-        "KYCValueOfCredits": "66,500 PKR",
-        "KYCValueOfDebits": "56,525 PKR",
-        "OccupationValue": "Textile Trader",
-        "STRCount": 2,
-        "STRScenarioHistory": "Large Cash Deposits, Rapid Fund Transfers",
-        "ScenarioName": "Structuring / Smurfing activity",
-        "CustomerName": "Ayesha Malik",
-        "CUSTOMERID": "100002",
-        "BranchID": "LHR-GUL",
-        "Country": "Pakistan",
-        "CustomerType": "Retail",
-        "CustomerStatus": "Retail Customer",
-        "CreatedDate": "2019-03-20",
-        "RelationshipStartDate": "2019-03-20",
-        "RiskScore": "8.5",
-        "PreviousAlerts": [
-            {
-                "AlertName": "Large Cash Deposits",
-                "Description": "1,200,000 PKR deposited in cash across multiple transactions in single day",
-                "BranchExplanation": "Proceeds from sale of commercial property in Faisalabad",
-                "Documentation": "",
-                "RiskEscalation": ""
-            },
-            {
-                "AlertName": "Rapid Fund Transfers",
-                "Description": "950,000 PKR transferred to multiple accounts in Dubai and UK within 48 hours of deposit",
-                "BranchExplanation": "Payment for textile machinery imports and supplier advance",
-                "Documentation": "",
-                "RiskEscalation": "Risk score escalated due to rapid fund movement to multiple high-risk jurisdictions without proper trade documentation."
-            }
-        ],
-        "Counterparties": [
-            {
-                "Name": "Al-Madina Textile Machinery LLC",
-                "AccountID": "AE123456789012345678",
-                "Country": "United Arab Emirates",
-                "Jurisdiction": "Dubai",
-                "TransactionAmount": 450000.0,
-                "Currency": "PKR",
-                "TransactionDate": "2025-06-03 10:15:00",
-                "TransactionType": "Wire Transfer",
-                "Relationship": "Supplier",
-                "RiskLevel": "Medium",
-                "ScreeningResult": "No adverse media found"
-            },
-            {
-                "Name": "Manchester Textile Imports Ltd",
-                "AccountID": "GB29NWBK60161331926819",
-                "Country": "United Kingdom",
-                "Jurisdiction": "Manchester",
-                "TransactionAmount": 500000.0,
-                "Currency": "PKR",
-                "TransactionDate": "2025-06-03 14:30:00",
-                "TransactionType": "Wire Transfer",
-                "Relationship": "Business Partner",
-                "RiskLevel": "High",
-                "ScreeningResult": "Flagged for enhanced due diligence - multiple transactions with high-risk jurisdictions"
-            },
-            {
-                "Name": "Ahmed Textiles Faisalabad",
-                "AccountID": "PK36SCBL0000001123456702",
-                "Country": "Pakistan",
-                "Jurisdiction": "Faisalabad",
-                "TransactionAmount": 56525.0,
-                "Currency": "PKR",
-                "TransactionDate": "2025-06-03 16:45:00",
-                "TransactionType": "Local Transfer",
-                "Relationship": "Local Supplier",
-                "RiskLevel": "Low",
-                "ScreeningResult": "Verified local business entity"
-            }
-        ],
-        "BranchQueries": {
-            "Requested": "Multiple cash deposits totaling 66,500 PKR made in same day, each below 10,000 PKR threshold. Pattern suggests potential structuring to avoid CTR reporting. Please verify legitimate business purpose and provide sales invoices or receipts.",
-            "Response": "Customer explained these are daily cash collections from retail textile sales at Anarkali Bazaar. Customer provided daily sales register and GST invoices. Stated pattern is normal for cash-based business operations."
-        }
-    }
-]
+# Styles for rendered analysis reports
+st.markdown(f"<style>{REPORT_CSS}</style>", unsafe_allow_html=True)
 
-def call_prediction_api(data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL) -> Dict[str, Any]:
-    """Call the prediction API - handles single alert per request"""
-    url = f"{api_base_url}/api/ai-service/predictalertpriority"
-    results = []
-    errors = []
-    
-    # Process each alert individually since API expects a single object
-    for i, alert_data in enumerate(data):
-        try:
-            response = requests.post(url, json=alert_data, timeout=120)
-            response.raise_for_status()
-            try:
-                result_data = response.json()
-                results.append(result_data)
-            except json.JSONDecodeError:
-                results.append({"raw_response": response.text, "alert_index": i})
-        except requests.exceptions.Timeout:
-            errors.append(f"Alert {i+1} (ID: {alert_data.get('AlertID', 'N/A')}): Request timed out.")
-        except requests.exceptions.RequestException as e:
-            error_msg = str(e)
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    error_detail = e.response.json()
-                    error_msg = f"{error_msg}\nDetails: {json.dumps(error_detail, indent=2)}"
-                except:
-                    error_msg = f"{error_msg}\nResponse: {e.response.text[:500]}"
-            errors.append(f"Alert {i+1} (ID: {alert_data.get('AlertID', 'N/A')}): {error_msg}")
-    
-    if errors and not results:
-        return {"success": False, "error": "\n".join(errors)}
-    elif errors:
-        return {"success": True, "data": results, "errors": errors, "partial": True}
+READINESS_REFRESH_SECONDS = 5
+
+COMPRESSION_OPTIONS = {"Off": None, "gzip": "gzip", **({"zstd": "zstd"} if ZSTD_AVAILABLE else {})}
+
+def get_pool_client(api_base_url: str) -> PooledClient:
+    """Shared pooled client for the base URL using the sidebar connection settings"""
+    return get_http_client(
+        api_base_url,
+        pool_size=st.session_state.get('pool_size', DEFAULT_POOL_SIZE),
+        http2=st.session_state.get('use_http2', False),
+        connect_timeout=st.session_state.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+        compression=COMPRESSION_OPTIONS.get(st.session_state.get('request_compression', "Off"))
+    )
+
+def get_api_client(api_base_url: str) -> Union[PooledClient, ResilientClient]:
+    """get_pool_client wrapped with the sidebar resilience settings"""
+    client = get_pool_client(api_base_url)
+    if not st.session_state.get('resilience_enabled', True):
+        return client
+    return ResilientClient(client, ResiliencePolicy(
+        max_attempts=st.session_state.get('max_attempts', DEFAULT_MAX_ATTEMPTS),
+        hedge=st.session_state.get('hedge_predictions', True),
+        hedge_percentile=st.session_state.get('hedge_percentile', DEFAULT_HEDGE_PERCENTILE)
+    ))
+
+RUN_TIME_HISTORY = 50
+
+def record_run_time(name: str, started: float):
+    """Keep the duration of the latest script or editor runs for the sidebar"""
+    times = st.session_state.setdefault("run_times", {}).setdefault(name, [])
+    times.append(1000 * (time.perf_counter() - started))
+    del times[:-RUN_TIME_HISTORY]
+
+def display_run_times():
+    """Latest and median durations of full script reruns and editor-only reruns"""
+    run_times = st.session_state.get("run_times", {})
+    if not run_times:
+        st.caption("No runs recorded yet.")
+        return
+    labels = {"script": "Full rerun", "prediction_editor": "Prediction table", "analysis_editor": "Analysis table"}
+    for name, times in run_times.items():
+        summary = summarize_latencies(times)
+        st.caption(f"{labels.get(name, name)}: last {times[-1]:.0f} ms · p50 {summary['p50']:.0f} ms "
+                   f"({summary['count']} runs)")
+
+def editor_column_config(kind: str) -> Dict[str, Any]:
+    config = {}
+    for name, label, field_kind, _ in EDITOR_FIELDS[kind]:
+        if field_kind == "int":
+            config[name] = st.column_config.NumberColumn(label, step=1, format="%d")
+        elif field_kind == "float":
+            config[name] = st.column_config.NumberColumn(label)
+        elif field_kind == "choice":
+            config[name] = st.column_config.SelectboxColumn(label, options=RISK_LEVELS)
+        else:
+            config[name] = st.column_config.TextColumn(label, help="JSON" if field_kind == "json" else None)
+    return config
+
+def reset_alert_table(key_prefix: str):
+    """Drop the table editor state so it is rebuilt from the session's alert data"""
+    for suffix in ("table_base", "table", "table_edited"):
+        st.session_state.pop(f"{key_prefix}_{suffix}", None)
+
+@st.fragment
+def alert_table_editor(kind: str, key_prefix: str, alerts: List[Dict[str, Any]]):
+    """All alerts in one data editor; edits rerun only this fragment, not the whole script"""
+    started = time.perf_counter()
+    base_key = f"{key_prefix}_table_base"
+    if base_key not in st.session_state:
+        st.session_state[base_key] = alerts_to_frame(alerts, EDITOR_FIELDS[kind])
+    st.session_state[f"{key_prefix}_table_edited"] = st.data_editor(
+        st.session_state[base_key],
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        column_config=editor_column_config(kind),
+        key=f"{key_prefix}_table"
+    )
+    record_run_time(f"{kind}_editor", started)
+
+def edited_table_alerts(kind: str, key_prefix: str) -> List[Dict[str, Any]]:
+    return frame_to_alerts(st.session_state[f"{key_prefix}_table_edited"], EDITOR_FIELDS[kind])
+
+def check_json_fields(alerts: List[Dict[str, Any]], kind: str) -> bool:
+    """Validate the JSON-string fields before sending; shows the errors and returns False if any"""
+    report = validate_alerts(alerts, kind)
+    if not report:
+        return True
+    st.error(f"❌ {len(report)} alert(s) have invalid JSON fields. Nothing was sent; fix these first:")
+    for message in format_validation_errors(report, alerts):
+        st.markdown(f"- {message}")
+    return False
+
+def get_cache() -> Optional[ResponseCache]:
+    """Shared response cache, or None if caching is disabled for this session"""
+    if not st.session_state.get('cache_enabled', True):
+        return None
+    return get_response_cache()
+
+def get_store() -> Optional[ResultStore]:
+    """Shared result store, or None if it is turned off in the sidebar"""
+    if not st.session_state.get('store_enabled', True):
+        return None
+    return get_result_store(DEFAULT_STORE_PATH)
+
+def session_texts() -> SessionTexts:
+    """This session's compressed text store, with the budget set in the sidebar"""
+    session_id = st.session_state.setdefault('session_memory_id', uuid.uuid4().hex[:8])
+    budget_mb = st.session_state.get('session_budget_mb', DEFAULT_BUDGET_MB)
+    return session_memory().texts(session_id, budget_mb * 2**20)
+
+def keep_analysis_result(result: Optional[Dict[str, Any]]):
+    """Make result this session's analysis result, its long texts compacted unless turned off in the sidebar.
+
+    The texts of the result it replaces are released; None clears the result.
+    """
+    previous = st.session_state.pop('analysis_result', None)
+    if result is not None:
+        if st.session_state.get('session_compact', True):
+            result = compact_analysis_result(result, session_texts())
+        st.session_state.analysis_result = result
+    session_texts().release(text_refs(previous))
+
+def display_session_memory():
+    """Bytes held by this session's state and texts, and the latest figures of every session"""
+    session_id = st.session_state.setdefault('session_memory_id', uuid.uuid4().hex[:8])
+    sizes = state_sizes({key: st.session_state[key] for key in st.session_state.keys()})
+    state_bytes = sum(row['bytes'] for row in sizes)
+    session_memory().report(session_id, state_bytes)
+    stats = session_texts().stats()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Session State", format_bytes(state_bytes))
+        st.metric("Text in Memory", format_bytes(stats['memory_bytes']),
+                  help="Compressed report, thinking and transaction text kept in memory for this session.")
+    with col2:
+        st.metric("Texts Compacted", stats['texts'],
+                  help=f"{stats['chars']:,} characters in all; {stats['loads']} loaded back for display.")
+        st.metric("Spilled to Disk", format_bytes(stats['disk_bytes']),
+                  help=f"At most {format_bytes(stats['disk_budget_bytes'])}; {stats['dropped']} least recently "
+                       "used texts dropped to stay within it.")
+    st.caption("Largest keys in this session's state:")
+    st.dataframe(pd.DataFrame(sizes[:8]), hide_index=True, use_container_width=True)
+    sessions = session_memory().sessions()
+    total_bytes = sum(row['state_bytes'] + row['text_memory_bytes'] for row in sessions)
+    st.caption(f"All sessions ({len(sessions)} seen in the last day): {format_bytes(total_bytes)} "
+               f"in state and compressed text, "
+               f"peak {format_bytes(max(row['peak_bytes'] for row in sessions))} per session. "
+               "Objects shared between sessions (e.g. the example data) are counted in each.")
+
+def display_store_stats():
+    """Show result store size and reuse"""
+    stats = get_result_store(DEFAULT_STORE_PATH).stats()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Predictions", f"{stats['predictions']:,}")
+        st.metric("Reused", stats['hits'])
+    with col2:
+        st.metric("Analyses", f"{stats['analyses']:,}")
+        st.metric("Saved", stats['writes'])
+    st.caption(f"Results older than {stats['max_age_s'] / 86400:g} days are sent again instead of reused"
+               + (f" ({stats['expired']} so far)." if stats['expired'] else "."))
+    if stats['errors']:
+        st.caption(f"⚠️ {stats['errors']} database errors (those alerts were sent to the API as usual)")
+
+def display_cache_stats():
+    """Show response cache effectiveness"""
+    stats = response_cache_stats()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Hits", stats['hits'] + stats['disk_hits'])
+        st.metric("Misses", stats['misses'])
+    with col2:
+        st.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+        st.metric("Entries", stats['entries'])
+    if stats['disk_hits']:
+        st.caption(f"{stats['disk_hits']} hits served from disk, {stats['evictions']} evictions")
+
+def display_single_flight_stats():
+    """Show upstream calls saved by joining identical requests in flight"""
+    stats = single_flight().stats()
+    saved = sum(counts['saved'] for counts in stats.values())
+    calls = sum(counts['calls'] for counts in stats.values())
+    st.metric("Calls Saved (In-Flight Sharing)", saved,
+              help="Identical requests sent while the same one was still running (from any session) "
+                   "waited for it instead of calling the service again.")
+    if saved:
+        st.caption(", ".join(f"{endpoint}: {counts['saved']} of {counts['calls'] + counts['saved']} calls "
+                             f"({counts['alerts_saved']} alerts)" for endpoint, counts in stats.items()
+                             if counts['saved']) + f" · {calls} sent")
+
+def display_pool_stats():
+    """Show connection reuse statistics for the pooled HTTP clients"""
+    stats = pool_stats()
+    if not stats:
+        st.caption("No API requests made yet.")
+        return
+    for pool in stats:
+        st.caption(f"{pool['base_url']} ({'HTTP/2' if pool['http2'] else 'HTTP/1.1'}, pool size {pool['pool_size']}, "
+                   f"connect timeout {pool['connect_timeout']:g}s, compression {pool['compression'] or 'off'})")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Requests", pool['requests'])
+            st.metric("New Connections", pool['new_connections'])
+            st.metric("Avg Pool Wait", f"{pool['avg_wait_ms']:.1f} ms")
+        with col2:
+            st.metric("Reused", f"{pool['reused_connections']} ({pool['hit_rate']:.0%})")
+            st.metric("TLS Handshakes", pool['tls_handshakes'])
+            st.metric("Max Pool Wait", f"{pool['max_wait_ms']:.1f} ms")
+        if pool['bytes_raw']:
+            st.caption(f"Request bodies: {pool['bytes_sent'] / 1024:,.1f} KB sent for {pool['bytes_raw'] / 1024:,.1f} KB "
+                       f"of JSON ({pool['compression_ratio']:.0%}); next requests use {pool['request_encoding']}")
+            recent = pool['recent_requests']
+            if recent:
+                st.dataframe(pd.DataFrame(recent[-10:][::-1]), hide_index=True, use_container_width=True)
+
+@st.fragment(run_every=READINESS_REFRESH_SECONDS)
+def display_readiness(api_base_url: str):
+    """Warm-up state of the base URL, refreshed on its own while the rest of the page stays put"""
+    status = warmup_status(api_base_url)
+    if status is None:
+        st.caption("⚪ Not probed yet")
+        return
+    last = status['last_probe']
+    if status['state'] == WARMING:
+        in_flight = status['probe_in_flight_s'] or 0
+        st.caption(f"🟡 Warming up… first probe running for {in_flight:.0f}s")
+    elif status['state'] == READY:
+        st.caption(f"🟢 Ready · last probe {last['latency_ms']:,.0f} ms")
     else:
-        # Combine all results into a single response format
-        combined_data = []
-        for result in results:
-            if isinstance(result, dict) and "data" in result:
-                combined_data.extend(result["data"] if isinstance(result["data"], list) else [result["data"]])
+        reason = last['error'] or f"HTTP {last['status']}"
+        st.caption(f"🔴 Unreachable · {reason}")
+    measured = []
+    if status['warm_p50_ms'] is not None:
+        measured.append(f"warm p50 {status['warm_p50_ms']:,.0f} ms")
+    if status['cold_ms'] is not None:
+        measured.append(f"cold start {status['cold_ms'] / 1000:,.1f} s")
+    if measured:
+        st.caption(" · ".join(measured) + f" ({status['probes']} probes)")
+
+DASHBOARD_WINDOWS = {"Last 15 minutes": 15 * 60, "Last hour": 3600, "Last 24 hours": 24 * 3600, "All": None}
+
+@st.fragment
+def performance_dashboard():
+    """Percentiles, histograms, error rates and cache hits from the call history; filters rerun only this"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        window = st.selectbox("Time Window", list(DASHBOARD_WINDOWS), index=3, key="dash_window")
+    with col2:
+        group_label = st.selectbox("Break Down By", list(GROUP_COLUMNS), key="dash_group")
+    with col3:
+        endpoints = st.multiselect("Endpoints", ["predict", "analysis"], default=["predict", "analysis"],
+                                   key="dash_endpoints")
+    seconds = DASHBOARD_WINDOWS[window]
+    frame = history_frame(since=time.time() - seconds if seconds else None)
+    frame = frame[frame["endpoint"].isin(endpoints)]
+    if frame.empty:
+        st.info("No calls recorded yet. Results from the other tabs (and the response cache) appear here.")
+        return
+    by = GROUP_COLUMNS[group_label]
+
+    totals = overview(frame)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Alerts", f"{totals['alerts']:,}")
+    with col2:
+        rate = totals['alerts_per_min']
+        st.metric("Throughput", f"{rate:,.1f}/min" if rate is not None else "n/a")
+    with col3:
+        st.metric("p50 / p95", f"{totals['latency_ms']['p50'] / 1000:,.2f} / {totals['latency_ms']['p95'] / 1000:,.2f} s")
+    with col4:
+        st.metric("Error Rate", f"{totals['error_rate']:.1%}")
+    with col5:
+        st.metric("Cache Hit Rate", f"{totals['cache_hit_rate']:.0%}")
+
+    st.subheader(f"Latency by {group_label}")
+    st.caption("Client latency of alerts sent to the service (cache hits excluded); analysis alerts sent "
+               "together share their request's latency.")
+    st.dataframe(latency_table(frame, by), hide_index=True, use_container_width=True,
+                 column_config={"error %": st.column_config.NumberColumn(format="%.1f"),
+                                **{c: st.column_config.NumberColumn(format="%.0f")
+                                   for c in ("p50 ms", "p95 ms", "p99 ms", "max ms", "server p50 ms")}})
+    histogram = latency_histogram(frame, by)
+    if not histogram.empty:
+        # Explicit sort keeps the bins in latency order rather than alphabetical
+        st.altair_chart(alt.Chart(histogram).mark_bar().encode(
+            x=alt.X("latency up to:N", sort=list(dict.fromkeys(histogram["latency up to"])), title="Latency up to"),
+            y=alt.Y("alerts:Q", title="Alerts"),
+            color=alt.Color(f"{by}:N", title=group_label),
+            tooltip=["latency up to", by, "alerts"]
+        ), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Alerts per Minute")
+        st.line_chart(throughput(frame, by))
+    with col2:
+        st.subheader("Errors")
+        errors = error_breakdown(frame)
+        if errors.empty:
+            st.caption("No errors in this window.")
+        else:
+            st.dataframe(errors, hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("⬇️ Download History (CSV)", frame.drop(columns=["timestamp"]).to_csv(index=False),
+                           file_name="aml_call_history.csv", mime="text/csv", key="dash_download")
+    with col2:
+        if st.button("🧹 Clear History", key="dash_clear"):
+            call_history().clear()
+            st.rerun()
+
+HISTORY_ENDPOINTS = {"All": None, "Predictions": "predict", "Analyses": "analysis"}
+HISTORY_LABELS = {"stored_at": "Stored", "endpoint": "Endpoint", "alert_id": "AlertID",
+                  "focus_column_value": "FocusColumnValue", "customer_id": "CUSTOMERID", "prediction": "Prediction",
+                  "model": "Model", "method": "Method", "llm": "LLM"}
+
+@st.fragment
+def result_history():
+    """Search and page the result store by customer, alert or focus value; paging reruns only this"""
+    store = get_store()
+    if store is None:
+        st.info("The result store is turned off (sidebar: 🗃️ Result Store).")
+        return
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        customer_id = st.text_input("CUSTOMERID", key="history_customer_id")
+    with col2:
+        alert_id = st.text_input("Alert ID", key="history_alert_id")
+    with col3:
+        focus_value = st.text_input("Focus Column Value", key="history_focus_value")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        endpoint = HISTORY_ENDPOINTS[st.selectbox("Results", list(HISTORY_ENDPOINTS), key="history_endpoint")]
+    with col2:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                 key="history_page_size")
+
+    total = store.count(customer_id, alert_id, focus_value, endpoint)
+    pages = page_count(total, page_size)
+    if st.session_state.get("history_page", 1) > pages:
+        st.session_state.history_page = pages
+    with col3:
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1,
+                                      key="history_page")
+    if not total:
+        st.info("No stored results match. Results appear here once they have been received from the API.")
+        return
+    rows = store.search(customer_id, alert_id, focus_value, endpoint, page=page_number, page_size=page_size)
+    frame = pd.DataFrame(rows)
+    frame["stored_at"] = pd.to_datetime(frame["stored_at"], unit="s").dt.strftime("%Y-%m-%d %H:%M:%S")
+
+    st.caption(f"{total:,} stored result(s), newest first · select a row to view it")
+    event = st.dataframe(frame.drop(columns=["id"]).rename(columns=HISTORY_LABELS), hide_index=True,
+                         use_container_width=True, on_select="rerun", selection_mode="single-row",
+                         key="history_grid")
+    selected = event.selection.rows if event is not None else []
+    if len(rows) == 1:
+        selected = [0]
+    if not selected or selected[0] >= len(rows):
+        return
+    record = store.load(rows[selected[0]]["id"])
+    if record is None:
+        return
+    with st.container(border=True):
+        stored = f"Stored {frame['stored_at'].iloc[selected[0]]}"
+        st.caption(f"{stored} · {record['llm']}" if record['llm'] else stored)
+        if record["endpoint"] == "analysis":
+            display_single_analysis(record["result"], key_prefix="history_")
+        else:
+            predictions = extract_predictions(record["result"])
+            if predictions and isinstance(predictions[0], dict):
+                display_prediction_details(predictions[0], record["result"])
             else:
-                combined_data.append(result)
-        
-        return {"success": True, "data": {"status": 200, "message": "Success", "data": combined_data}}
+                st.json(record["result"])
+
+def display_resilience_stats():
+    """Show breaker state and retry/hedge counters per base URL"""
+    stats = resilience_stats()
+    if not stats:
+        st.caption("No API requests made yet.")
+        return
+    icons = {"closed": "🟢", "half-open": "🟡", "open": "🔴"}
+    for base_url, state in stats.items():
+        status = f"{icons[state['state']]} Circuit {state['state']}"
+        if state['state'] == "open":
+            status += f" · probe in {state['retry_in_s']:.0f}s"
+        st.caption(f"{base_url}: {status}")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Retries", state['retries'])
+            st.metric("Hedged", f"{state['hedges']} ({state['hedge_wins']} won)")
+        with col2:
+            st.metric("Failed Fast", state['fast_failures'])
+            st.metric("Breaker Trips", state['opens'])
+        if state['state'] != "closed" and st.button("🔄 Reset Circuit", key=f"reset_circuit_{base_url}"):
+            reset_circuit(base_url)
+            st.rerun()
 
-def call_analysis_api(data: List[Dict[str, Any]], api_base_url: str = DEFAULT_API_BASE_URL, 
-                       cloud: bool = False, llm_on_server: bool = False, 
-                       url: str = "", anonymous: bool = False,
-                       audit: bool = False, evaluation: bool = False) -> Dict[str, Any]:
-    """Call the analysis API with flags"""
+def process_uploaded_alerts(uploaded_file, kind: str, chunk_size: int,
+                            call_chunk: Callable[[List[Dict[str, Any]]], Dict[str, Any]],
+                            min_score: float = 0) -> Tuple[List[Dict[str, Any]], IngestSummary]:
+    """Stream an uploaded alert file through call_chunk one validated chunk at a time.
+
+    With min_score, alerts scoring lower in the local pre-screen are counted but not sent.
+    """
+    summary = IngestSummary()
+    results = []
+    status = st.empty()
     try:
-        # Add flags to each alert data object
-        data_with_flags = []
-        for alert in data:
-            alert_copy = alert.copy()
-            alert_copy['Cloud'] = cloud
-            alert_copy['llm_on_server'] = llm_on_server
-            alert_copy['url'] = url
-            alert_copy['anonymous'] = anonymous
-            alert_copy['audit'] = audit
-            alert_copy['evaluation'] = evaluation
-            data_with_flags.append(alert_copy)
-        
-        api_url = f"{api_base_url}/api/ai-service/generateamlanalysis"
-        response = requests.post(api_url, json=data_with_flags, timeout=300)
-        response.raise_for_status()
-        try:
-            result_data = response.json()
-        except json.JSONDecodeError:
-            result_data = {"raw_response": response.text}
-        return {"success": True, "data": result_data}
-    except requests.exceptions.Timeout:
-        return {"success": False, "error": "Request timed out. The analysis may take longer. Please try again."}
-    except requests.exceptions.RequestException as e:
-        error_msg = str(e)
-        if hasattr(e, 'response') and e.response is not None:
-            try:
-                error_detail = e.response.json()
-                error_msg = f"{error_msg}\nDetails: {json.dumps(error_detail, indent=2)}"
-            except:
-                error_msg = f"{error_msg}\nResponse: {e.response.text[:500]}"
-        return {"success": False, "error": error_msg}
+        for alerts in iter_alert_batches(uploaded_file, kind, uploaded_file.name, chunk_size, summary):
+            status.info(f"⏳ Processing alerts {summary.accepted - len(alerts) + 1}-{summary.accepted} "
+                        f"({summary.rejected} rows rejected so far)...")
+            if min_score > 0:
+                selected = select_alerts(alerts, prescreen_alerts(alerts, kind), min_score)
+                summary.screened_out += len(alerts) - len(selected)
+                alerts = selected
+            if alerts:
+                results.append(call_chunk(alerts))
+    except ValueError as e:
+        st.error(f"❌ Could not read {uploaded_file.name}: {e}")
+    status.empty()
+    return results, summary
+
+def display_ingest_summary(summary: IngestSummary):
+    """Show how many uploaded rows were accepted and why the others were rejected"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Rows Read", summary.rows_read)
+    with col2:
+        st.metric("Accepted", summary.accepted)
+    with col3:
+        st.metric("Rejected", summary.rejected)
+    if summary.screened_out:
+        st.caption(f"🔎 {summary.screened_out} accepted alerts scored below the pre-screen minimum "
+                   "and were not sent.")
+    if summary.rejected:
+        with st.expander("🚫 Rejected Rows", expanded=False):
+            st.dataframe(pd.DataFrame(list(summary.reasons.items()), columns=["Reason", "Rows"]), hide_index=True)
+            st.caption(f"First {len(summary.rejected_samples)} rejected rows (row numbers exclude the header):")
+            st.dataframe(pd.DataFrame(summary.rejected_samples), hide_index=True)
+
+def bulk_upload_section(kind: str, key_prefix: str) -> Tuple[Any, int, int, bool]:
+    """File uploader, chunk size, pre-screen minimum and run button for bulk alert ingestion"""
+    with st.expander("📂 Bulk Upload (CSV / JSONL / Parquet)", expanded=False):
+        example_shape = "PREDICTION_EXAMPLE" if kind == "prediction" else "ANALYSIS_EXAMPLE"
+        st.caption(f"One alert per row, with the same fields as {example_shape}. "
+                   "Nested fields may be JSON strings or (JSONL/Parquet) objects.")
+        uploaded_file = st.file_uploader("Alerts File", type=["csv", "jsonl", "ndjson", "parquet"],
+                                         key=f"{key_prefix}_upload")
+        chunk_size = st.number_input("Alerts per Chunk", min_value=1, max_value=10000, value=DEFAULT_CHUNK_SIZE,
+                                     help="Rows read, validated and sent per step; bounds memory use.",
+                                     key=f"{key_prefix}_chunk_size")
+        min_score = st.slider("Send Only Alerts Pre-screened at Least", min_value=0, max_value=100, value=0,
+                              help="Alerts whose local pre-screen score is lower are not sent. 0 sends all.",
+                              key=f"{key_prefix}_bulk_min_score")
+        run = st.button("🚀 Process File", key=f"{key_prefix}_process_file", disabled=uploaded_file is None)
+        if f"{key_prefix}_ingest_summary" in st.session_state:
+            display_ingest_summary(st.session_state[f"{key_prefix}_ingest_summary"])
+    return uploaded_file, chunk_size, min_score, run
+
+PRESCREEN_LEVEL_ICONS = {"High": "🔴", "Medium": "🟡", "Low": "🟢"}
+
+def prescreen_section(alerts: List[Dict[str, Any]], kind: str, key_prefix: str) -> List[Dict[str, Any]]:
+    """Instant local scores for the entered alerts; returns the alerts to send (those at or above the minimum)"""
+    with st.expander("🔎 Local Pre-screen", expanded=False):
+        st.caption("A provisional score computed in the app from the transactions and KYC fields (turnover vs. "
+                   "income, counts vs. KYC, structuring, foreign counterparties, STR history). It is not the "
+                   "model's prediction, but helps decide which alerts are worth the API call.")
+        min_score = st.slider("Send Only Alerts Scoring at Least", min_value=0, max_value=100, value=0,
+                              help="Alerts scoring lower are left out when you send. 0 sends all.",
+                              key=f"{key_prefix}_min_score")
+        started = time.perf_counter()
+        screened = prescreen_alerts(alerts, kind)
+        elapsed_ms = 1000 * (time.perf_counter() - started)
+        shown = screened.drop(columns=["FocusColumnValue"])
+        shown["level"] = [f"{PRESCREEN_LEVEL_ICONS.get(level, '⚪')} {level}" for level in shown["level"]]
+        st.dataframe(shown, hide_index=True, use_container_width=True, column_config={
+            "score": st.column_config.ProgressColumn("Score", min_value=0, max_value=100, format="%.0f"),
+            "total_amount": st.column_config.NumberColumn("Total Amount", format="%.0f"),
+            "income_ratio": st.column_config.NumberColumn("× Income", format="%.1f"),
+        })
+        selected = select_alerts(alerts, screened, min_score)
+        st.caption(f"{len(alerts)} alerts screened in {elapsed_ms:.0f} ms · {len(selected)} will be sent")
+    if len(selected) < len(alerts):
+        st.caption(f"🔎 {len(alerts) - len(selected)} of {len(alerts)} alerts score below {min_score} in the "
+                   "local pre-screen and will not be sent.")
+    return selected
+
+def iter_analysis_groups(alerts: List[Dict[str, Any]], api_url: str, adaptive: bool, group_size: int,
+                         **kwargs) -> Iterator[Tuple[List[int], Dict[str, Any]]]:
+    """Fixed-size groups, or adaptive batches whose plan is kept for display_batch_plan"""
+    if not adaptive:
+        st.session_state.pop('analysis_batch_plan', None)
+        yield from iter_analysis_results(alerts, api_url, group_size=group_size, **kwargs)
+        return
+    plan: Dict[str, Any] = {}
+    st.session_state.analysis_batch_plan = plan
+    yield from iter_scheduled_analysis(alerts, api_url, plan=plan, **kwargs)
+
+JOB_POLL_SECONDS = 2
+JOB_ICONS = {QUEUED: "⏳", RUNNING: "🔄", DONE: "✅", FAILED: "❌", CANCELLED: "🚫"}
+
+def submit_analysis_job(alerts: List[Dict[str, Any]], api_url: str, adaptive: bool, group_size: int,
+                        **flags) -> AnalysisJob:
+    """Queue the alerts as a background job owned by this session"""
+    config = config_key(flags['cloud'], flags['llm_on_server'], flags['audit'], flags['evaluation'])
+    job = job_manager().submit(
+        alerts,
+        api_url,
+        adaptive=adaptive,
+        group_size=group_size,
+        description=f"{len(alerts)} alert(s), {config}{', adaptive' if adaptive else ''}",
+        max_concurrency=st.session_state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+        client=get_api_client(api_url),
+        cache=get_cache(),
+        store=get_store(),
+        **flags
+    )
+    st.session_state.setdefault('analysis_jobs', []).append(job.id)
+    return job
+
+def show_job_result(job: AnalysisJob):
+    """Make a finished job's reports (and batch plan) the analysis result of this session"""
+    keep_analysis_result(job.result or {"success": False, "error": job.error or "No results"})
+    st.session_state.analysis_result_job = job.id
+    if job.plan:
+        st.session_state.analysis_batch_plan = job.plan
+    else:
+        st.session_state.pop('analysis_batch_plan', None)
+
+def analysis_jobs_panel():
+    """This session's background jobs; polls on its own while any of them is still running"""
+    jobs = job_manager().jobs(st.session_state.get('analysis_jobs', []))
+    if not jobs:
+        return
+    active = any(job.active for job in jobs)
+    st.fragment(display_analysis_jobs, run_every=JOB_POLL_SECONDS if active else None)()
+
+def display_analysis_jobs():
+    jobs = job_manager().jobs(st.session_state.get('analysis_jobs', []))
+    attached = st.session_state.setdefault('attached_jobs', set())
+    newly_finished = [job for job in jobs if not job.active and job.id not in attached]
+    if newly_finished:
+        # Results attach to the session as jobs finish; the latest one is displayed (cancelled ones on request)
+        attached.update(job.id for job in newly_finished)
+        completed = [job for job in newly_finished if job.status != CANCELLED]
+        if completed:
+            show_job_result(max(completed, key=lambda job: job.finished))
+            st.rerun()
+
+    st.subheader("🗂️ Background Jobs")
+    for job in reversed(jobs):
+        info = job.snapshot()
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            label = (f"{JOB_ICONS[info['status']]} Job {info['id']} · {info['description']} · {info['status']} "
+                     f"· {info['done']}/{info['alerts']} reports")
+            if info['status'] == QUEUED:
+                label += f" · waiting {info['queued_s']:.0f}s for a worker"
+            else:
+                label += f" · {info['elapsed_s']:.0f}s"
+            st.progress(info['done'] / info['alerts'] if info['alerts'] else 1.0, text=label)
+            if info['error']:
+                st.caption(f"❌ {info['error']}")
+        with col2:
+            if job.active:
+                if st.button("🛑 Cancel", key=f"cancel_job_{job.id}"):
+                    job_manager().cancel(job.id)
+                    st.rerun()
+            elif job.result is not None and st.session_state.get('analysis_result_job') != job.id:
+                if st.button("📄 Show", key=f"show_job_{job.id}"):
+                    show_job_result(job)
+                    st.rerun()
+            elif st.session_state.get('analysis_result_job') == job.id:
+                st.caption("Shown below")
+
+def display_batch_plan(plan: Dict[str, Any]):
+    """How the last adaptive run was split into batches, and how long each took"""
+    with st.expander(f"🧮 Batching Decisions ({plan['batch_count']} batches)", expanded=False):
+        samples = plan['estimate_samples']
+        source = f"p90 of {samples} recent observations" if samples else "default estimate, nothing observed yet"
+        st.caption(f"Configuration {plan['config']}: {plan['seconds_per_alert']:.1f} s per alert ({source}). "
+                   f"Up to {plan['alerts_per_batch']} alerts per batch (limited by {plan['limited_by']}; "
+                   f"timeout {plan['read_timeout_s']:.0f} s, max {plan['max_bytes'] // 1024} KB), "
+                   f"{plan['concurrency']} in parallel.")
+        if plan['batches']:
+            st.dataframe(pd.DataFrame(plan['batches']).sort_values("batch"), hide_index=True,
+                         use_container_width=True)
+
+TIMING_LABELS = {"queue_ms": "Pool queue", "connect_ms": "Connect (DNS + TCP)", "tls_ms": "TLS",
+                 "send_ms": "Send", "ttfb_ms": "Wait for first byte", "first_token_ms": "First token (streamed)",
+                 "download_ms": "Download",
+                 "decode_ms": "JSON decode", "render_ms": "Render", "total_ms": "Total"}
+
+def text_length(value: Any) -> int:
+    return value.chars if isinstance(value, TextRef) else len(str(value))
+
+def display_client_timing(item: Dict[str, Any], render_ms: Optional[float] = None):
+    """Client-side phases of the request that produced item, next to the server's own time"""
+    timing = dict(item.get('client_timing') or {})
+    if render_ms is not None:
+        timing['render_ms'] = render_ms
+    if not item.get('client_timing'):
+        st.caption("⏱️ No client timing: this result was served from the response cache or result store.")
+        if not timing:
+            return
+    rows = [{"Phase": label, "ms": timing[name]} for name, label in TIMING_LABELS.items() if name in timing]
+    st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+    notes = []
+    if timing.get('streamed'):
+        notes.append("streamed as Server-Sent Events")
+    if timing.get('shared'):
+        notes.append("shared an identical request already in flight (its timing is shown)")
+    if timing.get('new_connection'):
+        notes.append("opened a new connection")
+    if timing.get('alerts', 1) > 1:
+        notes.append(f"one request for {timing['alerts']} alerts")
+    server_ms = item.get('response_time_ms')
+    if server_ms is not None and 'ttfb_ms' in timing and timing.get('alerts', 1) == 1 and not timing.get('streamed'):
+        notes.append(f"network and service queueing ≈ {max(0.0, timing['ttfb_ms'] - server_ms):,.0f} ms "
+                     f"(first byte minus server time)")
+    if notes:
+        st.caption("⏱️ " + "; ".join(notes))
+
+def display_prediction_details(pred: Dict[str, Any], data: Any):
+    """Metrics for one prediction (drawn only for the row selected in the grid)"""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Alert ID", pred.get('AlertID', 'N/A'))
+        st.metric("Focus Column", pred.get('FocusColumnValue', 'N/A'))
+    with col2:
+        prediction = pred.get('Prediction', 'N/A')
+        st.metric("Prediction", f"{PREDICTION_ICONS.get(prediction, '⚪')} {prediction}")
+        st.metric("Scenario", pred.get('STRScenario', pred.get('ScenarioName', 'N/A')))
+    with col3:
+        if isinstance(data, dict):
+            st.metric("Status", data.get('status', 'N/A'))
+            st.metric("Message", data.get('message', 'Success'))
+        else:
+            st.metric("Status", "Success")
+            st.metric("Message", "Processed")
+    display_client_timing(pred)
+
+def display_prediction_grid(result: Dict[str, Any], predictions: List[Any], data: Any):
+    """Filterable, sortable, paginated table of predictions; details for the selected row only"""
+    # The frame is built once per result and reused by every rerun
+    cached = st.session_state.get("pred_grid_frame")
+    if cached is None or cached[0] is not result:
+        cached = (result, predictions_frame(predictions))
+        st.session_state.pred_grid_frame = cached
+    frame = cached[1]
+    options = filter_options(frame)
+
+    col1, col2, col3 = st.columns([2, 3, 2])
+    with col1:
+        selected_predictions = st.multiselect("Prediction", options["Prediction"], key="pred_grid_prediction")
+    with col2:
+        selected_scenarios = st.multiselect("Scenario", options["STRScenario"], key="pred_grid_scenario")
+    with col3:
+        alert_id = st.text_input("Alert ID contains", key="pred_grid_alert_id")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_by = st.selectbox("Sort by", SORT_COLUMNS, key="pred_grid_sort")
+    with col2:
+        descending = st.toggle("Descending", key="pred_grid_descending")
+    with col3:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+                                 key="pred_grid_page_size")
+
+    matches = query_predictions(frame, selected_predictions, selected_scenarios, alert_id,
+                                sort_by=sort_by, ascending=not descending)
+    pages = page_count(len(matches), page_size)
+    if st.session_state.get("pred_grid_page", 1) > pages:
+        st.session_state.pred_grid_page = pages
+    with col4:
+        page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1,
+                                      key="pred_grid_page")
+    page, _ = page_slice(matches, page_number, page_size)
+
+    st.caption(f"{len(matches)} of {len(frame)} predictions · select a row for details")
+    event = st.dataframe(display_frame(page), hide_index=True, use_container_width=True,
+                         on_select="rerun", selection_mode="single-row", key="pred_grid")
+    rows = event.selection.rows if event is not None else []
+    if len(page) == 1:
+        rows = [0]
+    if rows and rows[0] < len(page):
+        pred = predictions[int(page["_pos"].iloc[rows[0]])]
+        with st.container(border=True):
+            st.markdown(f"**Alert ID: {pred.get('AlertID', 'N/A')} - "
+                        f"{pred.get('STRScenario', pred.get('ScenarioName', 'Unknown'))}**")
+            display_prediction_details(pred, data)
 
 def display_prediction_result(result: Dict[str, Any]):
     """Display prediction results in a beautiful format"""
@@ -324,214 +815,141 @@ def display_prediction_result(result: Dict[str, Any]):
                 st.error(error)
         
         # Extract predictions from response
-        if isinstance(data, dict) and "data" in data:
-            predictions = data["data"] if isinstance(data["data"], list) else [data["data"]]
-        elif isinstance(data, list):
-            # Handle list of response objects
-            all_predictions = []
-            for item in data:
-                if isinstance(item, dict) and "data" in item:
-                    preds = item["data"] if isinstance(item["data"], list) else [item["data"]]
-                    all_predictions.extend(preds)
-                else:
-                    all_predictions.append(item)
-            predictions = all_predictions
-        else:
-            predictions = [data]
+        predictions = extract_predictions(data)
         
         st.success("✅ Prediction completed successfully!")
-        
-        for pred in predictions:
-            if isinstance(pred, dict):
-                with st.expander(f"Alert ID: {pred.get('AlertID', 'N/A')} - {pred.get('STRScenario', pred.get('ScenarioName', 'Unknown'))}", expanded=True):
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.metric("Alert ID", pred.get('AlertID', 'N/A'))
-                        st.metric("Focus Column", pred.get('FocusColumnValue', 'N/A'))
-                    with col2:
-                        prediction = pred.get('Prediction', 'N/A')
-                        risk_color = {
-                            'High': '🔴',
-                            'Medium': '🟡',
-                            'Low': '🟢'
-                        }.get(prediction, '⚪')
-                        st.metric("Prediction", f"{risk_color} {prediction}")
-                        st.metric("Scenario", pred.get('STRScenario', pred.get('ScenarioName', 'N/A')))
-                    with col3:
-                        if isinstance(data, dict):
-                            st.metric("Status", data.get('status', 'N/A'))
-                            st.metric("Message", data.get('message', 'Success'))
-                        else:
-                            st.metric("Status", "Success")
-                            st.metric("Message", "Processed")
+        display_prediction_grid(result, predictions, data)
     else:
         st.error(f"❌ Error: {result.get('error', 'Unknown error')}")
 
+# Results with more reports than this show each report only when it is opened
+EAGER_REPORTS = 3
+
+def display_single_analysis(analysis: Dict[str, Any], key_prefix: str = "", lazy: bool = False):
+    """Display one alert's analysis report, thinking text and metadata.
+
+    Thinking text (and with lazy, the report) is loaded and sent to the browser only once its toggle is on.
+    """
+    alert_id = analysis.get('AlertID', analysis.get('Alert ID', 'N/A'))
+    customer_name = analysis.get('CustomerName', analysis.get('Customer Name', 'N/A'))
+    
+    # Show basic info in header
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.subheader(f"📊 Analysis Report - Alert ID: {alert_id}")
+    with col2:
+        if customer_name and customer_name != 'N/A':
+            st.caption(f"Customer: {customer_name}")
+    
+    # Display thinking separately if present (from audit mode)
+    thinking_text = analysis.get('thinking')
+    if thinking_text and st.toggle(f"🧠 Show Thinking Process ({text_length(thinking_text):,} characters)",
+                                   key=f"{key_prefix}show_thinking_{alert_id}"):
+        st.markdown("---")
+        st.subheader("🧠 Thinking Process (Audit Mode)")
+        st.caption("This section shows the model's reasoning process when Audit Mode is enabled.")
+        
+        # Display thinking in a separate styled text area
+        st.text_area(
+            "Model Reasoning",
+            value=str(text_of(thinking_text)),
+            height=400,
+            disabled=True,
+            label_visibility="visible",
+            key=f"{key_prefix}thinking_{alert_id}",
+            help="This is the model's internal reasoning process. Scroll to view the full thinking."
+        )
+    
+    # Display the analysis text
+    analysis_text = analysis.get('analysis', analysis.get('Analysis', analysis.get('AnalysisReport', '')))
+    
+    if analysis_text and lazy and not st.toggle(
+            f"📊 Show Analysis Report ({text_length(analysis_text):,} characters)",
+            key=f"{key_prefix}show_report_{alert_id}"):
+        render_ms = None
+    elif analysis_text:
+        st.markdown("---")
+        st.subheader("📊 Analysis Report")
+        
+        # Formatting is memoized on the report text, so reruns reuse the HTML
+        render_started = time.perf_counter()
+        st.markdown(render_report_html(text_of(analysis_text)), unsafe_allow_html=True)
+        render_ms = round(1000 * (time.perf_counter() - render_started), 2)
+        record_span("analysis", {"render_ms": render_ms}, alert_ids=[alert_id])
+    else:
+        render_ms = None
+        st.warning("No analysis text found in the response.")
+    
+    # Show metadata in a collapsible section
+    with st.expander("📋 View Metadata", expanded=False):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Response Time", f"{analysis.get('response_time_ms', 0):.2f} ms")
+            st.metric("Method", analysis.get('method', 'N/A'))
+        with col2:
+            st.metric("Model", analysis.get('model', 'N/A'))
+            st.metric("Alert ID", alert_id)
+        with col3:
+            st.metric("Focus Column", analysis.get('FocusColumnValue', 'N/A'))
+        display_client_timing(analysis, render_ms)
+
+STREAM_RENDER_INTERVAL_S = 0.1
+
+def display_analysis_stream(stream: AnalysisStream, alerts: int):
+    """Render each report and its thinking text as they stream in, formatted as the text grows"""
+    status = st.empty()
+    status.caption("⏳ Waiting for the first token...")
+    slots: Dict[int, Tuple[Any, Any]] = {}
+    last_render: Dict[int, float] = {}
+    complete = 0
+    for index, analysis in stream:
+        streaming = analysis.get('streaming', False)
+        if index not in slots:
+            with st.container(border=True):
+                st.subheader(f"📊 Analysis Report - Alert ID: {analysis.get('AlertID', 'N/A')}")
+                slots[index] = (st.empty(), st.empty())
+        # Redrawing the whole report on every token would flood the browser
+        now = time.perf_counter()
+        if streaming and now - last_render.get(index, 0.0) < STREAM_RENDER_INTERVAL_S:
+            continue
+        last_render[index] = now
+        thinking_slot, report_slot = slots[index]
+        if analysis.get('thinking'):
+            with thinking_slot.container(height=200):
+                st.caption("🧠 Thinking Process (Audit Mode)")
+                st.text(analysis['thinking'])
+        if analysis.get('analysis'):
+            report_slot.markdown(render_report_html(analysis['analysis'], memoize=not streaming),
+                                 unsafe_allow_html=True)
+        if not streaming:
+            complete += 1
+        first_token = (f"first token after {stream.first_token_ms / 1000:.2f} s · "
+                       if stream.first_token_ms is not None else "")
+        status.caption(f"⚡ {first_token}{complete} / {alerts} reports complete")
+
 def display_analysis_result(result: Dict[str, Any]):
     """Display analysis results - showing only the analysis text"""
     if result.get("success"):
-        data = result.get("data", {})
+        # Handle partial success
+        if result.get("partial") and result.get("errors"):
+            st.warning("⚠️ Some alerts processed successfully, but some had errors:")
+            for error in result.get("errors", []):
+                st.error(error)
         
-        # Handle different response formats
-        if isinstance(data, dict):
-            if "data" in data:
-                analyses = data["data"] if isinstance(data["data"], list) else [data["data"]]
-            elif "Analysis" in data:
-                analyses = data["Analysis"] if isinstance(data["Analysis"], list) else [data["Analysis"]]
-            else:
-                analyses = [data]
-        elif isinstance(data, list):
-            analyses = data
-        else:
-            analyses = [data]
+        analyses = extract_analyses(result.get("data", {}))
         
         st.success("✅ Analysis completed successfully!")
         
+        lazy = len(analyses) > EAGER_REPORTS
+        if lazy:
+            st.caption(f"📂 {len(analyses)} reports: switch on a report to load it.")
         for analysis in analyses:
-            alert_id = analysis.get('AlertID', analysis.get('Alert ID', 'N/A'))
-            customer_name = analysis.get('CustomerName', analysis.get('Customer Name', 'N/A'))
-            
-            # Show basic info in header
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                st.subheader(f"📊 Analysis Report - Alert ID: {alert_id}")
-            with col2:
-                if customer_name and customer_name != 'N/A':
-                    st.caption(f"Customer: {customer_name}")
-            
-            # Display thinking separately if present (from audit mode)
-            thinking_text = analysis.get('thinking')
-            if thinking_text:
-                st.markdown("---")
-                st.subheader("🧠 Thinking Process (Audit Mode)")
-                st.caption("This section shows the model's reasoning process when Audit Mode is enabled.")
-                
-                # Display thinking in a separate styled text area
-                st.text_area(
-                    "Model Reasoning",
-                    value=str(thinking_text),
-                    height=400,
-                    disabled=True,
-                    label_visibility="visible",
-                    key=f"thinking_{alert_id}",
-                    help="This is the model's internal reasoning process. Scroll to view the full thinking."
-                )
-            
-            # Display the analysis text
-            analysis_text = analysis.get('analysis', analysis.get('Analysis', analysis.get('AnalysisReport', '')))
-            
-            if analysis_text:
-                st.markdown("---")
-                st.subheader("📊 Analysis Report")
-                
-                # Format the text for better display
-                import html
-                import re
-                
-                text = str(analysis_text)
-                escaped_text = html.escape(text)
-                
-                # Split into lines and format
-                lines = escaped_text.split('\n')
-                formatted_lines = []
-                in_list = False
-                
-                for i, line in enumerate(lines):
-                    line_stripped = line.strip()
-                    
-                    # Skip empty lines but add spacing
-                    if not line_stripped:
-                        if formatted_lines and not formatted_lines[-1].endswith('<br>'):
-                            formatted_lines.append('<br>')
-                        continue
-                    
-                    # Detect main headers (like "AML Investigation Report", "Alert Summary", etc.)
-                    if (line_stripped.endswith(':') and len(line_stripped) < 60 and 
-                        not line_stripped.startswith(' ') and
-                        (line_stripped.isupper() or 
-                         any(keyword in line_stripped.lower() for keyword in ['report', 'summary', 'analysis', 'conclusion', 'recommendation', 'assessment', 'background', 'pattern', 'flow']))):
-                        formatted_lines.append(f'<h3 style="color: #ffffff; margin: 25px 0 15px 0; font-weight: 700; font-size: 20px; border-bottom: 2px solid rgba(102, 126, 234, 0.6); padding-bottom: 8px;">{line_stripped}</h3>')
-                    
-                    # Detect sub-headers (short lines ending with colon)
-                    elif line_stripped.endswith(':') and len(line_stripped) < 50 and not line_stripped.startswith(' '):
-                        formatted_lines.append(f'<h4 style="color: #ffffff; margin: 18px 0 10px 0; font-weight: 600; font-size: 16px; color: #a8b5ff;">{line_stripped}</h4>')
-                    
-                    # Detect bold text markers
-                    elif line_stripped.startswith('**') and line_stripped.endswith('**'):
-                        bold_text = line_stripped.replace('**', '')
-                        formatted_lines.append(f'<p style="color: #ffffff; margin: 12px 0; font-weight: 600; font-size: 16px;">{bold_text}</p>')
-                    
-                    # Detect list items (lines starting with - or •)
-                    elif line_stripped.startswith('-') or line_stripped.startswith('•'):
-                        if not in_list:
-                            formatted_lines.append('<ul style="color: #ffffff; margin: 10px 0; padding-left: 25px;">')
-                            in_list = True
-                        list_text = line_stripped.lstrip('-•').strip()
-                        formatted_lines.append(f'<li style="margin: 8px 0; line-height: 1.8;">{list_text}</li>')
-                    
-                    # Regular paragraph text
-                    else:
-                        if in_list:
-                            formatted_lines.append('</ul>')
-                            in_list = False
-                        # Check if it's a key-value pair (like "Customer Name: ...")
-                        if ':' in line_stripped and len(line_stripped.split(':')) == 2:
-                            key, value = line_stripped.split(':', 1)
-                            key = key.strip()
-                            value = value.strip()
-                            formatted_lines.append(
-                                f'<p style="color: #ffffff; margin: 10px 0; line-height: 1.8;">'
-                                f'<span style="font-weight: 600; color: #a8b5ff;">{key}:</span> '
-                                f'<span>{value}</span></p>'
-                            )
-                        else:
-                            formatted_lines.append(f'<p style="color: #ffffff; margin: 10px 0; line-height: 1.8;">{line_stripped}</p>')
-                
-                # Close any open list
-                if in_list:
-                    formatted_lines.append('</ul>')
-                
-                formatted_html = '\n'.join(formatted_lines)
-                
-                # Display in a styled container with transparent background and white text
-                st.markdown(
-                    f"""
-                    <div style='
-                        background: linear-gradient(135deg, rgba(102, 126, 234, 0.08) 0%, rgba(118, 75, 162, 0.08) 100%);
-                        padding: 30px; 
-                        border-radius: 12px; 
-                        border-left: 4px solid #667eea;
-                        font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif; 
-                        line-height: 1.8; 
-                        color: #ffffff; 
-                        font-size: 15px;
-                        max-height: 800px;
-                        overflow-y: auto;
-                        box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                    '>
-                    {formatted_html}
-                    </div>
-                    """, 
-                    unsafe_allow_html=True
-                )
-            else:
-                st.warning("No analysis text found in the response.")
-            
-            # Show metadata in a collapsible section
-            with st.expander("📋 View Metadata", expanded=False):
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Response Time", f"{analysis.get('response_time_ms', 0):.2f} ms")
-                    st.metric("Method", analysis.get('method', 'N/A'))
-                with col2:
-                    st.metric("Model", analysis.get('model', 'N/A'))
-                    st.metric("Alert ID", alert_id)
-                with col3:
-                    st.metric("Focus Column", analysis.get('FocusColumnValue', 'N/A'))
+            display_single_analysis(analysis, lazy=lazy)
     else:
         st.error(f"❌ Error: {result.get('error', 'Unknown error')}")
 
 def main():
+    started = time.perf_counter()
     # Header
     st.markdown('<h1 class="main-header">🔍 AML AI Analysis & Alert Prioritization Demo</h1>', unsafe_allow_html=True)
     
@@ -549,13 +967,218 @@ def main():
             help="Base URL for the API endpoints",
             key="api_base_url"
         )
+        st.number_input(
+            "Keep-Alive Interval (min)",
+            min_value=0,
+            max_value=120,
+            value=DEFAULT_KEEPALIVE_MINUTES,
+            help="The service is probed when the app starts or the base URL changes, and then at this "
+                 "interval so it does not go to sleep. 0 turns the periodic probe off.",
+            key="keepalive_minutes"
+        )
+        if api_base_url.startswith(("http://", "https://")):
+            ensure_warmer(get_pool_client(api_base_url), 60.0 * st.session_state.keepalive_minutes)
+        display_readiness(api_base_url)
+        st.number_input(
+            "Max Concurrent Requests",
+            min_value=1,
+            max_value=32,
+            value=DEFAULT_MAX_CONCURRENCY,
+            help="Number of alerts sent to the API in parallel. Set to 1 to send alerts one at a time.",
+            key="max_concurrency"
+        )
+        with st.expander("🔌 Connection Pool", expanded=False):
+            st.number_input(
+                "Pool Size",
+                min_value=1,
+                max_value=64,
+                value=DEFAULT_POOL_SIZE,
+                help="Maximum number of keep-alive connections per API base URL.",
+                key="pool_size"
+            )
+            st.number_input(
+                "Connect Timeout (s)",
+                min_value=1.0,
+                max_value=120.0,
+                value=DEFAULT_CONNECT_TIMEOUT,
+                help="Time allowed to establish a connection. Read timeouts are set per endpoint.",
+                key="connect_timeout"
+            )
+            st.checkbox(
+                "Use HTTP/2",
+                value=False,
+                disabled=not HTTP2_AVAILABLE,
+                help="Multiplex requests over one connection. Requires the 'h2' package.",
+                key="use_http2"
+            )
+            st.selectbox(
+                "Request Compression",
+                list(COMPRESSION_OPTIONS),
+                help="Compact wire mode: send request bodies as compact JSON, compressed once the server "
+                     "advertises support for the coding (zstd needs the 'zstandard' package).",
+                key="request_compression"
+            )
+            display_pool_stats()
+        with st.expander("🛡️ Resilience", expanded=False):
+            st.checkbox(
+                "Retry, Hedge & Circuit Breaker",
+                value=True,
+                help="Retry transient failures with jittered backoff, duplicate slow prediction requests "
+                     "and fail fast while the service is down.",
+                key="resilience_enabled"
+            )
+            st.number_input(
+                "Max Attempts",
+                min_value=1,
+                max_value=10,
+                value=DEFAULT_MAX_ATTEMPTS,
+                help="Tries per request for connection errors and 429/502/503/504 responses. Read timeouts "
+                     "are only retried for predictions; a timed-out analysis is never sent twice.",
+                key="max_attempts"
+            )
+            st.checkbox(
+                "Hedge Slow Predictions",
+                value=True,
+                help="Send a duplicate prediction request once one runs longer than the latency percentile "
+                     "below; the first answer wins. Limited to 10% of requests.",
+                key="hedge_predictions"
+            )
+            st.slider(
+                "Hedge After Percentile",
+                min_value=50,
+                max_value=99,
+                value=DEFAULT_HEDGE_PERCENTILE,
+                key="hedge_percentile"
+            )
+            # The breaker is shared by every session using this URL, so its settings change only when applied
+            breaker = endpoint_state(api_base_url).breaker
+            st.caption("Circuit breaker settings are shared by all sessions using this API URL.")
+            failure_threshold = st.number_input(
+                "Failures Before Opening",
+                min_value=1,
+                max_value=100,
+                value=min(100, breaker.failure_threshold),
+                help="Consecutive failed requests after which new requests fail at once.",
+                key="breaker_threshold"
+            )
+            reset_timeout = st.number_input(
+                "Open Circuit Cool-down (s)",
+                min_value=1.0,
+                max_value=600.0,
+                value=min(600.0, max(1.0, float(breaker.reset_timeout))),
+                help="Time before a single probe request is let through to check the service again.",
+                key="breaker_reset_s"
+            )
+            if st.button("Apply Breaker Settings", key="apply_breaker_settings"):
+                configure_breaker(api_base_url, failure_threshold, reset_timeout)
+                st.toast("Circuit breaker settings applied for all sessions")
+            display_resilience_stats()
+        with st.expander("🗄️ Response Cache", expanded=False):
+            st.checkbox(
+                "Cache API Responses",
+                value=True,
+                help="Reuse earlier results for identical alerts sent with identical options.",
+                key="cache_enabled"
+            )
+            # The cache is shared by every session, so its settings change only when applied
+            cache = get_response_cache()
+            st.caption("Cache settings are shared by all sessions.")
+            ttl_minutes = st.number_input(
+                "Time to Live (minutes)",
+                min_value=1,
+                max_value=7 * 24 * 60,
+                value=max(1, int(cache.ttl_seconds // 60)),
+                key="cache_ttl_minutes"
+            )
+            max_entries = st.number_input(
+                "Max Entries in Memory",
+                min_value=1,
+                max_value=100000,
+                value=cache.max_entries,
+                key="cache_max_entries"
+            )
+            on_disk = st.checkbox(
+                "Persist to Disk",
+                value=cache.disk_dir is not None,
+                help=f"Also keep cached responses in {DEFAULT_CACHE_DIR} so they survive restarts.",
+                key="cache_on_disk"
+            )
+            if st.button("Apply Cache Settings", key="apply_cache_settings"):
+                configure_response_cache(max_entries=max_entries, ttl_seconds=60 * ttl_minutes,
+                                         disk_dir=DEFAULT_CACHE_DIR if on_disk else None)
+                st.toast("Cache settings applied for all sessions")
+            display_cache_stats()
+            display_single_flight_stats()
+            if st.button("🧹 Clear Cache", key="clear_cache"):
+                get_response_cache().clear()
+                st.rerun()
+        with st.expander("🗃️ Result Store", expanded=False):
+            st.checkbox(
+                "Use Result Store",
+                value=True,
+                help="Save every result in a database shared by all sessions and answer alerts already "
+                     "stored there (same alert, same options) without calling the API.",
+                key="store_enabled"
+            )
+            st.caption(f"Database: {DEFAULT_STORE_PATH}")
+            display_store_stats()
+            if st.button("🧹 Clear Result Store", key="clear_store"):
+                get_result_store(DEFAULT_STORE_PATH).clear()
+                st.rerun()
+        with st.expander("🧮 Session Memory", expanded=False):
+            st.checkbox(
+                "Compact Large Text",
+                value=True,
+                help="Keep long report, thinking and transaction text of results compressed, and load it "
+                     "only when it is shown.",
+                key="session_compact"
+            )
+            st.number_input(
+                "Memory Budget per Session (MB)",
+                min_value=0,
+                max_value=1024,
+                value=DEFAULT_BUDGET_MB,
+                help="Compressed text kept in memory for this session; the least recently viewed text "
+                     "beyond it is spilled to local disk. 0 keeps all of it on disk.",
+                key="session_budget_mb"
+            )
+            if st.button("🧹 Clear Analysis Result", key="clear_analysis_result",
+                         disabled='analysis_result' not in st.session_state):
+                keep_analysis_result(None)
+                st.rerun()
+            # Filled in at the end of the run, once this run's results are in the session state
+            memory_report = st.container()
+        with st.expander("⏱️ Rerun Timing", expanded=False):
+            display_run_times()
+        with st.expander("📈 Request Timing", expanded=False):
+            st.caption("Client-side phases of every API request (queue, connect, TLS, send, first byte, "
+                       "download, decode, render). Per-alert figures are under View Metadata.")
+            # The recorder is shared by every session, so its outputs change only when applied, and only to
+            # the fixed files below
+            recorder = span_recorder()
+            st.caption("Timing output is shared by all sessions.")
+            write_spans = st.checkbox("Write Spans (JSONL)", value=recorder.spans_file is not None,
+                                      help=f"Append every request's phases to {DEFAULT_SPANS_FILE}.",
+                                      key="write_spans")
+            write_metrics = st.checkbox("Write Prometheus Metrics", value=recorder.metrics_file is not None,
+                                        help=f"Histograms per endpoint and phase in Prometheus text format in "
+                                             f"{DEFAULT_METRICS_FILE}, e.g. for node_exporter's textfile collector.",
+                                        key="write_metrics")
+            if st.button("Apply Timing Settings", key="apply_timing_settings"):
+                recorder.configure(DEFAULT_SPANS_FILE if write_spans else None,
+                                   DEFAULT_METRICS_FILE if write_metrics else None)
+                st.toast("Timing settings applied for all sessions")
+            summary = span_recorder().summary()
+            if summary:
+                st.dataframe(pd.DataFrame(summary), hide_index=True, use_container_width=True)
         st.markdown("---")
         st.markdown("### 📡 API Endpoints")
         st.code(f"{api_base_url}/api/ai-service/predictalertpriority")
         st.code(f"{api_base_url}/api/ai-service/generateamlanalysis")
     
     # Main tabs
-    tab1, tab2 = st.tabs(["🎯 Alert Priority Prediction", "📊 AML Analysis Generation"])
+    tab1, tab2, tab3, tab4 = st.tabs(["🎯 Alert Priority Prediction", "📊 AML Analysis Generation", "📉 Performance",
+                                      "🗃️ Result History"])
     
     # Tab 1: Prediction API
     with tab1:
@@ -567,46 +1190,88 @@ def main():
         with col1:
             if st.button("📥 Load Example Data", key="load_pred_example"):
                 st.session_state.prediction_data = PREDICTION_EXAMPLE
+                reset_alert_table("pred")
                 st.success("Example data loaded!")
         
+        # Bulk file input
+        uploaded_file, chunk_size, min_score, run_file = bulk_upload_section("prediction", "pred")
+        if run_file:
+            api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
+            chunk_results, summary = process_uploaded_alerts(
+                uploaded_file,
+                "prediction",
+                chunk_size,
+                lambda alerts: call_prediction_api(
+                    alerts,
+                    api_url,
+                    max_concurrency=st.session_state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                    client=get_api_client(api_url),
+                    cache=get_cache(),
+                    store=get_store()
+                ),
+                min_score
+            )
+            st.session_state.pred_ingest_summary = summary
+            if chunk_results:
+                st.session_state.prediction_result = combine_prediction_results(chunk_results)
+            st.rerun()
+        
         # Data input
         st.subheader("📝 Input Data")
         
-        # Number of alerts
-        num_alerts = st.number_input("Number of Alerts", min_value=1, max_value=10, value=1, key="num_pred_alerts")
+        editor_mode = st.radio("Editor", ["Forms", "Table"], horizontal=True, key="pred_editor_mode",
+                               help="Table edits all alerts in one grid and reruns only the grid on each edit.")
+        if editor_mode == "Table":
+            if 'prediction_data' not in st.session_state:
+                st.session_state.prediction_data = [{}]
+            alert_table_editor("prediction", "pred", st.session_state.prediction_data)
+            alerts_data = edited_table_alerts("prediction", "pred")
+        else:
+            # Number of alerts
+            num_alerts = st.number_input("Number of Alerts", min_value=1, max_value=10, value=1, key="num_pred_alerts")
         
-        # Initialize session state
-        if 'prediction_data' not in st.session_state:
-            st.session_state.prediction_data = [{} for _ in range(num_alerts)]
+            # Initialize session state
+            if 'prediction_data' not in st.session_state:
+                st.session_state.prediction_data = [{} for _ in range(num_alerts)]
         
-        # Form for each alert
-        alerts_data = []
-        for i in range(num_alerts):
-            with st.expander(f"Alert {i+1}", expanded=(i == 0)):
-                alert_data = {}
+            # Form for each alert
+            alerts_data = []
+            for i in range(num_alerts):
+                with st.expander(f"Alert {i+1}", expanded=(i == 0)):
+                    alert_data = {}
                 
-                col1, col2 = st.columns(2)
-                with col1:
-                    alert_data['AlertID'] = st.number_input(f"Alert ID", value=st.session_state.prediction_data[i].get('AlertID', 1001) if i < len(st.session_state.prediction_data) else 1001, key=f"pred_alert_id_{i}")
-                    alert_data['FocusColumnValue'] = st.text_input(f"Focus Column Value", value=st.session_state.prediction_data[i].get('FocusColumnValue', 'PK-42101-1234567-1') if i < len(st.session_state.prediction_data) else 'PK-42101-1234567-1', key=f"pred_focus_{i}")
-                    alert_data['AlertScore'] = st.number_input(f"Alert Score", value=float(st.session_state.prediction_data[i].get('AlertScore', 85.5)) if i < len(st.session_state.prediction_data) else 85.5, key=f"pred_score_{i}")
-                    alert_data['CreateDate'] = st.text_input(f"Create Date (ISO format)", value=st.session_state.prediction_data[i].get('CreateDate', '2025-06-15T10:30:00') if i < len(st.session_state.prediction_data) else '2025-06-15T10:30:00', key=f"pred_date_{i}")
-                with col2:
-                    alert_data['riskLevel'] = st.selectbox(f"Risk Level", ['Low', 'Medium', 'High'], index=['Low', 'Medium', 'High'].index(st.session_state.prediction_data[i].get('riskLevel', 'Low')) if i < len(st.session_state.prediction_data) and st.session_state.prediction_data[i].get('riskLevel') in ['Low', 'Medium', 'High'] else 0, key=f"pred_risk_{i}")
-                    alert_data['ScenarioName'] = st.text_input(f"Scenario Name", value=st.session_state.prediction_data[i].get('ScenarioName', 'Unusually large installment') if i < len(st.session_state.prediction_data) else 'Unusually large installment', key=f"pred_scenario_{i}")
-                    alert_data['workflow'] = st.text_input(f"Workflow", value=st.session_state.prediction_data[i].get('workflow', 'Unassigned') if i < len(st.session_state.prediction_data) else 'Unassigned', key=f"pred_workflow_{i}")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        alert_data['AlertID'] = st.number_input(f"Alert ID", value=st.session_state.prediction_data[i].get('AlertID', 1001) if i < len(st.session_state.prediction_data) else 1001, key=f"pred_alert_id_{i}")
+                        alert_data['FocusColumnValue'] = st.text_input(f"Focus Column Value", value=st.session_state.prediction_data[i].get('FocusColumnValue', 'PK-42101-1234567-1') if i < len(st.session_state.prediction_data) else 'PK-42101-1234567-1', key=f"pred_focus_{i}")
+                        alert_data['AlertScore'] = st.number_input(f"Alert Score", value=float(st.session_state.prediction_data[i].get('AlertScore', 85.5)) if i < len(st.session_state.prediction_data) else 85.5, key=f"pred_score_{i}")
+                        alert_data['CreateDate'] = st.text_input(f"Create Date (ISO format)", value=st.session_state.prediction_data[i].get('CreateDate', '2025-06-15T10:30:00') if i < len(st.session_state.prediction_data) else '2025-06-15T10:30:00', key=f"pred_date_{i}")
+                    with col2:
+                        alert_data['riskLevel'] = st.selectbox(f"Risk Level", ['Low', 'Medium', 'High'], index=['Low', 'Medium', 'High'].index(st.session_state.prediction_data[i].get('riskLevel', 'Low')) if i < len(st.session_state.prediction_data) and st.session_state.prediction_data[i].get('riskLevel') in ['Low', 'Medium', 'High'] else 0, key=f"pred_risk_{i}")
+                        alert_data['ScenarioName'] = st.text_input(f"Scenario Name", value=st.session_state.prediction_data[i].get('ScenarioName', 'Unusually large installment') if i < len(st.session_state.prediction_data) else 'Unusually large installment', key=f"pred_scenario_{i}")
+                        alert_data['workflow'] = st.text_input(f"Workflow", value=st.session_state.prediction_data[i].get('workflow', 'Unassigned') if i < len(st.session_state.prediction_data) else 'Unassigned', key=f"pred_workflow_{i}")
                 
-                alert_data['MatchDetails'] = st.text_area(f"Match Details (JSON string)", value=st.session_state.prediction_data[i].get('MatchDetails', '') if i < len(st.session_state.prediction_data) else '', key=f"pred_match_details_{i}", height=100)
-                alert_data['MatchInfoJson'] = st.text_area(f"Match Info JSON (JSON array string)", value=st.session_state.prediction_data[i].get('MatchInfoJson', '') if i < len(st.session_state.prediction_data) else '', key=f"pred_match_info_{i}", height=100)
+                    alert_data['MatchDetails'] = st.text_area(f"Match Details (JSON string)", value=st.session_state.prediction_data[i].get('MatchDetails', '') if i < len(st.session_state.prediction_data) else '', key=f"pred_match_details_{i}", height=100)
+                    alert_data['MatchInfoJson'] = st.text_area(f"Match Info JSON (JSON array string)", value=st.session_state.prediction_data[i].get('MatchInfoJson', '') if i < len(st.session_state.prediction_data) else '', key=f"pred_match_info_{i}", height=100)
                 
-                alerts_data.append(alert_data)
+                    alerts_data.append(alert_data)
         
+        alerts_data = prescreen_section(alerts_data, "prediction", "pred")
+
         # Call API button
-        if st.button("🚀 Predict Alert Priority", type="primary", key="call_pred_api"):
+        if st.button("🚀 Predict Alert Priority", type="primary", key="call_pred_api", disabled=not alerts_data) and \
+                check_json_fields(alerts_data, "prediction"):
             # Get API base URL from sidebar (stored in session state)
             api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
             with st.spinner("Calling prediction API..."):
-                result = call_prediction_api(alerts_data, api_url)
+                result = call_prediction_api(
+                    alerts_data,
+                    api_url,
+                    max_concurrency=st.session_state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                    client=get_api_client(api_url),
+                    cache=get_cache(),
+                    store=get_store()
+                )
                 st.session_state.prediction_result = result
         
         # Display results
@@ -625,90 +1290,99 @@ def main():
         with col1:
             if st.button("📥 Load Example Data", key="load_analysis_example"):
                 st.session_state.analysis_data = ANALYSIS_EXAMPLE
+                reset_alert_table("analysis")
                 st.success("Example data loaded!")
         
         # Data input
         st.subheader("📝 Input Data")
         
-        # Number of alerts
-        num_alerts_analysis = st.number_input("Number of Alerts", min_value=1, max_value=10, value=1, key="num_analysis_alerts")
+        editor_mode = st.radio("Editor", ["Forms", "Table"], horizontal=True, key="analysis_editor_mode",
+                               help="Table edits all alerts in one grid and reruns only the grid on each edit.")
+        if editor_mode == "Table":
+            if 'analysis_data' not in st.session_state:
+                st.session_state.analysis_data = [{}]
+            alert_table_editor("analysis", "analysis", st.session_state.analysis_data)
+            alerts_analysis_data = edited_table_alerts("analysis", "analysis")
+        else:
+            # Number of alerts
+            num_alerts_analysis = st.number_input("Number of Alerts", min_value=1, max_value=10, value=1, key="num_analysis_alerts")
         
-        # Initialize session state
-        if 'analysis_data' not in st.session_state:
-            st.session_state.analysis_data = [{} for _ in range(num_alerts_analysis)]
+            # Initialize session state
+            if 'analysis_data' not in st.session_state:
+                st.session_state.analysis_data = [{} for _ in range(num_alerts_analysis)]
         
-        # Form for each alert
-        alerts_analysis_data = []
-        for i in range(num_alerts_analysis):
-            with st.expander(f"Alert {i+1}", expanded=(i == 0)):
-                alert_data = {}
+            # Form for each alert
+            alerts_analysis_data = []
+            for i in range(num_alerts_analysis):
+                with st.expander(f"Alert {i+1}", expanded=(i == 0)):
+                    alert_data = {}
                 
-                # Basic Information
-                st.markdown("#### Basic Information")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    alert_data['AlertID'] = st.number_input(f"Alert ID", value=st.session_state.analysis_data[i].get('AlertID', 1) if i < len(st.session_state.analysis_data) else 1, key=f"analysis_alert_id_{i}")
-                    alert_data['FocusColumnValue'] = st.text_input(f"Focus Column Value", value=st.session_state.analysis_data[i].get('FocusColumnValue', '100001') if i < len(st.session_state.analysis_data) else '100001', key=f"analysis_focus_{i}")
-                    alert_data['ScenarioName'] = st.text_input(f"Scenario Name", value=st.session_state.analysis_data[i].get('ScenarioName', 'Unusually large installment') if i < len(st.session_state.analysis_data) else 'Unusually large installment', key=f"analysis_scenario_{i}")
-                with col2:
-                    alert_data['CustomerName'] = st.text_input(f"Customer Name", value=st.session_state.analysis_data[i].get('CustomerName', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_customer_name_{i}")
-                    alert_data['CUSTOMERID'] = st.text_input(f"Customer ID", value=st.session_state.analysis_data[i].get('CUSTOMERID', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_customer_id_{i}")
-                    alert_data['BranchID'] = st.text_input(f"Branch ID", value=st.session_state.analysis_data[i].get('BranchID', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_branch_{i}")
-                with col3:
-                    alert_data['Country'] = st.text_input(f"Country", value=st.session_state.analysis_data[i].get('Country', 'Pakistan') if i < len(st.session_state.analysis_data) else 'Pakistan', key=f"analysis_country_{i}")
-                    alert_data['CustomerType'] = st.text_input(f"Customer Type", value=st.session_state.analysis_data[i].get('CustomerType', 'Retail') if i < len(st.session_state.analysis_data) else 'Retail', key=f"analysis_customer_type_{i}")
-                    alert_data['RiskScore'] = st.text_input(f"Risk Score", value=st.session_state.analysis_data[i].get('RiskScore', '4.2') if i < len(st.session_state.analysis_data) else '4.2', key=f"analysis_risk_score_{i}")
+                    # Basic Information
+                    st.markdown("#### Basic Information")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        alert_data['AlertID'] = st.number_input(f"Alert ID", value=st.session_state.analysis_data[i].get('AlertID', 1) if i < len(st.session_state.analysis_data) else 1, key=f"analysis_alert_id_{i}")
+                        alert_data['FocusColumnValue'] = st.text_input(f"Focus Column Value", value=st.session_state.analysis_data[i].get('FocusColumnValue', '100001') if i < len(st.session_state.analysis_data) else '100001', key=f"analysis_focus_{i}")
+                        alert_data['ScenarioName'] = st.text_input(f"Scenario Name", value=st.session_state.analysis_data[i].get('ScenarioName', 'Unusually large installment') if i < len(st.session_state.analysis_data) else 'Unusually large installment', key=f"analysis_scenario_{i}")
+                    with col2:
+                        alert_data['CustomerName'] = st.text_input(f"Customer Name", value=st.session_state.analysis_data[i].get('CustomerName', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_customer_name_{i}")
+                        alert_data['CUSTOMERID'] = st.text_input(f"Customer ID", value=st.session_state.analysis_data[i].get('CUSTOMERID', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_customer_id_{i}")
+                        alert_data['BranchID'] = st.text_input(f"Branch ID", value=st.session_state.analysis_data[i].get('BranchID', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_branch_{i}")
+                    with col3:
+                        alert_data['Country'] = st.text_input(f"Country", value=st.session_state.analysis_data[i].get('Country', 'Pakistan') if i < len(st.session_state.analysis_data) else 'Pakistan', key=f"analysis_country_{i}")
+                        alert_data['CustomerType'] = st.text_input(f"Customer Type", value=st.session_state.analysis_data[i].get('CustomerType', 'Retail') if i < len(st.session_state.analysis_data) else 'Retail', key=f"analysis_customer_type_{i}")
+                        alert_data['RiskScore'] = st.text_input(f"Risk Score", value=st.session_state.analysis_data[i].get('RiskScore', '4.2') if i < len(st.session_state.analysis_data) else '4.2', key=f"analysis_risk_score_{i}")
                 
-                # KYC Information
-                st.markdown("#### KYC Information")
-                col1, col2 = st.columns(2)
-                with col1:
-                    alert_data['KYCMonthlyIncome'] = st.text_input(f"KYC Monthly Income", value=st.session_state.analysis_data[i].get('KYCMonthlyIncome', '85,000 PKR') if i < len(st.session_state.analysis_data) else '85,000 PKR', key=f"analysis_kyc_income_{i}")
-                    alert_data['KYCNoOfCredits'] = st.text_input(f"KYC No. of Credits", value=st.session_state.analysis_data[i].get('KYCNoOfCredits', '3-5') if i < len(st.session_state.analysis_data) else '3-5', key=f"analysis_kyc_credits_{i}")
-                    alert_data['KYCNoOfDebits'] = st.text_input(f"KYC No. of Debits", value=st.session_state.analysis_data[i].get('KYCNoOfDebits', '8-12') if i < len(st.session_state.analysis_data) else '8-12', key=f"analysis_kyc_debits_{i}")
-                    alert_data['KYCRiskCategoryValue'] = st.selectbox(f"KYC Risk Category", ['Low', 'Medium', 'High'], index=['Low', 'Medium', 'High'].index(st.session_state.analysis_data[i].get('KYCRiskCategoryValue', 'Low')) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('KYCRiskCategoryValue') in ['Low', 'Medium', 'High'] else 0, key=f"analysis_kyc_risk_{i}")
-                with col2:
-                    alert_data['KYCValueOfCredits'] = st.text_input(f"KYC Value of Credits", value=st.session_state.analysis_data[i].get('KYCValueOfCredits', '150,000 - 200,000 PKR') if i < len(st.session_state.analysis_data) else '150,000 - 200,000 PKR', key=f"analysis_kyc_val_credits_{i}")
-                    alert_data['KYCValueOfDebits'] = st.text_input(f"KYC Value of Debits", value=st.session_state.analysis_data[i].get('KYCValueOfDebits', '80,000 - 120,000 PKR') if i < len(st.session_state.analysis_data) else '80,000 - 120,000 PKR', key=f"analysis_kyc_val_debits_{i}")
-                    alert_data['OccupationValue'] = st.text_input(f"Occupation", value=st.session_state.analysis_data[i].get('OccupationValue', 'Private Employee') if i < len(st.session_state.analysis_data) else 'Private Employee', key=f"analysis_occupation_{i}")
-                    alert_data['STRCount'] = st.number_input(f"STR Count", value=st.session_state.analysis_data[i].get('STRCount', 0) if i < len(st.session_state.analysis_data) else 0, key=f"analysis_str_count_{i}")
+                    # KYC Information
+                    st.markdown("#### KYC Information")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        alert_data['KYCMonthlyIncome'] = st.text_input(f"KYC Monthly Income", value=st.session_state.analysis_data[i].get('KYCMonthlyIncome', '85,000 PKR') if i < len(st.session_state.analysis_data) else '85,000 PKR', key=f"analysis_kyc_income_{i}")
+                        alert_data['KYCNoOfCredits'] = st.text_input(f"KYC No. of Credits", value=st.session_state.analysis_data[i].get('KYCNoOfCredits', '3-5') if i < len(st.session_state.analysis_data) else '3-5', key=f"analysis_kyc_credits_{i}")
+                        alert_data['KYCNoOfDebits'] = st.text_input(f"KYC No. of Debits", value=st.session_state.analysis_data[i].get('KYCNoOfDebits', '8-12') if i < len(st.session_state.analysis_data) else '8-12', key=f"analysis_kyc_debits_{i}")
+                        alert_data['KYCRiskCategoryValue'] = st.selectbox(f"KYC Risk Category", ['Low', 'Medium', 'High'], index=['Low', 'Medium', 'High'].index(st.session_state.analysis_data[i].get('KYCRiskCategoryValue', 'Low')) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('KYCRiskCategoryValue') in ['Low', 'Medium', 'High'] else 0, key=f"analysis_kyc_risk_{i}")
+                    with col2:
+                        alert_data['KYCValueOfCredits'] = st.text_input(f"KYC Value of Credits", value=st.session_state.analysis_data[i].get('KYCValueOfCredits', '150,000 - 200,000 PKR') if i < len(st.session_state.analysis_data) else '150,000 - 200,000 PKR', key=f"analysis_kyc_val_credits_{i}")
+                        alert_data['KYCValueOfDebits'] = st.text_input(f"KYC Value of Debits", value=st.session_state.analysis_data[i].get('KYCValueOfDebits', '80,000 - 120,000 PKR') if i < len(st.session_state.analysis_data) else '80,000 - 120,000 PKR', key=f"analysis_kyc_val_debits_{i}")
+                        alert_data['OccupationValue'] = st.text_input(f"Occupation", value=st.session_state.analysis_data[i].get('OccupationValue', 'Private Employee') if i < len(st.session_state.analysis_data) else 'Private Employee', key=f"analysis_occupation_{i}")
+                        alert_data['STRCount'] = st.number_input(f"STR Count", value=st.session_state.analysis_data[i].get('STRCount', 0) if i < len(st.session_state.analysis_data) else 0, key=f"analysis_str_count_{i}")
                 
-                # Transactions
-                st.markdown("#### Transactions")
-                alert_data['FilteredTransactions'] = st.text_area(f"Filtered Transactions (JSON array string)", value=st.session_state.analysis_data[i].get('FilteredTransactions', '[]') if i < len(st.session_state.analysis_data) else '[]', key=f"analysis_transactions_{i}", height=150)
+                    # Transactions
+                    st.markdown("#### Transactions")
+                    alert_data['FilteredTransactions'] = st.text_area(f"Filtered Transactions (JSON array string)", value=st.session_state.analysis_data[i].get('FilteredTransactions', '[]') if i < len(st.session_state.analysis_data) else '[]', key=f"analysis_transactions_{i}", height=150)
                 
-                # Additional fields
-                st.markdown("#### Additional Information")
-                alert_data['STRScenarioHistory'] = st.text_input(f"STR Scenario History", value=st.session_state.analysis_data[i].get('STRScenarioHistory', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_str_history_{i}")
-                alert_data['CreatedDate'] = st.text_input(f"Created Date", value=st.session_state.analysis_data[i].get('CreatedDate', '2020-01-15') if i < len(st.session_state.analysis_data) else '2020-01-15', key=f"analysis_created_date_{i}")
-                alert_data['RelationshipStartDate'] = st.text_input(f"Relationship Start Date", value=st.session_state.analysis_data[i].get('RelationshipStartDate', '2020-01-15') if i < len(st.session_state.analysis_data) else '2020-01-15', key=f"analysis_relationship_date_{i}")
-                alert_data['CustomerStatus'] = st.text_input(f"Customer Status", value=st.session_state.analysis_data[i].get('CustomerStatus', 'Retail Customer') if i < len(st.session_state.analysis_data) else 'Retail Customer', key=f"analysis_customer_status_{i}")
+                    # Additional fields
+                    st.markdown("#### Additional Information")
+                    alert_data['STRScenarioHistory'] = st.text_input(f"STR Scenario History", value=st.session_state.analysis_data[i].get('STRScenarioHistory', '') if i < len(st.session_state.analysis_data) else '', key=f"analysis_str_history_{i}")
+                    alert_data['CreatedDate'] = st.text_input(f"Created Date", value=st.session_state.analysis_data[i].get('CreatedDate', '2020-01-15') if i < len(st.session_state.analysis_data) else '2020-01-15', key=f"analysis_created_date_{i}")
+                    alert_data['RelationshipStartDate'] = st.text_input(f"Relationship Start Date", value=st.session_state.analysis_data[i].get('RelationshipStartDate', '2020-01-15') if i < len(st.session_state.analysis_data) else '2020-01-15', key=f"analysis_relationship_date_{i}")
+                    alert_data['CustomerStatus'] = st.text_input(f"Customer Status", value=st.session_state.analysis_data[i].get('CustomerStatus', 'Retail Customer') if i < len(st.session_state.analysis_data) else 'Retail Customer', key=f"analysis_customer_status_{i}")
                 
-                # Previous Alerts (JSON editor)
-                st.markdown("#### Previous Alerts (JSON)")
-                prev_alerts_str = st.text_area(f"Previous Alerts (JSON array)", value=json.dumps(st.session_state.analysis_data[i].get('PreviousAlerts', []), indent=2) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('PreviousAlerts') else '[]', key=f"analysis_prev_alerts_{i}", height=100)
-                try:
-                    alert_data['PreviousAlerts'] = json.loads(prev_alerts_str)
-                except:
-                    alert_data['PreviousAlerts'] = []
+                    # Previous Alerts (JSON editor)
+                    st.markdown("#### Previous Alerts (JSON)")
+                    prev_alerts_str = st.text_area(f"Previous Alerts (JSON array)", value=json.dumps(st.session_state.analysis_data[i].get('PreviousAlerts', []), indent=2) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('PreviousAlerts') else '[]', key=f"analysis_prev_alerts_{i}", height=100)
+                    try:
+                        alert_data['PreviousAlerts'] = json.loads(prev_alerts_str)
+                    except:
+                        alert_data['PreviousAlerts'] = []
                 
-                # Counterparties (JSON editor)
-                st.markdown("#### Counterparties (JSON)")
-                counterparties_str = st.text_area(f"Counterparties (JSON array)", value=json.dumps(st.session_state.analysis_data[i].get('Counterparties', []), indent=2) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('Counterparties') else '[]', key=f"analysis_counterparties_{i}", height=100)
-                try:
-                    alert_data['Counterparties'] = json.loads(counterparties_str)
-                except:
-                    alert_data['Counterparties'] = []
+                    # Counterparties (JSON editor)
+                    st.markdown("#### Counterparties (JSON)")
+                    counterparties_str = st.text_area(f"Counterparties (JSON array)", value=json.dumps(st.session_state.analysis_data[i].get('Counterparties', []), indent=2) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('Counterparties') else '[]', key=f"analysis_counterparties_{i}", height=100)
+                    try:
+                        alert_data['Counterparties'] = json.loads(counterparties_str)
+                    except:
+                        alert_data['Counterparties'] = []
                 
-                # Branch Queries (JSON editor)
-                st.markdown("#### Branch Queries (JSON)")
-                branch_queries_str = st.text_area(f"Branch Queries (JSON object)", value=json.dumps(st.session_state.analysis_data[i].get('BranchQueries', {}), indent=2) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('BranchQueries') else '{}', key=f"analysis_branch_queries_{i}", height=100)
-                try:
-                    alert_data['BranchQueries'] = json.loads(branch_queries_str)
-                except:
-                    alert_data['BranchQueries'] = {}
+                    # Branch Queries (JSON editor)
+                    st.markdown("#### Branch Queries (JSON)")
+                    branch_queries_str = st.text_area(f"Branch Queries (JSON object)", value=json.dumps(st.session_state.analysis_data[i].get('BranchQueries', {}), indent=2) if i < len(st.session_state.analysis_data) and st.session_state.analysis_data[i].get('BranchQueries') else '{}', key=f"analysis_branch_queries_{i}", height=100)
+                    try:
+                        alert_data['BranchQueries'] = json.loads(branch_queries_str)
+                    except:
+                        alert_data['BranchQueries'] = {}
                 
-                alerts_analysis_data.append(alert_data)
+                    alerts_analysis_data.append(alert_data)
         
         # LLM Configuration Flags
         st.markdown("---")
@@ -762,6 +1436,74 @@ def main():
                 help="Evaluate the generated analysis and fix mistakes using an evaluator agent. Works with both Cloud and Local/Remote LLM.",
                 key="analysis_evaluation"
             )
+        col1, col2, col3 = st.columns(3)
+        with col3:
+            adaptive = st.checkbox(
+                "🧮 Adaptive Batching",
+                value=False,
+                help="Size requests by payload bytes and the latency recently observed for this LLM configuration, "
+                     "keeping each batch well under the timeout, and run them in parallel.",
+                key="analysis_adaptive"
+            )
+        with col1:
+            progressive = st.checkbox(
+                "⚡ Progressive Results",
+                value=True,
+                help="Send alerts in small parallel requests and show each report as soon as it is ready, instead of one request for all alerts.",
+                key="analysis_progressive"
+            )
+        with col2:
+            group_size = st.number_input(
+                "Alerts per Request",
+                min_value=1,
+                max_value=10,
+                value=1,
+                help="Number of alerts sent together in each progressive request.",
+                key="analysis_group_size",
+                disabled=not progressive or adaptive
+            )
+        col1, col2 = st.columns(2)
+        with col1:
+            pipeline = st.checkbox(
+                "🎯 Prioritize by Predicted Risk",
+                value=False,
+                help="Predict every alert's priority first, then analyze High before Medium before Low (oldest "
+                     "first within a priority), a few at a time, so the riskiest alerts get their reports first. "
+                     "Prediction fields an alert lacks are taken from the alert with the same AlertID in the "
+                     "Priority Prediction tab; alerts without them are not predicted and are analyzed last. "
+                     "The predictions also appear in the Priority Prediction tab.",
+                key="analysis_pipeline"
+            )
+        with col2:
+            pipeline_concurrency = st.number_input(
+                "Concurrent Analyses",
+                min_value=1,
+                max_value=16,
+                value=DEFAULT_ANALYSIS_CONCURRENCY,
+                help="Analysis requests in flight at once while prioritizing; the rest wait in priority order.",
+                key="analysis_pipeline_concurrency",
+                disabled=not pipeline
+            )
+        col1, col2 = st.columns(2)
+        with col1:
+            streaming = st.checkbox(
+                "📡 Stream Report Text",
+                value=False,
+                help="Show each report and its reasoning while the model writes them (Server-Sent Events), "
+                     "in one request for all alerts. Runs in the foreground; a service that does not stream "
+                     "answers as usual.",
+                key="analysis_streaming",
+                disabled=pipeline
+            )
+        with col2:
+            background = st.checkbox(
+                "🗂️ Run in Background",
+                value=True,
+                help="Queue the analysis as a background job: the page stays usable, several jobs can run at "
+                     "once and the reports appear here when the job finishes.",
+                key="analysis_background",
+                disabled=streaming or pipeline
+            )
         
         # Show warning if multiple LLM options are selected
         if use_cloud and llm_on_server:
@@ -772,8 +1514,187 @@ def main():
             st.info("ℹ️ Defaulting to Cloud LLM mode (OpenRouter)")
             use_cloud = True
         
+        # Bulk file input (uses the LLM configuration above)
+        uploaded_file, chunk_size, min_score, run_file = bulk_upload_section("analysis", "analysis")
+        if run_file:
+            api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
+            flags = dict(cloud=use_cloud, llm_on_server=llm_on_server, url=remote_url,
+                         anonymous=anonymous, audit=audit, evaluation=evaluation)
+            if progressive:
+                call_chunk = lambda alerts: merge_analysis_results(list(iter_analysis_results(
+                    alerts,
+                    api_url,
+                    group_size=group_size,
+                    max_concurrency=st.session_state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                    client=get_api_client(api_url),
+                    cache=get_cache(),
+                    store=get_store(),
+                    **flags
+                )))
+            else:
+                call_chunk = lambda alerts: call_analysis_api(
+                    alerts, api_url, client=get_api_client(api_url), cache=get_cache(), store=get_store(),
+                    **flags
+                )
+            chunk_results, summary = process_uploaded_alerts(uploaded_file, "analysis", chunk_size, call_chunk,
+                                                            min_score)
+            st.session_state.analysis_ingest_summary = summary
+            if chunk_results:
+                keep_analysis_result(combine_analysis_results(chunk_results))
+            st.rerun()
+        
+        alerts_analysis_data = prescreen_section(alerts_analysis_data, "analysis", "analysis")
+
         # Call API button
-        if st.button("🚀 Generate AML Analysis", type="primary", key="call_analysis_api"):
+        rendered_live = False
+        generate = st.button("🚀 Generate AML Analysis", type="primary", key="call_analysis_api",
+                             disabled=not alerts_analysis_data) and \
+            check_json_fields(alerts_analysis_data, "analysis")
+        if generate and pipeline:
+            api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
+            st.markdown("---")
+            st.subheader("📈 Results")
+            total = len(alerts_analysis_data)
+            progress = st.progress(0.0, text=f"0 / {total} predicted, 0 / {total} reports ready")
+            queue_table = st.empty()
+            rows = [{"AlertID": alert.get("AlertID"), "Prediction": "…", "Status": "predicting"}
+                    for alert in alerts_analysis_data]
+            predictions = [None] * total
+            analyses = []
+            for kind, index, event_result in iter_prioritized_analysis(
+                alerts_analysis_data,
+                api_url,
+                cloud=use_cloud,
+                llm_on_server=llm_on_server,
+                url=remote_url,
+                anonymous=anonymous,
+                audit=audit,
+                evaluation=evaluation,
+                analysis_concurrency=pipeline_concurrency,
+                max_concurrency=st.session_state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                client=get_api_client(api_url),
+                cache=get_cache(),
+                store=get_store(),
+                prediction_alerts=st.session_state.get('prediction_data')
+            ):
+                if kind == "prediction":
+                    predictions[index] = event_result
+                    label = prediction_label(event_result)
+                    if event_result.get("skipped"):
+                        label = "not predicted"
+                    rows[index].update(Prediction=f"{PREDICTION_ICONS.get(label, '⚪')} {label or 'failed'}",
+                                       Status="queued")
+                else:
+                    analyses.append(event_result)
+                    rows[index]["Status"] = "done" if event_result.get("success") else "failed"
+                    # Reports appear in the order they finish, highest priority first
+                    if event_result.get("success"):
+                        for analysis in extract_analyses(event_result.get("data", {})):
+                            display_single_analysis(analysis)
+                    else:
+                        st.error(f"❌ Alert {rows[index]['AlertID']}: {event_result.get('error', 'Unknown error')}")
+                predicted = sum(prediction is not None for prediction in predictions)
+                skipped = sum(prediction is not None and bool(prediction.get("skipped")) for prediction in predictions)
+                progress.progress(len(analyses) / total,
+                                  text=f"{predicted - skipped} / {total} predicted, {skipped} without prediction fields, "
+                                       f"{len(analyses)} / {total} reports ready")
+                queue_table.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+            # Alerts whose prediction never arrived or was skipped are left out
+            st.session_state.prediction_result = combine_prediction_results(
+                [prediction for prediction in predictions if prediction is not None and not prediction.get("skipped")])
+            keep_analysis_result(combine_analysis_results(analyses))
+            rendered_live = True
+        elif generate and streaming:
+            api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
+            st.markdown("---")
+            st.subheader("📈 Results")
+            stream = AnalysisStream(
+                alerts_analysis_data,
+                api_url,
+                cloud=use_cloud,
+                llm_on_server=llm_on_server,
+                url=remote_url,
+                anonymous=anonymous,
+                audit=audit,
+                evaluation=evaluation,
+                client=get_api_client(api_url),
+                cache=get_cache(),
+                store=get_store()
+            )
+            display_analysis_stream(stream, len(alerts_analysis_data))
+            keep_analysis_result(stream.result)
+            # Redraw with metadata and timing now that every report is complete
+            st.rerun()
+        elif generate and background:
+            api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
+            job = submit_analysis_job(
+                alerts_analysis_data,
+                api_url,
+                adaptive,
+                group_size if progressive else len(alerts_analysis_data),
+                cloud=use_cloud,
+                llm_on_server=llm_on_server,
+                url=remote_url,
+                anonymous=anonymous,
+                audit=audit,
+                evaluation=evaluation
+            )
+            st.toast(f"Job {job.id} started in the background")
+        elif generate and progressive:
+            api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
+            st.markdown("---")
+            st.subheader("📈 Results")
+            progress = st.progress(0.0, text=f"0 / {len(alerts_analysis_data)} reports ready")
+            outcomes = []
+            done = 0
+            for group, group_result in iter_analysis_groups(
+                alerts_analysis_data,
+                api_url,
+                adaptive,
+                group_size,
+                cloud=use_cloud,
+                llm_on_server=llm_on_server,
+                url=remote_url,
+                anonymous=anonymous,
+                audit=audit,
+                evaluation=evaluation,
+                max_concurrency=st.session_state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                client=get_api_client(api_url),
+                cache=get_cache(),
+                store=get_store()
+            ):
+                outcomes.append((group, group_result))
+                done += len(group)
+                progress.progress(done / len(alerts_analysis_data), text=f"{done} / {len(alerts_analysis_data)} reports ready")
+                # Render each report as soon as its request finishes
+                if group_result.get("success"):
+                    for analysis in extract_analyses(group_result.get("data", {})):
+                        display_single_analysis(analysis)
+                else:
+                    st.error(f"❌ Error: {group_result.get('error', 'Unknown error')}")
+            keep_analysis_result(merge_analysis_results(outcomes))
+            rendered_live = True
+        elif generate and adaptive:
+            api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
+            with st.spinner("Generating AML analysis in adaptive batches..."):
+                outcomes = list(iter_analysis_groups(
+                    alerts_analysis_data,
+                    api_url,
+                    adaptive,
+                    group_size,
+                    cloud=use_cloud,
+                    llm_on_server=llm_on_server,
+                    url=remote_url,
+                    anonymous=anonymous,
+                    audit=audit,
+                    evaluation=evaluation,
+                    max_concurrency=st.session_state.get('max_concurrency', DEFAULT_MAX_CONCURRENCY),
+                    client=get_api_client(api_url),
+                    cache=get_cache(),
+                    store=get_store()
+                ))
+                keep_analysis_result(merge_analysis_results(outcomes))
+        elif generate:
             # Get API base URL from sidebar (stored in session state)
             api_url = st.session_state.get('api_base_url', DEFAULT_API_BASE_URL)
             with st.spinner("Generating AML analysis... This may take a few moments."):
@@ -785,15 +1706,41 @@ def main():
                     url=remote_url,
                     anonymous=anonymous,
                     audit=audit,
-                    evaluation=evaluation
+                    evaluation=evaluation,
+                    client=get_api_client(api_url),
+                    cache=get_cache(),
+                    store=get_store()
                 )
-                st.session_state.analysis_result = result
+                keep_analysis_result(result)
         
-        # Display results
-        if 'analysis_result' in st.session_state:
+        analysis_jobs_panel()
+
+        if st.session_state.get('analysis_batch_plan'):
+            display_batch_plan(st.session_state.analysis_batch_plan)
+
+        # Display results (already shown above if they were rendered progressively this run)
+        if 'analysis_result' in st.session_state and not rendered_live:
             st.markdown("---")
             st.subheader("📈 Results")
             display_analysis_result(st.session_state.analysis_result)
 
+    # Tab 3: Performance dashboard
+    with tab3:
+        st.header("📉 Latency & Throughput")
+        st.markdown("Every alert answered or failed by the prediction and analysis APIs since the app started "
+                    f"(latest {HISTORY_SIZE:,}, all sessions).")
+        performance_dashboard()
+
+    # Tab 4: Stored results
+    with tab4:
+        st.header("🗃️ Result History")
+        st.markdown("Predictions and analyses saved in the result store by every session and batch run. "
+                    "Viewing them does not call the API.")
+        result_history()
+
+    with memory_report:
+        display_session_memory()
+    record_run_time("script", started)
+
 if __name__ == "__main__":
     main()
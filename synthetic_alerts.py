@@ -0,0 +1,366 @@
+"""Seeded generator of realistic alerts for scale and payload-size testing.
+
+Alerts are built in exactly the schemas of PREDICTION_EXAMPLE and
+ANALYSIS_EXAMPLE. Each one is a customer with a KYC profile and a scenario
+(large loan installments, cash structuring or rapid movement of funds) whose
+transactions follow the scenario's pattern, together with the counterparties
+they were sent to, earlier alerts and a branch query with its response. Alert
+i depends only on the seed and i, so the first N alerts of a larger file are
+the same as those of a smaller one.
+
+The number of transactions per customer is drawn between a minimum and a
+maximum (log-uniform), up to tens of thousands. Files are written alert by
+alert in the CSV, JSON Lines and Parquet layouts that bulk_ingest reads, so
+they can be uploaded in the app, fed to batch_runner.py or used by
+benchmark.py --analysis-file / --prediction-file.
+
+    python synthetic_alerts.py analysis --alerts 2000 --transactions 20 500 -o alerts.jsonl
+    python synthetic_alerts.py prediction --alerts 1000 --transactions 10000 -o big.parquet --seed 7
+"""
+import argparse
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from bulk_ingest import SCHEMAS, detect_format
+
+DEFAULT_SEED = 42
+FIRST_ALERT_ID = 500000
+FIRST_CUSTOMER_ID = 300000
+# Alerts per block written to CSV and Parquet files
+WRITE_BLOCK = 200
+
+START_DATE = datetime(2025, 1, 1)
+PERIOD_DAYS = 180
+
+FIRST_NAMES = ["Muhammad", "Ayesha", "Ali", "Fatima", "Hassan", "Zainab", "Usman", "Sana", "Bilal", "Hira",
+               "Imran", "Maryam", "Kamran", "Nadia", "Faisal", "Amna", "Tariq", "Rabia", "Asad", "Saima"]
+LAST_NAMES = ["Sheikh", "Malik", "Khan", "Qureshi", "Butt", "Chaudhry", "Siddiqui", "Raza", "Hussain", "Iqbal",
+              "Mirza", "Javed", "Abbasi", "Baig", "Anwar"]
+BRANCHES = ["KHI-DHA", "KHI-CLF", "LHR-GUL", "LHR-MDL", "ISB-F7", "ISB-BLU", "RWP-SAD", "FSD-MAL", "MUL-CNT",
+            "PEW-UNI"]
+# (occupation, median monthly income in PKR)
+OCCUPATIONS = [("Private Employee", 85000), ("Government Employee", 70000), ("Textile Trader", 250000),
+               ("Shopkeeper", 120000), ("Doctor", 300000), ("Student", 15000), ("Freelancer", 150000),
+               ("Property Dealer", 400000), ("Housewife", 10000), ("Importer", 600000)]
+# (country, jurisdiction, account country code, risk level)
+COUNTERPARTY_PLACES = [("Pakistan", "Karachi", "PK", "Low"), ("Pakistan", "Lahore", "PK", "Low"),
+                       ("Pakistan", "Faisalabad", "PK", "Low"), ("United Arab Emirates", "Dubai", "AE", "Medium"),
+                       ("United Kingdom", "London", "GB", "Medium"), ("China", "Guangzhou", "CN", "Medium"),
+                       ("Afghanistan", "Kabul", "AF", "High"), ("Iran", "Tehran", "IR", "High")]
+COUNTERPARTY_KINDS = [("Traders", "Supplier"), ("Imports Ltd", "Business Partner"), ("Exchange Co", "Exchange"),
+                      ("Textiles", "Local Supplier"), ("Holdings LLC", "Investor"), ("", "Family Member")]
+SCREENING_RESULTS = {"Low": "Verified local business entity", "Medium": "No adverse media found",
+                     "High": "Flagged for enhanced due diligence - high-risk jurisdiction"}
+
+INSTALLMENTS = "Unusually large installment"
+STRUCTURING = "Structuring / Smurfing activity"
+RAPID_MOVEMENT = "Rapid movement of funds"
+SCENARIOS = [INSTALLMENTS, STRUCTURING, RAPID_MOVEMENT]
+PREVIOUS_ALERT_NAMES = ["Large Cash Deposits", "Rapid Fund Transfers", "Unusual Loan Repayment",
+                        "High-Risk Jurisdiction Transfer", "Dormant Account Reactivation"]
+BRANCH_EXPLANATIONS = ["Proceeds from sale of family property", "Remittances from relatives working abroad",
+                       "Daily cash collections from retail sales", "Payment for imported machinery",
+                       "Advance salary and savings"]
+BRANCH_RESPONSES = ["Customer provided remittance receipts and an employer letter.",
+                    "Customer provided the sales register and GST invoices.",
+                    "Customer stated the funds are family savings; no documents were provided.",
+                    "Customer provided the sale deed and bank statements of the buyer.",
+                    "Customer did not respond to the branch within the deadline."]
+
+
+def _cnic(rng: random.Random) -> str:
+    return f"{rng.randint(10000, 99999)}-{rng.randint(1000000, 9999999)}-{rng.randint(1, 9)}"
+
+
+def _iban(rng: random.Random, country: str) -> str:
+    return f"{country}{rng.randint(10, 99)}{''.join(str(rng.randint(0, 9)) for _ in range(18))}"
+
+
+def _timestamp(when: datetime) -> str:
+    return when.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _pkr(amount: float) -> str:
+    return f"{amount:,.0f} PKR"
+
+
+def transaction_count(rng: random.Random, low: int, high: int) -> int:
+    """A count between low and high, log-uniform so small and large customers are both common"""
+    if high <= low:
+        return low
+    return int(round(math.exp(rng.uniform(math.log(max(low, 1)), math.log(high)))))
+
+
+def _counterparties(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    parties = []
+    for _ in range(count):
+        country, jurisdiction, code, risk = rng.choice(COUNTERPARTY_PLACES)
+        suffix, relationship = rng.choice(COUNTERPARTY_KINDS)
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        parties.append({"Name": f"{name} {suffix}".strip() if suffix else name, "AccountID": _iban(rng, code),
+                        "Country": country, "Jurisdiction": jurisdiction, "Relationship": relationship,
+                        "RiskLevel": risk, "ScreeningResult": SCREENING_RESULTS[risk]})
+    return parties
+
+
+def _transactions(rng: random.Random, scenario: str, count: int, income: float,
+                  parties: List[Dict[str, Any]]) -> List[Tuple[datetime, float, str, Optional[Dict[str, Any]]]]:
+    """(time, amount, type, counterparty) per transaction, oldest first"""
+    rows = []
+    day = START_DATE + timedelta(days=rng.randrange(PERIOD_DAYS))
+    for i in range(count):
+        when = START_DATE + timedelta(seconds=rng.randrange(PERIOD_DAYS * 86400))
+        party = None
+        if scenario == INSTALLMENTS:
+            kind, amount = "Loan Installment", income * rng.uniform(1.5, 3.0)
+        elif scenario == STRUCTURING and rng.random() < 0.7:
+            # Deposits just under the 10,000 PKR reporting threshold, a burst of them per day
+            if i % rng.randint(3, 8) == 0:
+                day = START_DATE + timedelta(days=rng.randrange(PERIOD_DAYS))
+            when = day + timedelta(hours=rng.uniform(9, 21))
+            kind, amount = "Cash Deposit", rng.uniform(9000, 9999)
+        elif scenario == RAPID_MOVEMENT and rng.random() < 0.5:
+            party = rng.choice(parties)
+            kind, amount = "Wire Transfer", income * rng.lognormvariate(1.0, 0.6)
+        else:
+            kind = rng.choice(["Cash Deposit", "Local Transfer", "Cash Withdrawal", "Payment", "Incoming Transfer"])
+            amount = income * rng.lognormvariate(-1.5, 0.8)
+            if kind in ("Local Transfer", "Incoming Transfer") and parties:
+                party = rng.choice(parties)
+        rows.append((when, round(amount, 2), kind, party))
+    rows.sort(key=lambda row: row[0])
+    return rows
+
+
+def generate_case(index: int, transactions: Tuple[int, int] = (3, 10), seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """Everything both alert schemas are built from for alert number index (0-based)"""
+    rng = random.Random(seed * 1_000_003 + index)
+    scenario = SCENARIOS[index % len(SCENARIOS)]
+    occupation, median_income = rng.choice(OCCUPATIONS)
+    income = round(median_income * rng.lognormvariate(0, 0.3), -3)
+    risk = rng.choices(["Low", "Medium", "High"], weights=[6, 3, 1])[0]
+    customer_id = str(FIRST_CUSTOMER_ID + index)
+    opened = START_DATE - timedelta(days=rng.randrange(90, 15 * 365))
+    parties = _counterparties(rng, rng.randint(0 if scenario == INSTALLMENTS else 1, 6))
+    credits = rng.randint(2, 10)
+    debits = rng.randint(2, 15)
+    return {
+        "index": index,
+        "rng": rng,
+        "scenario": scenario,
+        "alert_id": FIRST_ALERT_ID + index,
+        "customer_id": customer_id,
+        "identity": _cnic(rng),
+        "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "occupation": occupation,
+        "income": income,
+        "risk": risk,
+        "credits": (credits, credits + rng.randint(0, 4)),
+        "debits": (debits, debits + rng.randint(0, 4)),
+        "opened": opened,
+        "created": START_DATE + timedelta(days=PERIOD_DAYS, hours=rng.uniform(0, 24 * 30)),
+        "branch": rng.choice(BRANCHES),
+        "customer_type": "Corporate" if occupation == "Importer" else "Retail",
+        "str_count": rng.choices([0, 1, 2, 3], weights=[6, 2, 1, 1])[0],
+        "parties": parties,
+        "transactions": _transactions(rng, scenario, transaction_count(rng, *transactions), income, parties),
+    }
+
+
+def _previous_alerts(case: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rng = case["rng"]
+    alerts = []
+    for name in rng.sample(PREVIOUS_ALERT_NAMES, case["str_count"]):
+        escalated = rng.random() < 0.4
+        alerts.append({
+            "AlertName": name,
+            "Description": f"{rng.randint(2, 40) * 50000:,} PKR in {name.lower()} within {rng.randint(1, 30)} days",
+            "BranchExplanation": rng.choice(BRANCH_EXPLANATIONS),
+            "Documentation": rng.choice(["", "Bank statements", "Sale deed", "Invoices"]),
+            "RiskEscalation": "Risk score escalated after repeated activity of the same kind." if escalated else "",
+        })
+    return alerts
+
+
+def _branch_queries(case: Dict[str, Any], total: float) -> Dict[str, str]:
+    rng = case["rng"]
+    return {
+        "Requested": f"{case['scenario']}: transactions totaling {_pkr(total)} against declared monthly income "
+                     f"of {_pkr(case['income'])}. Please confirm the source of funds and provide documentation.",
+        "Response": f"{rng.choice(BRANCH_EXPLANATIONS)}. {rng.choice(BRANCH_RESPONSES)}",
+    }
+
+
+def analysis_alert(case: Dict[str, Any]) -> Dict[str, Any]:
+    """An alert in the schema of ANALYSIS_EXAMPLE"""
+    records = []
+    used: Dict[str, Dict[str, Any]] = {}
+    for number, (when, amount, kind, party) in enumerate(case["transactions"], start=1):
+        record = {"CUSTOMERID": case["customer_id"], "IDENTITYNUMBERS": case["identity"],
+                  "LOANID": f"LN{case['customer_id']}" if kind == "Loan Installment" else "",
+                  "ACCOUNTID": f"AC{case['customer_id']}", "CREATEDDATE": _timestamp(when),
+                  "TRANSACTIONAMOUNT": amount, "CURRENCY": "PKR", "TRANSACTIONTYPE": kind,
+                  "COUNTERPARTYACCOUNT": party["AccountID"] if party else "", "EXCESSAMOUNT": 0.0}
+        if kind == "Loan Installment":
+            record["INSTALLMENTNUMBER"] = number
+        records.append(record)
+        if party and party["AccountID"] not in used:
+            used[party["AccountID"]] = dict(party, TransactionAmount=amount, Currency="PKR",
+                                            TransactionDate=_timestamp(when), TransactionType=kind)
+    total = sum(amount for _, amount, _, _ in case["transactions"])
+    previous = _previous_alerts(case)
+    credit_value = case["income"] * case["credits"][1] / 4
+    debit_value = case["income"] * case["debits"][1] / 6
+    return {
+        "AlertID": case["alert_id"],
+        "FilteredTransactions": json.dumps(records, separators=(",", ":")),
+        "FocusColumnValue": case["customer_id"],
+        "KYCMonthlyIncome": _pkr(case["income"]),
+        "KYCNoOfCredits": "{}-{}".format(*case["credits"]),
+        "KYCNoOfDebits": "{}-{}".format(*case["debits"]),
+        "KYCRiskCategoryValue": case["risk"],
+        "KYCValueOfCredits": f"{_pkr(0.75 * credit_value)[:-4]} - {_pkr(credit_value)}",
+        "KYCValueOfDebits": f"{_pkr(0.75 * debit_value)[:-4]} - {_pkr(debit_value)}",
+        "OccupationValue": case["occupation"],
+        "STRCount": case["str_count"],
+        "STRScenarioHistory": ", ".join(alert["AlertName"] for alert in previous),
+        "ScenarioName": case["scenario"],
+        "CustomerName": case["name"],
+        "CUSTOMERID": case["customer_id"],
+        "BranchID": case["branch"],
+        "Country": "Pakistan",
+        "CustomerType": case["customer_type"],
+        "CustomerStatus": f"{case['customer_type']} Customer",
+        "CreatedDate": case["opened"].strftime("%Y-%m-%d"),
+        "RelationshipStartDate": case["opened"].strftime("%Y-%m-%d"),
+        "RiskScore": f"{case['rng'].uniform(1, 10):.1f}",
+        "PreviousAlerts": previous,
+        "Counterparties": list(used.values()),
+        "BranchQueries": _branch_queries(case, total),
+    }
+
+
+def prediction_alert(case: Dict[str, Any]) -> Dict[str, Any]:
+    """An alert in the schema of PREDICTION_EXAMPLE"""
+    focus = f"PK-{case['identity']}"
+    records = []
+    for number, (_, amount, kind, party) in enumerate(case["transactions"], start=1):
+        record = {"ID": focus, "TRANSACTIONAMOUNT": amount, "CURRENCY": "PKR", "TRANSACTIONTYPE": kind}
+        if kind == "Loan Installment":
+            record["INSTALLMENTNUMBER"] = number
+        if party:
+            record["COUNTERPARTYACCOUNT"] = party["AccountID"]
+        records.append(record)
+    rng = case["rng"]
+    score = round(rng.uniform(60, 99), 1)
+    return {
+        "AlertID": case["alert_id"],
+        "FocusColumnValue": focus,
+        "AlertScore": score,
+        "CreateDate": case["created"].strftime("%Y-%m-%dT%H:%M:%S"),
+        "riskLevel": case["risk"],
+        "MatchDetails": json.dumps({"id": focus, "scenario": case["scenario"], "score": score,
+                                    "riskLevel": case["risk"]}),
+        "MatchInfoJson": json.dumps(records, separators=(",", ":")),
+        "ScenarioName": case["scenario"],
+        "workflow": "Unassigned",
+    }
+
+
+ALERT_BUILDERS = {"analysis": analysis_alert, "prediction": prediction_alert}
+
+
+def iter_alerts(kind: str, count: int, transactions: Tuple[int, int] = (3, 10),
+                seed: int = DEFAULT_SEED) -> Iterator[Dict[str, Any]]:
+    """count alerts of kind ('analysis' or 'prediction'), one at a time"""
+    build = ALERT_BUILDERS[kind]
+    for index in range(count):
+        yield build(generate_case(index, transactions, seed))
+
+
+def generate_alerts(kind: str, count: int, transactions: Tuple[int, int] = (3, 10),
+                    seed: int = DEFAULT_SEED) -> List[Dict[str, Any]]:
+    return list(iter_alerts(kind, count, transactions, seed))
+
+
+def _flat_rows(alerts: List[Dict[str, Any]], kind: str) -> pd.DataFrame:
+    """Alerts as a frame with the list/dict fields as JSON text, as CSV and Parquet hold them"""
+    frame = pd.DataFrame(alerts)
+    for column in SCHEMAS[kind]["json_objects"]:
+        if column in frame:
+            frame[column] = [json.dumps(value) for value in frame[column]]
+    return frame
+
+
+def write_alerts(alerts: Iterator[Dict[str, Any]], path: str, kind: str) -> int:
+    """Write alerts to path (format from the extension, as bulk_ingest reads it); returns the alert count"""
+    file_format = detect_format(path)
+    written = 0
+    if file_format == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert) + "\n")
+                written += 1
+        return written
+
+    writer = None
+    block: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        nonlocal writer
+        frame = _flat_rows(block, kind)
+        if file_format == "csv":
+            frame.to_csv(path, mode="w" if writer is None else "a", header=writer is None, index=False)
+            writer = True
+        else:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+        block.clear()
+
+    if file_format == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Writing Parquet files requires the 'pyarrow' package.")
+    try:
+        for alert in alerts:
+            block.append(alert)
+            written += 1
+            if len(block) >= WRITE_BLOCK:
+                flush()
+        if block or writer is None:
+            flush()
+    finally:
+        if file_format == "parquet" and writer is not None:
+            writer.close()
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Write seeded synthetic alerts for scale testing.")
+    parser.add_argument("kind", choices=sorted(ALERT_BUILDERS), help="Alert schema")
+    parser.add_argument("-o", "--output", required=True, help="CSV, JSONL or Parquet file to write")
+    parser.add_argument("--alerts", type=int, default=1000)
+    parser.add_argument("--transactions", type=int, nargs="+", default=[3, 10],
+                        help="Transactions per customer: a fixed count, or a minimum and maximum")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+
+    low, high = args.transactions[0], args.transactions[-1]
+    started = time.perf_counter()
+    written = write_alerts(iter_alerts(args.kind, args.alerts, (low, high), args.seed), args.output, args.kind)
+    print(f"Wrote {written:,} {args.kind} alerts ({low:,}-{high:,} transactions each) to {args.output} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Background warm-up and keep-alive probes for the AML AI service.
+
+The Hugging Face Space behind DEFAULT_API_BASE_URL sleeps when idle, and the
+first request after that waits for the container to start. A Warmer sends a
+GET to the base URL as soon as it is created (app start or a new base URL)
+and then every keep-alive interval, through the pooled client so a
+connection is already open when the first real request goes out. Each probe
+is timed and classified as cold (the first probe, one after a failure, or one
+far slower than the warm median) or warm.
+
+Warmers are kept per base URL at module level and stop by themselves once
+nobody has asked for them for IDLE_STOP_S.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+
+from http_pool import PooledClient
+from latency_stats import percentile
+
+DEFAULT_KEEPALIVE_MINUTES = 10
+# Long enough for a sleeping Space to finish booting
+PROBE_READ_TIMEOUT = 180.0
+PROBE_HISTORY = 50
+# A probe this many times slower than the warm median counts as a cold start
+COLD_FACTOR = 5.0
+IDLE_STOP_S = 8 * 3600
+
+WARMING = "warming"
+READY = "ready"
+UNREACHABLE = "unreachable"
+
+
+def probe(client: PooledClient) -> Dict[str, Any]:
+    """GET the base URL once; any answer below 500 means the service is up"""
+    started = time.perf_counter()
+    try:
+        response = client.get(client.base_url + "/", PROBE_READ_TIMEOUT)
+        ok, status, error = response.status_code < 500, response.status_code, None
+    except httpx.HTTPError as e:
+        ok, status, error = False, None, str(e) or type(e).__name__
+    return {"time": time.time(), "latency_ms": 1000 * (time.perf_counter() - started), "ok": ok,
+            "status": status, "error": error}
+
+
+class Warmer:
+    """Probe thread for one base URL"""
+
+    def __init__(self, client: PooledClient, interval_s: float):
+        self.client = client
+        self.base_url = client.base_url
+        self.interval_s = interval_s
+        self.state = WARMING
+        self.probe_started: Optional[float] = None
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+        self._probes: Deque[Dict[str, Any]] = deque(maxlen=PROBE_HISTORY)
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"warmer {self.base_url}", daemon=True)
+        self._thread.start()
+
+    def touch(self, client: PooledClient, interval_s: float) -> None:
+        """Keep the warmer alive, on the current pooled client and interval"""
+        self.client = client
+        self.last_used = time.monotonic()
+        if interval_s != self.interval_s:
+            self.interval_s = interval_s
+            self._wake.set()  # apply the new interval now rather than after the old one
+
+    def probe_now(self) -> None:
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            self.probe()
+            self._wake.wait(self.interval_s if self.interval_s > 0 else IDLE_STOP_S)
+            self._wake.clear()
+            if time.monotonic() - self.last_used > IDLE_STOP_S:
+                _forget(self)
+                return
+
+    def _warm_latencies(self) -> List[float]:
+        return sorted(p["latency_ms"] for p in self._probes if p["ok"] and not p["cold"])
+
+    def probe(self) -> Dict[str, Any]:
+        """Send one probe and record it"""
+        with self._lock:
+            previous = self._probes[-1] if self._probes else None
+            self.probe_started = time.monotonic()
+        record = probe(self.client)
+        with self._lock:
+            warm = self._warm_latencies()
+            cold = (previous is None or not previous["ok"]
+                    or (len(warm) >= 3 and record["latency_ms"] > COLD_FACTOR * percentile(warm, 50)))
+            record["cold"] = record["ok"] and cold
+            self._probes.append(record)
+            self.state = READY if record["ok"] else UNREACHABLE
+            self.probe_started = None
+        return record
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            probes = list(self._probes)
+            warm = self._warm_latencies()
+            in_flight_s = time.monotonic() - self.probe_started if self.probe_started is not None else None
+        cold = [p["latency_ms"] for p in probes if p["cold"]]
+        last = probes[-1] if probes else None
+        return {
+            "base_url": self.base_url,
+            "state": self.state,
+            "interval_s": self.interval_s,
+            "probes": len(probes),
+            "probe_in_flight_s": in_flight_s,
+            "last_probe": last,
+            "warm_p50_ms": percentile(warm, 50) if warm else None,
+            "cold_ms": cold[-1] if cold else None,
+            "cold_starts": len(cold),
+        }
+
+
+_warmers: Dict[str, Warmer] = {}
+_warmers_lock = threading.Lock()
+
+
+def _forget(warmer: Warmer) -> None:
+    with _warmers_lock:
+        if _warmers.get(warmer.base_url) is warmer:
+            del _warmers[warmer.base_url]
+
+
+def ensure_warmer(client: PooledClient, interval_s: float = 60.0 * DEFAULT_KEEPALIVE_MINUTES) -> Warmer:
+    """The warmer for client's base URL, started (with an immediate probe) if there is none yet.
+
+    interval_s <= 0 keeps the initial warm-up but turns the periodic keep-alive off.
+    """
+    with _warmers_lock:
+        warmer = _warmers.get(client.base_url)
+        if warmer is None:
+            warmer = _warmers[client.base_url] = Warmer(client, interval_s)
+        else:
+            warmer.touch(client, interval_s)
+        return warmer
+
+
+def warmup_status(base_url: str) -> Optional[Dict[str, Any]]:
+    with _warmers_lock:
+        warmer = _warmers.get(base_url.rstrip("/"))
+    return warmer.snapshot() if warmer is not None else None
+
+
+def wait_until_ready(client: PooledClient, timeout: float = PROBE_READ_TIMEOUT) -> Dict[str, Any]:
+    """Probe in the foreground until the service answers or timeout passes; returns the last probe"""
+    deadline = time.monotonic() + timeout
+    while True:
+        record = probe(client)
+        if record["ok"] or time.monotonic() >= deadline:
+            return record
+        time.sleep(min(5.0, max(0.0, deadline - time.monotonic())))
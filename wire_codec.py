@@ -0,0 +1,96 @@
+"""Compact request bodies for the AML AI service.
+
+In compact wire mode a JSON payload is serialised without whitespace and the
+body is compressed with gzip (standard library) or zstd (optional
+'zstandard' package). The repeated transaction keys and per-alert flags are
+exactly what these codecs remove, so the payload shape the service expects is
+unchanged. Which codings a server accepts for request bodies is negotiated
+from the Accept-Encoding header it sends back (RFC 7694); the same helpers
+decode bodies in the local mock service.
+"""
+import gzip
+import json
+import zlib
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+    _CORRUPT_BODY_ERRORS: Tuple[type, ...] = (OSError, EOFError, zlib.error, zstandard.ZstdError)
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+    _CORRUPT_BODY_ERRORS = (OSError, EOFError, zlib.error)
+
+IDENTITY = "identity"
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+# Bodies smaller than this are sent as-is; compression would not pay off
+MIN_COMPRESS_BYTES = 1024
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Request codings this installation can produce and decode, best first"""
+    return ("zstd", "gzip") if ZSTD_AVAILABLE else ("gzip",)
+
+
+def compact_json(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    if encoding == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression needs the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if encoding == IDENTITY:
+        return data
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def decompress(data: bytes, encoding: Optional[str]) -> bytes:
+    """Body bytes for a Content-Encoding header value; raises ValueError for unknown codings"""
+    encoding = (encoding or IDENTITY).strip().lower()
+    if encoding == IDENTITY:
+        return data
+    try:
+        if encoding == "gzip":
+            return gzip.decompress(data)
+        if encoding == "zstd" and ZSTD_AVAILABLE:
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    except _CORRUPT_BODY_ERRORS as e:
+        raise ValueError(f"Corrupt {encoding} body: {e}")
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def parse_accept_encoding(header: Optional[str]) -> Set[str]:
+    """Codings listed in an Accept-Encoding header (q=0 entries excluded)"""
+    codings = set()
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            codings.add(name.strip().lower())
+    return codings
+
+
+def choose_encoding(preferred: str, accepted: Iterable[str]) -> str:
+    """preferred if the server accepts it, else the best other coding both sides support"""
+    accepted = set(accepted)
+    if preferred in accepted:
+        return preferred
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return IDENTITY
+
+
+def encode_body(payload: Any, encoding: str) -> Tuple[bytes, Dict[str, str], int]:
+    """(body, headers, uncompressed size) for a JSON payload in compact wire mode"""
+    raw = compact_json(payload)
+    headers = {"Content-Type": "application/json"}
+    if encoding != IDENTITY and len(raw) >= MIN_COMPRESS_BYTES:
+        headers["Content-Encoding"] = encoding
+        return compress(raw, encoding), headers, len(raw)
+    return raw, headers, len(raw)